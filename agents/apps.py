@@ -5,3 +5,7 @@ class AgentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'agents'
     verbose_name = 'Agent Interface'
+
+    def ready(self):
+        """Import signals when the app is ready"""
+        import agents.signals
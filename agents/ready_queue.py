@@ -0,0 +1,231 @@
+# agents/ready_queue.py
+"""
+Ready-agent queue - which agent takes the next answered autodial call
+
+Agents with a ready AgentDialerSession (a bridge waiting for customers)
+and AgentStatus 'available' sit in a per-campaign sorted set scored by
+the moment they became available, so the longest-idle agent is always
+first. ari_worker claims an agent for an answered call with one scripted
+call: two calls answered at the same instant can never get the same
+agent, and the claim costs one Redis round trip instead of a database
+query. A claim only takes agents whose session is on the Asterisk server
+carrying the answered call (their bridge lives there); agents on other
+servers keep their place for calls answered on their own server.
+
+The set follows the database: saves of AgentDialerSession and
+AgentStatus re-check the agent (agents.signals), the worker re-checks
+after its own bulk updates, and sync_ready_agents rebuilds every set
+from the database as a safety net. A claimed agent is not re-added for
+CLAIM_GRACE_MS while the database still shows the availability that
+predates the claim - the worker marks them busy right after it. A newer
+availability (their call already ended) re-queues them at once.
+
+Data Structures:
+- campaign:{id}:ready_agents (Sorted Set) - agent user ids, score = available-since (epoch ms)
+- agent:{id}:seat (Hash) - campaign, bridge, channel, server of the agent's session; claimed_at (epoch ms) once claimed
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReadyAgentQueue:
+    """
+    Per-campaign longest-idle-first queue of agents ready for autodial
+
+    Usage:
+        claim = ReadyAgentQueue.claim(campaign_id, server_id=server.id)
+        if claim:
+            add customer to claim['bridge_id'], then mark claim['agent_id'] busy
+        ReadyAgentQueue.sync_agent(agent_id)   # after changing a session or status in bulk
+    """
+
+    # Milliseconds a claimed agent is kept out of the queue while the
+    # database still shows them available from before the claim
+    CLAIM_GRACE_MS = 10000
+
+    # Add or refresh an agent; an unexpired claim newer than their
+    # available-since keeps them out, and NX keeps the original
+    # available-since score when already queued
+    MARK_READY_LUA = """
+    local seat = redis.call('HMGET', KEYS[2], 'campaign', 'claimed_at')
+    local claimed_at = tonumber(seat[2])
+    if claimed_at and tonumber(ARGV[5]) <= claimed_at
+            and tonumber(ARGV[6]) - claimed_at < tonumber(ARGV[7]) then
+        return 0
+    end
+    if seat[1] and seat[1] ~= ARGV[2] then
+        redis.call('ZREM', 'campaign:' .. seat[1] .. ':ready_agents', ARGV[1])
+    end
+    redis.call('DEL', KEYS[2])
+    redis.call('HSET', KEYS[2], 'campaign', ARGV[2], 'bridge', ARGV[3], 'channel', ARGV[4], 'server', ARGV[8])
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[5], ARGV[1])
+    return 1
+    """
+
+    REMOVE_LUA = """
+    local campaign = redis.call('HGET', KEYS[1], 'campaign')
+    if campaign then
+        redis.call('ZREM', 'campaign:' .. campaign .. ':ready_agents', ARGV[1])
+    end
+    return redis.call('DEL', KEYS[1])
+    """
+
+    # Take the longest-idle agent whose seat is still in this campaign and
+    # on the call's server (ARGV[3], '' = any); entries left behind by a
+    # campaign switch are dropped on the way, other servers' agents are kept
+    CLAIM_LUA = """
+    local start = 0
+    while true do
+        local batch = redis.call('ZRANGE', KEYS[1], start, start + 49, 'WITHSCORES')
+        if #batch == 0 then
+            return false
+        end
+        for i = 1, #batch, 2 do
+            local seat_key = 'agent:' .. batch[i] .. ':seat'
+            local seat = redis.call('HMGET', seat_key, 'campaign', 'bridge', 'channel', 'server')
+            if seat[1] ~= ARGV[1] or not seat[2] then
+                redis.call('ZREM', KEYS[1], batch[i])
+            elseif ARGV[3] == '' or not seat[4] or seat[4] == '' or seat[4] == ARGV[3] then
+                redis.call('ZREM', KEYS[1], batch[i])
+                redis.call('HSET', seat_key, 'claimed_at', ARGV[2])
+                return {batch[i], seat[2], seat[3] or '', batch[i + 1]}
+            else
+                start = start + 1
+            end
+        end
+    end
+    """
+
+    @staticmethod
+    def get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    @staticmethod
+    def ready_key(campaign_id):
+        return f"campaign:{campaign_id}:ready_agents"
+
+    @staticmethod
+    def seat_key(agent_id):
+        return f"agent:{agent_id}:seat"
+
+    @staticmethod
+    def mark_ready(agent_id, campaign_id, bridge_id, channel_id='', since=None, server_id=None):
+        """
+        Queue an agent for a campaign's calls
+        `since` (datetime) is when they became available; it orders the queue
+        `server_id` is the Asterisk server hosting the agent's bridge
+        Returns: True if queued, False while a recent claim holds them out
+        """
+        r = ReadyAgentQueue.get_redis()
+        now_ms = int(time.time() * 1000)
+        since_ms = int(since.timestamp() * 1000) if since else now_ms
+        mark = r.register_script(ReadyAgentQueue.MARK_READY_LUA)
+        return bool(mark(
+            keys=[ReadyAgentQueue.ready_key(campaign_id), ReadyAgentQueue.seat_key(agent_id)],
+            args=[agent_id, campaign_id, bridge_id, channel_id or '', since_ms, now_ms,
+                  ReadyAgentQueue.CLAIM_GRACE_MS, server_id or '']
+        ))
+
+    @staticmethod
+    def remove(agent_id):
+        """Take an agent out of whichever campaign queue holds them, and forget their seat"""
+        r = ReadyAgentQueue.get_redis()
+        remove = r.register_script(ReadyAgentQueue.REMOVE_LUA)
+        remove(keys=[ReadyAgentQueue.seat_key(agent_id)], args=[agent_id])
+
+    @staticmethod
+    def claim(campaign_id, server_id=None):
+        """
+        Atomically take the longest-idle ready agent of a campaign
+        `server_id` limits the claim to agents seated on that Asterisk server
+        Returns: {'agent_id', 'bridge_id', 'channel_id', 'idle_ms'} or None
+        """
+        r = ReadyAgentQueue.get_redis()
+        now_ms = int(time.time() * 1000)
+        claim = r.register_script(ReadyAgentQueue.CLAIM_LUA)
+        raw = claim(
+            keys=[ReadyAgentQueue.ready_key(campaign_id)],
+            args=[campaign_id, now_ms, server_id or '']
+        )
+        if not raw:
+            return None
+        agent_id, bridge_id, channel_id, since_ms = [v.decode('utf-8') if isinstance(v, bytes) else v for v in raw]
+        return {
+            'agent_id': int(agent_id),
+            'bridge_id': bridge_id,
+            'channel_id': channel_id,
+            'idle_ms': max(0, now_ms - int(float(since_ms))),
+        }
+
+    @staticmethod
+    def ready_count(campaign_id):
+        return ReadyAgentQueue.get_redis().zcard(ReadyAgentQueue.ready_key(campaign_id))
+
+    # ========================================================================
+    # Database sync
+    # ========================================================================
+
+    @staticmethod
+    def _eligible_sessions():
+        from agents.models import AgentDialerSession
+
+        return AgentDialerSession.objects.filter(
+            status='ready',
+            agent__agent_status__status='available',
+        ).exclude(agent_bridge_id='')
+
+    @staticmethod
+    def sync_agent(agent_id):
+        """
+        Queue or dequeue one agent from their current session and status
+        Returns: True if the agent is (still) queued
+        """
+        session = ReadyAgentQueue._eligible_sessions().filter(agent_id=agent_id).select_related(
+            'agent__agent_status'
+        ).order_by('-last_state_change').first()
+
+        if session is None:
+            ReadyAgentQueue.remove(agent_id)
+            return False
+        return ReadyAgentQueue.mark_ready(
+            agent_id, session.campaign_id, session.agent_bridge_id, session.agent_channel_id,
+            since=session.agent.agent_status.status_changed_at, server_id=session.asterisk_server_id
+        )
+
+    @staticmethod
+    def rebuild():
+        """
+        Make every campaign queue match the database
+        Returns: {'queued': n, 'removed': n}
+        """
+        r = ReadyAgentQueue.get_redis()
+        eligible = {}
+        for session in ReadyAgentQueue._eligible_sessions().select_related(
+            'agent__agent_status'
+        ).order_by('last_state_change'):
+            # Latest session wins for agents with more than one
+            eligible[session.agent_id] = session
+
+        removed = 0
+        for key in r.scan_iter(match='campaign:*:ready_agents', count=500):
+            campaign_id = key.decode('utf-8').split(':')[1]
+            for member in r.zrange(key, 0, -1):
+                agent_id = int(member)
+                session = eligible.get(agent_id)
+                if session is None or str(session.campaign_id) != campaign_id:
+                    r.zrem(key, member)
+                    if session is None:
+                        r.delete(ReadyAgentQueue.seat_key(agent_id))
+                    removed += 1
+
+        queued = 0
+        for agent_id, session in eligible.items():
+            queued += ReadyAgentQueue.mark_ready(
+                agent_id, session.campaign_id, session.agent_bridge_id, session.agent_channel_id,
+                since=session.agent.agent_status.status_changed_at, server_id=session.asterisk_server_id
+            )
+        return {'queued': queued, 'removed': removed}
@@ -0,0 +1,44 @@
+# agents/signals.py
+"""
+Keep the ready-agent queue (agents.ready_queue) in step with the database
+
+Any save or delete of an AgentDialerSession, and any AgentStatus save,
+re-checks that agent once the transaction commits. Bulk .update() calls
+skip signals; their callers sync explicitly (sync_agent_on_commit or
+ReadyAgentQueue.sync_agent), and the sync_ready_agents task catches the
+rest.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.models import AgentDialerSession
+from agents.ready_queue import ReadyAgentQueue
+from users.models import AgentStatus
+
+logger = logging.getLogger(__name__)
+
+
+def sync_agent_on_commit(agent_id):
+    """Re-check an agent's ready-queue entry once the current transaction commits"""
+    def sync():
+        try:
+            ReadyAgentQueue.sync_agent(agent_id)
+        except Exception as e:
+            logger.error(f"Ready-agent queue sync failed for agent {agent_id}: {e}")
+
+    transaction.on_commit(sync)
+
+
+@receiver(post_save, sender=AgentDialerSession)
+@receiver(post_delete, sender=AgentDialerSession)
+def dialer_session_changed(sender, instance, **kwargs):
+    sync_agent_on_commit(instance.agent_id)
+
+
+@receiver(post_save, sender=AgentStatus)
+def agent_status_changed(sender, instance, **kwargs):
+    sync_agent_on_commit(instance.user_id)
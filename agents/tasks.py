@@ -17,3 +17,14 @@ def refresh_all_agent_stats():
 
     for uid in active_user_ids:
         broadcast_stats_refresh(uid)
+
+
+@shared_task
+def sync_ready_agents():
+    """
+    Periodic task (every 15s): rebuild the ready-agent queues from the
+    database, for changes made with bulk updates that skip signals.
+    """
+    from agents.ready_queue import ReadyAgentQueue
+
+    return ReadyAgentQueue.rebuild()
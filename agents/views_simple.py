@@ -26,6 +26,7 @@ from agents.stats_broadcaster import broadcast_call_completed
 
 from agents.decorators import agent_required
 from agents.models import AgentCallbackTask, AgentDialerSession
+from agents.signals import sync_agent_on_commit
 from calls.models import CallLog
 from campaigns.models import Campaign, Disposition, CampaignDisposition, OutboundQueue
 from leads.models import Lead
@@ -413,6 +414,7 @@ def update_status(request):
                 # Also update the AgentDialerSession campaign so the ARI worker
                 # can find this agent under the correct campaign.
                 AgentDialerSession.objects.filter(agent=agent).update(campaign=campaign)
+                sync_agent_on_commit(agent.id)
             except (Campaign.DoesNotExist, ValueError):
                 pass
 
@@ -479,6 +481,7 @@ def select_campaign(request):
         agent_status.save(update_fields=['current_campaign'])
 
         AgentDialerSession.objects.filter(agent=agent).update(campaign=campaign)
+        sync_agent_on_commit(agent.id)
 
         # Rebuild dispositions for the new campaign so JS can refresh the modal
         camp_disps = CampaignDisposition.objects.filter(
@@ -579,7 +582,7 @@ def set_disposition(request):
         call_log.call_status = 'answered'
         call_log.save(update_fields=[
             'disposition', 'disposition_notes', 'end_time',
-            'talk_duration', 'call_status'
+            'talk_duration', 'call_status', 'updated_at'
         ])
 
         logger.info(
@@ -735,7 +738,7 @@ def hangup_call(request):
             call_log.total_duration = max(
                 0, int((call_log.end_time - call_log.start_time).total_seconds())
             )
-        call_log.save(update_fields=['call_status', 'end_time', 'talk_duration', 'total_duration'])
+        call_log.save(update_fields=['call_status', 'end_time', 'talk_duration', 'total_duration', 'updated_at'])
 
         # Put agent in wrapup
         agent_status, _ = AgentStatus.objects.get_or_create(user=agent)
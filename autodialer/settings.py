@@ -191,11 +191,7 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'campaigns.tasks.check_auto_wrapup_timeouts',
         'schedule': 5.0,  # Every 5 seconds
     },
-    # Phase 4.1: Predictive Dialer
-    'predictive-dial': {
-        'task': 'campaigns.tasks.predictive_dial',
-        'schedule': 1.0,  # Every second (using simple float for seconds)
-    },
+    # Phase 4.1: Predictive dialing runs in `manage.py dialer_engine`, not beat
     'cleanup-orphaned-sessions': {
         'task': 'campaigns.tasks.cleanup_orphaned_sessions',
         'schedule': 30.0,  # Every 30 seconds
@@ -220,16 +216,56 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'campaigns.tasks.check_agent_registrations',
         'schedule': 60.0,  # Every 60 seconds (safety net, real-time events handle most updates)
     },
+    # Daily stats rollups: incremental folds in changed CallLogs, the full
+    # passes also write zero rows for active campaigns without calls and
+    # catch agents whose calls moved to another agent
+    'update-campaign-stats-incremental': {
+        'task': 'campaigns.tasks.update_campaign_stats',
+        'schedule': 10.0,
+        'kwargs': {'incremental': True},
+    },
+    'update-campaign-stats': {
+        'task': 'campaigns.tasks.update_campaign_stats',
+        'schedule': 300.0,  # Every 5 minutes
+    },
+    'update-agent-daily-stats-incremental': {
+        'task': 'campaigns.tasks.update_agent_daily_stats',
+        'schedule': 10.0,
+        'kwargs': {'incremental': True},
+    },
+    'update-agent-daily-stats': {
+        'task': 'campaigns.tasks.update_agent_daily_stats',
+        'schedule': 600.0,  # Every 10 minutes
+    },
+    'refresh-call-facts': {
+        'task': 'reports.tasks.refresh_call_facts',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    # Catches CallLog writes that leave updated_at alone
+    'refresh-call-facts-trailing': {
+        'task': 'reports.tasks.refresh_call_facts',
+        'schedule': 900.0,  # Every 15 minutes
+        'kwargs': {'trailing_hours': 24},
+    },
     # Phase 5: Periodic agent stats refresh
     'refresh-agent-stats': {
         'task': 'agents.tasks.refresh_all_agent_stats',
         'schedule': 30.0,
     },
+    # Ready-agent queues: signals keep them current, this catches bulk updates
+    'sync-ready-agents': {
+        'task': 'agents.tasks.sync_ready_agents',
+        'schedule': 15.0,
+    },
     # Phase 2.4: Lead status reconciliation
     'reconcile-lead-status': {
         'task': 'campaigns.tasks.reconcile_lead_status',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    'maintain-calllog-partitions': {
+        'task': 'calls.tasks.maintain_calllog_partitions',
+        'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
+    },
     'sync-call-log-to-lead-status': {
         'task': 'campaigns.tasks.sync_call_log_to_lead_status',
         'schedule': 600.0,  # Every 10 minutes
@@ -379,6 +415,39 @@ AUTODIALER_SETTINGS = {
     'RECORDING_PATH': config('RECORDING_PATH', default=str(BASE_DIR / 'media' / 'recordings')),
     'LEAD_IMPORT_CHUNK_SIZE': config('LEAD_IMPORT_CHUNK_SIZE', default=1000, cast=int),
     'AGENT_TIMEOUT': config('AGENT_TIMEOUT', default=300, cast=int),  # 5 minutes
+    # Predictive dialer: how long one metrics snapshot serves all campaigns
+    'DIALER_METRICS_TTL': config('DIALER_METRICS_TTL', default=1.0, cast=float),
+    # 'redis' reads pacing rates from the ARI-fed rolling counters, 'database' from CallLog
+    'DIALER_METRICS_SOURCE': config('DIALER_METRICS_SOURCE', default='redis' if USE_REDIS else 'database'),
+    # Dialer engine: threads for blocking ORM/ARI work across all campaign loops
+    'DIALER_ENGINE_THREADS': config('DIALER_ENGINE_THREADS', default=16, cast=int),
+    # Burst dialing: ARI originates in flight at once (also the keep-alive pool size)
+    'ARI_ORIGINATE_CONCURRENCY': config('ARI_ORIGINATE_CONCURRENCY', default=32, cast=int),
+    # ARI REST calls: default per-call timeout (seconds) and retries for calls that are safe to repeat
+    'ARI_REQUEST_TIMEOUT': config('ARI_REQUEST_TIMEOUT', default=10, cast=float),
+    'ARI_REQUEST_RETRIES': config('ARI_REQUEST_RETRIES', default=2, cast=int),
+    # ARI worker: event shards (ordered per channel) and events queued per shard before reads block
+    'ARI_EVENT_SHARDS': config('ARI_EVENT_SHARDS', default=8, cast=int),
+    'ARI_EVENT_QUEUE_SIZE': config('ARI_EVENT_QUEUE_SIZE', default=1000, cast=int),
+    # ARI event journal for replay_ari_journal: '' (off), 'file' or 'redis'
+    'ARI_JOURNAL': config('ARI_JOURNAL', default=''),
+    'ARI_JOURNAL_PATH': config('ARI_JOURNAL_PATH', default=str(BASE_DIR / 'archive' / 'ari_journal')),
+    'ARI_JOURNAL_MAX_BYTES': config('ARI_JOURNAL_MAX_BYTES', default=64 * 1024 * 1024, cast=int),
+    'ARI_JOURNAL_KEEP': config('ARI_JOURNAL_KEEP', default=20, cast=int),
+    'ARI_JOURNAL_MAXLEN': config('ARI_JOURNAL_MAXLEN', default=1000000, cast=int),
+    # Redis hopper: 'list' (FIFO) or 'zset' (priority and eligible-time ordered)
+    'HOPPER_MODE': config('HOPPER_MODE', default='list'),
+    # Country code assumed for numbers without '+' (lead timezone lookup)
+    'DEFAULT_COUNTRY_CODE': config('DEFAULT_COUNTRY_CODE', default='1'),
+    # Seconds a carrier channel slot is held if its ChannelDestroyed is never seen
+    'CARRIER_SLOT_TTL': config('CARRIER_SLOT_TTL', default=3600, cast=int),
+    # Seconds before a dead dialer's campaign leases can be taken over
+    'LEASE_TTL': config('LEASE_TTL', default=10, cast=int),
+    # CallLog monthly partitions (PostgreSQL, after `partition_calllog convert`)
+    'CALLLOG_PARTITIONS_AHEAD': config('CALLLOG_PARTITIONS_AHEAD', default=3, cast=int),
+    # Months of CallLog kept before partitions are archived to gzip CSV; 0 keeps all
+    'CALLLOG_RETENTION_MONTHS': config('CALLLOG_RETENTION_MONTHS', default=0, cast=int),
+    'CALLLOG_ARCHIVE_PATH': config('CALLLOG_ARCHIVE_PATH', default=str(BASE_DIR / 'archive' / 'calllog')),
 }
 
 # Phase 2.5: Call Recording Path (Asterisk monitor spool)
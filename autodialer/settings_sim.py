@@ -0,0 +1,44 @@
+# autodialer/settings_sim.py
+"""
+Offline settings for the dialer simulator and pacing benchmarks
+
+    python manage.py simulate_dialer --settings=autodialer.settings_sim
+
+Uses SQLite by default (SIM_DATABASE=postgres keeps the local Postgres
+from settings.py), fakeredis behind django_redis and an in-memory channel
+layer, so nothing touches the live Redis or Asterisk.
+"""
+
+from fakeredis import FakeConnection
+
+from .settings import *  # noqa: F401,F403
+from .settings import AUTODIALER_SETTINGS, BASE_DIR, config
+
+if config('SIM_DATABASE', default='sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SIM_SQLITE_PATH', default=str(BASE_DIR / 'simulation.sqlite3')),
+        }
+    }
+
+USE_REDIS = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://fakeredis:6379/0',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CONNECTION_POOL_KWARGS': {'connection_class': FakeConnection},
+        }
+    }
+}
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+AUTODIALER_SETTINGS = {**AUTODIALER_SETTINGS, 'DIALER_METRICS_SOURCE': 'redis'}
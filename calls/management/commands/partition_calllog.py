@@ -0,0 +1,107 @@
+"""
+Management Command: Partition CallLog
+
+Monthly range partitioning of calls_calllog on PostgreSQL (see
+calls.partitions).
+
+Usage:
+    python manage.py partition_calllog status
+    python manage.py partition_calllog convert            # one-off, blocks CallLog writes while it copies
+    python manage.py partition_calllog ensure --ahead=6
+    python manage.py partition_calllog archive --retention-months=12 --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calls import partitions
+
+
+class Command(BaseCommand):
+    help = 'Convert CallLog to monthly partitions, create future partitions, archive old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['status', 'convert', 'ensure', 'archive'],
+            help='What to do'
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=None,
+            help='Future months to create partitions for (default: CALLLOG_PARTITIONS_AHEAD)'
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=None,
+            help='Months to keep when archiving (default: CALLLOG_RETENTION_MONTHS)'
+        )
+        parser.add_argument(
+            '--archive-path',
+            default=None,
+            help='Directory for archived partitions (default: CALLLOG_ARCHIVE_PATH)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what archive would do without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_postgres():
+            raise CommandError('CallLog partitioning requires PostgreSQL')
+
+        action = options['action']
+        if action == 'status':
+            self._status()
+        elif action == 'convert':
+            self._convert(options['ahead'])
+        elif action == 'ensure':
+            created = partitions.ensure_partitions(options['ahead'])
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"Created: {', '.join(created)}"))
+            else:
+                self.stdout.write('No partitions needed')
+        else:
+            self._archive(options)
+
+    def _status(self):
+        state = partitions.status()
+        if not state['partitioned']:
+            self.stdout.write(self.style.WARNING('calls_calllog is not partitioned'))
+            return
+        for partition in state['partitions']:
+            flag = '' if partition['attached'] else '  (detached, pending archive)'
+            self.stdout.write(f"  {partition['name']}: ~{partition['rows_estimate']} rows{flag}")
+        self.stdout.write(f"  {partitions.DEFAULT_PARTITION}: {state['default_rows']} rows")
+
+    def _convert(self, ahead):
+        self.stdout.write(self.style.WARNING('Converting calls_calllog; CallLog writes wait until this finishes'))
+        result = partitions.convert_to_partitioned(ahead, progress=self.stdout.write)
+        if result is None:
+            self.stdout.write('calls_calllog is already partitioned')
+            return
+        if result['dropped_foreign_keys']:
+            self.stdout.write(
+                f"Dropped database foreign keys to CallLog (Django still enforces them): "
+                f"{', '.join(result['dropped_foreign_keys'])}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {result['rows']} rows in {result['partitions']} partitions. "
+            f"The old table is kept as {result['old_table']}; drop it once checked."
+        ))
+
+    def _archive(self, options):
+        archived = partitions.archive_partitions(
+            months=options['retention_months'],
+            path=options['archive_path'],
+            dry_run=options['dry_run']
+        )
+        if not archived:
+            self.stdout.write('Nothing to archive')
+            return
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for item in archived:
+            self.stdout.write(f"  {verb} {item['partition']} -> {item['file']}")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(archived)} partitions"))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['updated_at'], name='calls_calll_updated_3234a0_idx'),
+        ),
+    ]
@@ -199,6 +199,7 @@ class CallLog(TimeStampedModel):
             models.Index(fields=['agent', 'start_time']),
             models.Index(fields=['campaign', 'start_time']),
             models.Index(fields=['start_time']),
+            models.Index(fields=['updated_at']),  # incremental stats rollups
         ]
     
     def __str__(self):
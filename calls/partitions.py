@@ -0,0 +1,367 @@
+# calls/partitions.py
+"""
+Monthly range partitioning of CallLog (PostgreSQL)
+
+calls_calllog becomes a table PARTITION BY RANGE (start_time) with one
+partition per UTC month, named calls_calllog_yYYYYmMM, plus
+calls_calllog_default for anything outside them. Queries filtered on
+start_time only scan the months they cover, and retention detaches whole
+months, writes them to gzip CSV and drops them: no DELETE, no vacuum, no
+bloat.
+
+Postgres requires every unique key of a partitioned table to include the
+partition key, so after convert():
+- the primary key is (id, start_time) and call_id is unique per start_time;
+  id still comes from one sequence, so ids stay unique in practice
+- foreign keys from other tables to CallLog (CallEvent, CallNote, ...) are
+  dropped at the database level; Django still follows them and emulates
+  on_delete, but rows of archived calls are left in place
+
+Everything here is a no-op on other database backends.
+"""
+
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'calls_calllog'
+UNPARTITIONED = f'{TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_part_id_seq'
+PARTITION_RE = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def _setting(key, default):
+    return getattr(settings, 'AUTODIALER_SETTINGS', {}).get(key, default)
+
+
+def partitions_ahead():
+    return int(_setting('CALLLOG_PARTITIONS_AHEAD', 3))
+
+
+def retention_months():
+    """Months of CallLog kept in the database; 0 keeps everything"""
+    return int(_setting('CALLLOG_RETENTION_MONTHS', 0))
+
+
+def archive_path():
+    return _setting('CALLLOG_ARCHIVE_PATH', str(Path(settings.BASE_DIR) / 'archive' / 'calllog'))
+
+
+# ============================================================================
+# Months and names
+# ============================================================================
+
+def month_start(when):
+    when = when.astimezone(dt_timezone.utc)
+    return datetime(when.year, when.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month:%Y}m{month:%m}"
+
+
+def _bounds(month):
+    return f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def _renamed(name, suffix='_unpart'):
+    """Identifier with a suffix, kept within Postgres' 63 characters"""
+    return f"{name[:63 - len(suffix)]}{suffix}"
+
+
+# ============================================================================
+# Introspection
+# ============================================================================
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def monthly_partitions(cursor):
+    """[(name, month, attached)] for every calls_calllog_yYYYYmMM table"""
+    cursor.execute(
+        "SELECT relname, relispartition FROM pg_class WHERE relkind = 'r' AND relname LIKE %s",
+        [f'{TABLE}_y%']
+    )
+    found = []
+    for name, attached in cursor.fetchall():
+        match = PARTITION_RE.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            found.append((name, month, attached))
+    return sorted(found, key=lambda item: item[1])
+
+
+def status():
+    """Partitioning state for the management command"""
+    if not is_postgres():
+        return {'partitioned': False, 'reason': f'{connection.vendor} does not support partitioning'}
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return {'partitioned': False}
+        partitions = []
+        for name, month, attached in monthly_partitions(cursor):
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [name])
+            partitions.append({'name': name, 'month': f"{month:%Y-%m}", 'attached': attached,
+                               'rows_estimate': cursor.fetchone()[0]})
+        cursor.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+        return {'partitioned': True, 'partitions': partitions, 'default_rows': cursor.fetchone()[0]}
+
+
+# ============================================================================
+# Partition creation
+# ============================================================================
+
+def create_partition(cursor, month):
+    """
+    Create one month's partition
+
+    Rows that already landed in the default partition for that month are
+    moved into it, since Postgres refuses to add a partition whose range
+    the default partition holds rows for.
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE start_time >= %s AND start_time < %s)",
+        [lower, upper]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {_bounds(month)}")
+        return name
+
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE start_time >= %s AND start_time < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [lower, upper]
+    )
+    moved = cursor.rowcount
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(month)}")
+    logger.warning(f"Moved {moved} default-partition rows into new CallLog partition {name}")
+    return name
+
+
+def ensure_partitions(ahead=None):
+    """
+    Create the partitions for this month and the next `ahead` months
+
+    Returns: names of the partitions created
+    """
+    if not is_postgres():
+        return []
+    ahead = partitions_ahead() if ahead is None else ahead
+    this_month = month_start(timezone.now())
+
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        existing = {month for _, month, attached in monthly_partitions(cursor) if attached}
+        for offset in range(ahead + 1):
+            month = add_months(this_month, offset)
+            if month not in existing:
+                created.append(create_partition(cursor, month))
+    if created:
+        logger.info(f"Created CallLog partitions: {', '.join(created)}")
+    return created
+
+
+# ============================================================================
+# Conversion
+# ============================================================================
+
+def convert_to_partitioned(ahead=None, progress=None):
+    """
+    Rebuild calls_calllog as a partitioned table in one transaction
+
+    Writes to CallLog block until it commits; reads keep working. The old
+    table is kept as calls_calllog_unpartitioned for checking and is
+    dropped by hand afterwards.
+
+    Returns: summary dict, or None when the table is already partitioned
+    """
+    ahead = partitions_ahead() if ahead is None else ahead
+    progress = progress or (lambda message: None)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return None
+        cursor.execute(f"LOCK TABLE {TABLE} IN EXCLUSIVE MODE")
+
+        # -- what to recreate on the new table --------------------------------
+        cursor.execute(
+            """
+            SELECT con.conname, con.contype, array_agg(a.attname ORDER BY k.ord)
+            FROM pg_constraint con
+            CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            WHERE con.conrelid = %s::regclass AND con.contype IN ('p', 'u')
+            GROUP BY con.conname, con.contype
+            """,
+            [TABLE]
+        )
+        keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE]
+        )
+        outbound = cursor.fetchall()
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = %s::regclass AND contype = 'f'",
+            [TABLE]
+        )
+        inbound = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = x.indexrelid)
+            """,
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+
+        # -- free the names on the old table ----------------------------------
+        for table, name in inbound:
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+        for name, *_ in keys + outbound:
+            cursor.execute(f'ALTER TABLE {TABLE} RENAME CONSTRAINT "{name}" TO "{_renamed(name)}"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{_renamed(name)}"')
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {UNPARTITIONED}")
+
+        # -- the partitioned table --------------------------------------------
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {UNPARTITIONED} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (start_time)"
+        )
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        for name, kind, columns in keys:
+            columns = list(columns) + ([] if 'start_time' in columns else ['start_time'])
+            constraint = 'PRIMARY KEY' if kind == 'p' else 'UNIQUE'
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {constraint} ({", ".join(columns)})')
+        for name, definition in outbound:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            # captured before the rename, so it already targets the new table
+            cursor.execute(definition)
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        # -- partitions and data, a month at a time ----------------------------
+        cursor.execute(f"SELECT min(start_time) FROM {UNPARTITIONED}")
+        first = cursor.fetchone()[0]
+        month = month_start(first) if first else month_start(timezone.now())
+        last = add_months(month_start(timezone.now()), ahead)
+        partitions = rows = 0
+        while month <= last:
+            create_partition(cursor, month)
+            cursor.execute(
+                f"INSERT INTO {TABLE} SELECT * FROM {UNPARTITIONED} WHERE start_time >= %s AND start_time < %s",
+                [month.isoformat(), add_months(month, 1).isoformat()]
+            )
+            partitions += 1
+            rows += cursor.rowcount
+            progress(f"{partition_name(month)}: {cursor.rowcount} rows")
+            month = add_months(month, 1)
+        cursor.execute(
+            f"INSERT INTO {TABLE} SELECT * FROM {UNPARTITIONED} WHERE start_time >= %s",
+            [month.isoformat()]
+        )
+        rows += cursor.rowcount
+
+        cursor.execute(f"SELECT setval('{SEQUENCE}', COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)")
+        cursor.execute(f"ANALYZE {TABLE}")
+
+    dropped = [f"{table}.{name}" for table, name in inbound]
+    logger.info(f"CallLog partitioned: {partitions} partitions, {rows} rows; dropped FKs {dropped}")
+    return {'partitions': partitions, 'rows': rows, 'dropped_foreign_keys': dropped, 'old_table': UNPARTITIONED}
+
+
+# ============================================================================
+# Retention
+# ============================================================================
+
+def _copy_out(cursor, table, fh):
+    sql = f"COPY {table} TO STDOUT WITH (FORMAT csv, HEADER)"
+    if hasattr(cursor, 'copy_expert'):  # psycopg2
+        cursor.copy_expert(sql, fh)
+    else:  # psycopg 3
+        with cursor.copy(sql) as copy:
+            for data in copy:
+                fh.write(data)
+
+
+def archive_partitions(months=None, path=None, dry_run=False):
+    """
+    Detach, export and drop monthly partitions older than `months` months
+
+    Each partition is detached first (a metadata change), then written to
+    <path>/<partition>.csv.gz and dropped only after the file is complete.
+    Partitions left detached by an interrupted run are picked up again.
+
+    Returns: [{'partition', 'file'}] archived (or that would be, on dry_run)
+    """
+    if not is_postgres():
+        return []
+    months = retention_months() if months is None else months
+    if months <= 0:
+        return []
+    path = Path(path or archive_path())
+    cutoff = add_months(month_start(timezone.now()), -months)
+
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        expired = [
+            (name, attached) for name, month, attached in monthly_partitions(cursor)
+            if add_months(month, 1) <= cutoff
+        ]
+
+    archived = []
+    for name, attached in expired:
+        target = path / f"{name}.csv.gz"
+        archived.append({'partition': name, 'file': str(target)})
+        if dry_run:
+            continue
+
+        if attached:
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+
+        path.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix('.gz.partial')
+        with connection.cursor() as cursor, gzip.open(partial, 'wb') as fh:
+            _copy_out(cursor, name, fh)
+        os.replace(partial, target)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}")
+        logger.info(f"Archived CallLog partition {name} to {target}")
+    return archived
@@ -0,0 +1,35 @@
+"""
+Calls Tasks - CallLog partition maintenance
+"""
+
+import logging
+
+from celery import shared_task
+
+from campaigns.leases import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def maintain_calllog_partitions():
+    """
+    Create upcoming CallLog partitions and archive expired ones
+
+    Does nothing until `manage.py partition_calllog convert` has run.
+
+    Schedule: Daily at 1 AM
+    """
+    from calls import partitions
+
+    with single_flight('maintain_calllog_partitions', ttl=3600) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
+
+        try:
+            created = partitions.ensure_partitions()
+            archived = partitions.archive_partitions()
+            return {'created': created, 'archived': [item['partition'] for item in archived]}
+        except Exception as e:
+            logger.error(f"Error in maintain_calllog_partitions: {e}", exc_info=True)
+            return {'error': str(e)}
@@ -30,6 +30,12 @@ class CampaignAdmin(admin.ModelAdmin):
                 'dial_speed', 'custom_dials_per_agent', 'hopper_size', 'hopper_level', 'dial_timeout', 'local_call_time',
             )
         }),
+        ('Predictive Pacing', {
+            'fields': (
+                'dial_mode', 'pacing_model', 'target_abandon_rate', 'max_dial_ratio',
+                'customer_patience', 'pacing_interval',
+            )
+        }),
         ('Routing', {
             'fields': ('dial_prefix', )
         }),
@@ -70,7 +76,7 @@ class ScriptAdmin(admin.ModelAdmin):
 
 @admin.register(CampaignStats)
 class CampaignStatsAdmin(admin.ModelAdmin):
-    list_display = ('campaign', 'date', 'calls_made', 'calls_answered', 'calls_dropped')
+    list_display = ('campaign', 'date', 'calls_made', 'calls_answered', 'calls_dropped', 'sales')
     list_filter = ('campaign', 'date')
 
 
@@ -227,7 +227,7 @@ class AMDService:
                 call_log = CallLog.objects.get(id=call_log_id)
                 call_log.amd_result = result.value
                 call_log.amd_action = action
-                call_log.save(update_fields=['amd_result', 'amd_action'])
+                call_log.save(update_fields=['amd_result', 'amd_action', 'updated_at'])
             except CallLog.DoesNotExist:
                 logger.warning(f"Call log {call_log_id} not found for AMD update")
         
@@ -0,0 +1,183 @@
+# campaigns/dialer_counters.py
+"""
+Rolling-window dialer counters in Redis
+
+The ARI worker records call outcomes as they happen into per-campaign,
+per-minute buckets. The predictive dialer sums the last 60 buckets for
+answer/abandon/AMD rates and the last 15 for talk/ring averages, so pacing
+never has to scan CallLog.
+
+Data Structures:
+- dialer:campaign:{id}:stats:{minute} (Hash) - counters and sums for one minute
+- campaign:{id}:dialing (Set) - calls in progress, maintained by HopperService
+- campaign:{id}:answered (Set) - channels of calls in progress that have been answered
+"""
+
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+RATE_WINDOW_BUCKETS = 60      # answer / abandon / AMD rates over the last hour
+AVERAGE_WINDOW_BUCKETS = 15   # talk / ring averages over the last 15 minutes
+BUCKET_TTL = (RATE_WINDOW_BUCKETS + 5) * BUCKET_SECONDS
+ANSWERED_TTL = 2 * 3600       # same lookback as MetricsSnapshot.OPEN_CALL_LOOKBACK
+
+FIELDS = (
+    'attempts', 'answered', 'abandoned', 'machine',
+    'talk_sum', 'talk_n', 'ring_sum', 'ring_n',
+)
+
+
+def redis_counters_enabled():
+    """Whether pacing should read counters from Redis instead of CallLog"""
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return autodialer_settings.get('DIALER_METRICS_SOURCE', 'database') == 'redis'
+
+
+class DialerCounters:
+    """
+    Per-campaign time-bucketed counters fed by ARI events
+
+    Usage:
+        DialerCounters.record_answer(campaign_id, ring_seconds=12)
+        window = DialerCounters.read_windows([campaign_id])[campaign_id]
+    """
+
+    @staticmethod
+    def get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    @staticmethod
+    def _bucket(ts=None):
+        return int((ts or time.time()) // BUCKET_SECONDS)
+
+    @staticmethod
+    def _key(campaign_id, bucket):
+        return f"dialer:campaign:{campaign_id}:stats:{bucket}"
+
+    @staticmethod
+    def _incr(campaign_id, **fields):
+        """Add values to the current minute bucket; never raises"""
+        if not campaign_id:
+            return
+        try:
+            key = DialerCounters._key(campaign_id, DialerCounters._bucket())
+            pipe = DialerCounters.get_redis().pipeline()
+            for field, value in fields.items():
+                if isinstance(value, float):
+                    pipe.hincrbyfloat(key, field, value)
+                else:
+                    pipe.hincrby(key, field, value)
+            pipe.expire(key, BUCKET_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error updating dialer counters for campaign {campaign_id}: {e}")
+
+    # ========================================================================
+    # Writers (ARI worker)
+    # ========================================================================
+
+    @staticmethod
+    def _track_answered(campaign_id, channel, answered):
+        """Add or remove an open answered call; never raises"""
+        if not campaign_id or not channel:
+            return
+        key = f"campaign:{campaign_id}:answered"
+        try:
+            pipe = DialerCounters.get_redis().pipeline()
+            if answered:
+                pipe.sadd(key, channel)
+                pipe.expire(key, ANSWERED_TTL)
+            else:
+                pipe.srem(key, channel)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error tracking answered calls for campaign {campaign_id}: {e}")
+
+    @staticmethod
+    def record_answer(campaign_id, ring_seconds=None, channel=None):
+        """Customer leg answered"""
+        fields = {'answered': 1}
+        if ring_seconds is not None and ring_seconds >= 0:
+            fields.update(ring_sum=float(ring_seconds), ring_n=1)
+        DialerCounters._incr(campaign_id, **fields)
+        DialerCounters._track_answered(campaign_id, channel, True)
+
+    @staticmethod
+    def record_machine(campaign_id):
+        """AMD classified the answer as a machine"""
+        DialerCounters._incr(campaign_id, machine=1)
+
+    @staticmethod
+    def record_end(campaign_id, talk_seconds=0, abandoned=False, channel=None):
+        """Call finished; every finished call counts as one attempt"""
+        fields = {'attempts': 1}
+        if abandoned:
+            fields['abandoned'] = 1
+        if talk_seconds and talk_seconds > 0:
+            fields.update(talk_sum=float(talk_seconds), talk_n=1)
+        DialerCounters._incr(campaign_id, **fields)
+        DialerCounters._track_answered(campaign_id, channel, False)
+
+    # ========================================================================
+    # Readers (predictive dialer)
+    # ========================================================================
+
+    @staticmethod
+    def read_windows(campaign_ids):
+        """
+        Sum the rate and average windows for several campaigns
+
+        One pipeline round trip; cost is O(campaigns x buckets).
+
+        Returns:
+            dict: {campaign_id: {'hour': {...}, 'recent': {...},
+                                 'calls_in_progress': int, 'calls_dialing': int}}
+        """
+        campaign_ids = list(campaign_ids)
+        if not campaign_ids:
+            return {}
+
+        current = DialerCounters._bucket()
+        buckets = [current - i for i in range(RATE_WINDOW_BUCKETS)]
+
+        r = DialerCounters.get_redis()
+        pipe = r.pipeline()
+        for campaign_id in campaign_ids:
+            for bucket in buckets:
+                pipe.hgetall(DialerCounters._key(campaign_id, bucket))
+            pipe.scard(f"campaign:{campaign_id}:dialing")
+            pipe.scard(f"campaign:{campaign_id}:answered")
+        results = pipe.execute()
+
+        windows = {}
+        step = RATE_WINDOW_BUCKETS + 2
+        for index, campaign_id in enumerate(campaign_ids):
+            chunk = results[index * step:(index + 1) * step]
+            hour = dict.fromkeys(FIELDS, 0.0)
+            recent = dict.fromkeys(FIELDS, 0.0)
+
+            for age, raw in enumerate(chunk[:RATE_WINDOW_BUCKETS]):
+                for field, value in raw.items():
+                    field = field.decode() if isinstance(field, bytes) else field
+                    if field not in hour:
+                        continue
+                    value = float(value)
+                    hour[field] += value
+                    if age < AVERAGE_WINDOW_BUCKETS:
+                        recent[field] += value
+
+            in_progress = int(chunk[-2] or 0)
+            windows[campaign_id] = {
+                'hour': hour,
+                'recent': recent,
+                'calls_in_progress': in_progress,
+                'calls_dialing': max(0, in_progress - int(chunk[-1] or 0)),
+            }
+
+        return windows
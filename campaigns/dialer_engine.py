@@ -0,0 +1,292 @@
+# campaigns/dialer_engine.py
+"""
+Dialer Engine - long-running pacing loops
+
+One asyncio task per active predictive campaign, each ticking at the
+campaign's own pacing_interval. PredictiveDialer instances (and the shared
+metrics snapshot) stay in memory for the life of the process, campaign
+settings are hot-reloaded, and every loop records its decision latency and
+overruns. Blocking work (ORM, Redis, ARI) runs in a thread pool so one slow
+campaign never delays another.
+
+Several engines can run side by side on any number of hosts. Campaigns
+are sharded over the live engines by consistent hashing
+(campaigns.sharding) and rebalanced on every reload when engines join or
+leave; the campaign lease (campaigns.leases) guarantees only one engine
+dials a campaign while it changes hands.
+
+Run with: python manage.py dialer_engine
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from campaigns.leases import campaign_lease, default_lease_ttl, get_worker_id
+from campaigns.predictive_dialer import DialerConfig, MetricsSnapshot, PredictiveDialer
+from campaigns.sharding import CampaignShard
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TickStats:
+    """Per-campaign loop statistics for one reporting period"""
+    ticks: int = 0
+    overruns: int = 0
+    errors: int = 0
+    dialed: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    last_latency: float = 0.0
+
+    def record(self, latency: float, interval: float, dialed: int = 0, error: bool = False):
+        self.ticks += 1
+        self.dialed += dialed
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        if latency > interval:
+            self.overruns += 1
+        if error:
+            self.errors += 1
+
+    def as_dict(self) -> Dict:
+        avg = self.total_latency / self.ticks if self.ticks else 0.0
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'dialed': self.dialed,
+            'avg_latency_ms': round(avg * 1000, 2),
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+            'last_latency_ms': round(self.last_latency * 1000, 2),
+        }
+
+
+@dataclass
+class CampaignSpec:
+    """The campaign settings an engine loop depends on"""
+    campaign_id: int
+    name: str
+    interval: float
+    config: DialerConfig
+    updated_at: Optional[object] = None
+
+    @classmethod
+    def from_campaign(cls, campaign) -> 'CampaignSpec':
+        return cls(
+            campaign_id=campaign.id,
+            name=campaign.name,
+            interval=float(campaign.pacing_interval or 1.0),
+            config=DialerConfig.from_campaign(campaign),
+            updated_at=campaign.updated_at,
+        )
+
+
+class CampaignLoop:
+    """Pacing loop for a single campaign"""
+
+    def __init__(self, spec: CampaignSpec, snapshot: MetricsSnapshot,
+                 executor: ThreadPoolExecutor, test_mode: bool = False):
+        self.spec = spec
+        self.dialer = PredictiveDialer(spec.campaign_id, spec.config, snapshot=snapshot)
+        self.executor = executor
+        self.test_mode = test_mode
+        self.stats = TickStats()
+        # Renewed every third of its TTL, so it must outlast a few ticks
+        self.lease = campaign_lease(spec.campaign_id, ttl=max(default_lease_ttl(), spec.interval * 3))
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def campaign_id(self) -> int:
+        return self.spec.campaign_id
+
+    def start(self):
+        self._task = asyncio.create_task(self.run(), name=f"campaign-{self.campaign_id}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Hand the campaign to another engine right away
+        self.lease.release()
+
+    def update(self, spec: CampaignSpec):
+        """Apply new campaign settings without losing dialer state"""
+        self.spec = spec
+        self.dialer.config = spec.config
+        self.lease.ttl = max(default_lease_ttl(), spec.interval * 3)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while True:
+            started = loop.time()
+            dialed, error = 0, False
+            try:
+                dialed = await loop.run_in_executor(self.executor, self.tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = True
+                logger.error(f"Dialer engine tick failed for campaign {self.campaign_id}: {e}", exc_info=True)
+
+            interval = self.spec.interval
+            self.stats.record(loop.time() - started, interval, dialed, error)
+
+            # Fixed-rate schedule; skip ticks we already missed instead of bursting
+            next_tick += interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
+
+    def tick(self) -> int:
+        """One pacing decision; runs in a worker thread"""
+        from campaigns.services import HopperService
+
+        close_old_connections()
+
+        # Only the engine holding the campaign lease dials it; a test-mode
+        # engine never takes the lease from a live one
+        if not self.test_mode and not self.lease.hold():
+            return 0
+
+        calls_to_dial = self.dialer.get_calls_to_dial()
+        if calls_to_dial <= 0:
+            return 0
+
+        if self.test_mode:
+            logger.info(f"TEST: campaign {self.campaign_id} would dial {calls_to_dial} calls")
+            return 0
+
+        initiated = HopperService.dial_leads(self.campaign_id, calls_to_dial, fence=self.lease.token)
+        if initiated:
+            logger.info(f"Campaign {self.campaign_id}: Dialed {initiated} calls (requested {calls_to_dial})")
+        return initiated
+
+
+class DialerEngine:
+    """
+    Supervises one CampaignLoop per active predictive campaign
+
+    Usage:
+        engine = DialerEngine(reload_interval=10, report_interval=60)
+        asyncio.run(engine.run())
+    """
+
+    def __init__(self, campaign_ids: Iterable[int] = None, reload_interval: float = 10.0,
+                 report_interval: float = 60.0, max_workers: int = None, test_mode: bool = False):
+        engine_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+        self.campaign_ids = set(campaign_ids) if campaign_ids else None
+        self.reload_interval = reload_interval
+        self.report_interval = report_interval
+        self.max_workers = max_workers or engine_settings.get('DIALER_ENGINE_THREADS', 16)
+        self.test_mode = test_mode
+        self.worker_id = get_worker_id()
+        # Test-mode engines get their own pool so they never take campaigns
+        # away from live ones
+        self.shard = CampaignShard(
+            'dialer_engine:test' if test_mode else 'dialer_engine',
+            self.worker_id,
+            ttl=max(reload_interval * 3, default_lease_ttl()),
+        )
+        self.snapshot = MetricsSnapshot()
+        self.loops: Dict[int, CampaignLoop] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dialer')
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+
+        try:
+            while True:
+                try:
+                    await self.reload()
+                except Exception as e:
+                    logger.error(f"Dialer engine reload failed: {e}", exc_info=True)
+
+                if loop.time() - last_report >= self.report_interval:
+                    await loop.run_in_executor(self.executor, self.report)
+                    last_report = loop.time()
+
+                await asyncio.sleep(self.reload_interval)
+        finally:
+            for campaign_loop in list(self.loops.values()):
+                await campaign_loop.stop()
+            self.loops.clear()
+            self.shard.leave()
+            self.executor.shutdown(wait=False)
+
+    async def reload(self):
+        """Start, stop and reconfigure loops to match the active campaigns"""
+        loop = asyncio.get_running_loop()
+        specs = await loop.run_in_executor(self.executor, self.load_specs)
+
+        for campaign_id in list(self.loops):
+            if campaign_id not in specs:
+                logger.info(f"Dialer engine: stopping campaign {campaign_id}")
+                await self.loops.pop(campaign_id).stop()
+
+        for campaign_id, spec in specs.items():
+            campaign_loop = self.loops.get(campaign_id)
+            if campaign_loop is None:
+                logger.info(f"Dialer engine: starting campaign {spec.name} every {spec.interval}s")
+                campaign_loop = CampaignLoop(spec, self.snapshot, self.executor, self.test_mode)
+                self.loops[campaign_id] = campaign_loop
+                campaign_loop.start()
+            elif spec.updated_at != campaign_loop.spec.updated_at:
+                logger.info(f"Dialer engine: reloaded settings for campaign {spec.name}")
+                campaign_loop.update(spec)
+
+    def load_specs(self) -> Dict[int, CampaignSpec]:
+        """Active predictive campaigns in this engine's shard"""
+        from campaigns.models import Campaign
+
+        close_old_connections()
+        self.shard.refresh()
+
+        campaigns = Campaign.objects.filter(status='active', dial_mode='predictive')
+        if self.campaign_ids:
+            campaigns = campaigns.filter(id__in=self.campaign_ids)
+
+        return {c.id: CampaignSpec.from_campaign(c) for c in campaigns if self.shard.owns(c.id)}
+
+    def report(self) -> Dict:
+        """Log and publish per-campaign tick statistics, then reset them"""
+        campaigns = {}
+        for campaign_id, campaign_loop in self.loops.items():
+            stats = campaign_loop.stats.as_dict()
+            stats['interval'] = campaign_loop.spec.interval
+            stats['leader'] = campaign_loop.lease.held
+            campaigns[campaign_id] = stats
+            campaign_loop.stats = TickStats()
+
+            logger.info(
+                f"Dialer engine campaign {campaign_id}: {stats['ticks']} ticks, "
+                f"avg {stats['avg_latency_ms']}ms, max {stats['max_latency_ms']}ms, "
+                f"{stats['overruns']} overruns, {stats['dialed']} dialed"
+            )
+
+        status = {
+            'worker_id': self.worker_id,
+            'pool': self.shard.ring.nodes,
+            'timestamp': timezone.now().isoformat(),
+            'snapshot_build_ms': round(self.snapshot.build_seconds * 1000, 2),
+            'campaigns': campaigns,
+        }
+        cache.set(f"dialer_engine:status:{self.worker_id}", status, int(self.report_interval * 3))
+        return status
@@ -0,0 +1,143 @@
+# campaigns/erlang.py
+"""
+Erlang-C / Erlang-A pacing solver - Phase 4.1
+
+Answered (human) calls are treated as arrivals to the campaign's agents,
+with exponential talk + wrap-up time as in the Erlang models. The solver
+works on the dialer's current state rather than on the steady state: a
+line dialing now is answered about one ring time from now, and by then
+the agents who can take it are the idle ones plus each busy or wrap-up
+agent whose call ends in time. With L lines in flight the human answers
+are Binomial(L, p_human); the expected number of them that find no free
+agent, over the expected answers, is the predicted abandon rate. The
+solver picks the largest L that stays under target.
+
+Steady-state M/M/N service levels are far too pessimistic for a 2-second
+patience window with a handful of agents (they allow no lines at all for
+five agents), while the transient view never allows fewer lines than
+idle agents.
+
+- Erlang-C: a customer waits exactly the patience threshold (e.g. a
+  2-second compliance window) for an agent to free up.
+- Erlang-A: customers have exponential patience with the given mean.
+
+All candidates are evaluated at once with NumPy.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+MODELS = ('erlang_c', 'erlang_a')
+
+
+@dataclass
+class PacingSolution:
+    """Result of a pacing solve"""
+    lines: int                  # lines that should be dialing right now
+    arrival_rate: float         # answered human calls per second at that level
+    predicted_abandon: float    # percentage of answered calls (0-100)
+    predicted_occupancy: float  # percentage of agent time on calls (0-100)
+
+
+def binomial_table(trials: int, probability: float) -> np.ndarray:
+    """
+    Binomial pmfs for 0..trials trials at once
+
+    Row n is the distribution of successes out of n trials (zero-padded
+    to trials + 1 columns).
+    """
+    table = np.zeros((trials + 1, trials + 1))
+    table[0, 0] = 1.0
+    for n in range(1, trials + 1):
+        table[n, :n + 1] = table[n - 1, :n + 1] * (1 - probability)
+        table[n, 1:n + 1] += table[n - 1, :n] * probability
+    return table
+
+
+def free_probability(service_time: float, ring_time: float, patience: float, model: str) -> float:
+    """
+    Probability that a busy or wrap-up agent frees up before an answer
+    dialed now gives up waiting (exponential residual service time)
+    """
+    if model == 'erlang_a':
+        # E[exp(-T / service_time)] for exponential patience T with mean `patience`
+        held = np.exp(-ring_time / service_time) * service_time / (service_time + patience)
+    else:
+        held = np.exp(-(ring_time + patience) / service_time)
+    return float(1.0 - held)
+
+
+def transient_abandon(max_lines: int, human_answer_rate: float, available: int,
+                      in_service: int, free_prob: float) -> np.ndarray:
+    """
+    Predicted abandon fraction for 0..max_lines lines in flight
+
+    Answers ~ Binomial(L, human_answer_rate); free agents ~ available +
+    Binomial(in_service, free_prob). Abandoned = E[max(0, answers - free)].
+    """
+    answers = binomial_table(max_lines, human_answer_rate)
+    freed = binomial_table(in_service, free_prob)[in_service]
+    free_agents = available + np.arange(in_service + 1)
+
+    # Expected shortfall for every possible number of answers
+    shortfall = np.maximum(np.arange(max_lines + 1)[:, None] - free_agents[None, :], 0) @ freed
+    excess = answers @ shortfall
+
+    expected_answers = np.arange(max_lines + 1) * human_answer_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abandon = np.where(expected_answers > 0, excess / expected_answers, 0.0)
+    return np.clip(abandon, 0.0, 1.0)
+
+
+def solve_lines(agents: int, human_answer_rate: float, line_time: float, service_time: float,
+                target_abandon: float, max_lines: int, model: str = 'erlang_c',
+                patience: float = 2.0, available: Optional[int] = None,
+                ring_time: float = 15.0) -> PacingSolution:
+    """
+    Largest number of lines in flight whose predicted abandon rate is under target
+
+    Args:
+        agents: staffed agents (available + busy + wrap-up)
+        human_answer_rate: probability a dial is answered by a human (0-1)
+        line_time: average seconds a line is held per dial attempt, answered or not
+        service_time: average talk + wrap-up seconds per connected call
+        target_abandon: maximum abandon percentage (0-100)
+        max_lines: upper bound of the candidate grid
+        model: 'erlang_c' or 'erlang_a'
+        patience: seconds a customer will wait for an agent
+        available: agents idle right now (default: all staffed agents)
+        ring_time: average seconds from dial to answer
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown pacing model: {model}")
+
+    if agents <= 0 or max_lines <= 0 or human_answer_rate <= 0:
+        return PacingSolution(lines=0, arrival_rate=0.0, predicted_abandon=0.0, predicted_occupancy=0.0)
+
+    available = agents if available is None else min(max(available, 0), agents)
+    line_time = max(line_time, 1.0)
+    service_time = max(service_time, 1.0)
+    human_answer_rate = min(human_answer_rate, 1.0)
+
+    abandon = transient_abandon(
+        max_lines, human_answer_rate, available, agents - available,
+        free_probability(service_time, max(ring_time, 0.0), patience, model),
+    )
+
+    # Abandonment grows with lines; stop just before the first miss
+    over = np.nonzero(abandon > target_abandon / 100.0)[0]
+    best = int(over[0]) - 1 if over.size else max_lines
+    best = max(best, 0)
+
+    rate = best * human_answer_rate / line_time
+    served = rate * (1 - abandon[best])
+    occupancy = min(served * service_time / agents, 1.0)
+
+    return PacingSolution(
+        lines=best,
+        arrival_rate=float(rate),
+        predicted_abandon=float(abandon[best] * 100),
+        predicted_occupancy=float(occupancy * 100),
+    )
@@ -0,0 +1,167 @@
+# campaigns/fill_cursor.py
+"""
+Incremental keyset hopper fill
+
+Each campaign keeps a cursor in Redis at the last lead the fill examined,
+in the campaign's lead_order. A fill pages forward from the cursor with a
+keyset predicate - no OFFSET, no NOT IN of queued ids, no ORDER BY random()
+- so its cost follows the number of leads added, not the size of the lists.
+Random order walks Lead.shuffle_key. When a pass reaches the end of the
+lists the cursor wraps and the next pass starts from the beginning.
+
+Data Structures:
+- campaign:{id}:fill_cursor (Hash) - lead_order, last order value, last id
+"""
+
+import logging
+from datetime import datetime
+
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# lead_order -> (column, descending)
+ORDERINGS = {
+    'down': ('id', False),
+    'up': ('id', True),
+    'oldest_first': ('created_at', False),
+    'newest_first': ('created_at', True),
+    'random': ('shuffle_key', False),
+}
+
+
+class FillCursor:
+    """
+    Per-campaign keyset cursor over eligible leads
+
+    Usage:
+        cursor = FillCursor(campaign)
+        leads = cursor.fetch(queryset, 200, accept=lambda page: {lead.id for lead in page})
+    """
+
+    PAGE_FACTOR = 3   # rows fetched per page, relative to the leads still needed
+    MIN_PAGE = 100
+    MAX_PAGES = 10    # bound on the work of a single fill
+
+    def __init__(self, campaign, redis=None):
+        self.campaign = campaign
+        self.column, self.descending = ORDERINGS.get(campaign.lead_order, ORDERINGS['down'])
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @property
+    def key(self):
+        return f"campaign:{self.campaign.id}:fill_cursor"
+
+    # ========================================================================
+    # Cursor storage
+    # ========================================================================
+
+    def load(self):
+        """(order value, lead id) of the last lead examined, or None at the start"""
+        raw = self.redis.hgetall(self.key)
+        if not raw:
+            return None
+        data = {k.decode(): v.decode() for k, v in raw.items()}
+        if data.get('order') != self.campaign.lead_order:
+            return None  # lead_order changed; start a new pass
+        return self._parse(data['value']), int(data['id'])
+
+    def save(self, position):
+        value, lead_id = position
+        self.redis.hset(self.key, mapping={
+            'order': self.campaign.lead_order,
+            'value': value.isoformat() if isinstance(value, datetime) else str(value),
+            'id': lead_id,
+        })
+
+    def reset(self):
+        self.redis.delete(self.key)
+
+    def _parse(self, value):
+        if self.column == 'created_at':
+            return datetime.fromisoformat(value)
+        return int(value)
+
+    # ========================================================================
+    # Keyset paging
+    # ========================================================================
+
+    def ordered(self, queryset):
+        prefix = '-' if self.descending else ''
+        if self.column == 'id':
+            return queryset.order_by(f'{prefix}id')
+        return queryset.order_by(f'{prefix}{self.column}', f'{prefix}id')
+
+    def after(self, queryset, position):
+        """Rows strictly after `position` in cursor order"""
+        value, lead_id = position
+        op = 'lt' if self.descending else 'gt'
+        if self.column == 'id':
+            return queryset.filter(**{f'id__{op}': lead_id})
+        return queryset.filter(
+            Q(**{f'{self.column}__{op}': value}) |
+            Q(**{self.column: value, f'id__{op}': lead_id})
+        )
+
+    def position_of(self, lead):
+        return getattr(lead, self.column), lead.id
+
+    def fetch(self, queryset, limit, accept=None):
+        """
+        Next `limit` leads after the cursor that `accept` lets through
+
+        Args:
+            queryset: eligible leads (status, attempts, ...) without ordering
+            limit: leads wanted
+            accept: callable(page) -> set of acceptable lead ids; used for
+                    checks done per page (queued ids, DNC)
+
+        Wraps to the start at most once per call, then saves the cursor at
+        the last lead examined.
+        """
+        if limit <= 0:
+            return []
+
+        position = self.load()
+        wrapped = position is None
+        leads = []
+        taken = set()
+
+        for _ in range(self.MAX_PAGES):
+            page_size = max((limit - len(leads)) * self.PAGE_FACTOR, self.MIN_PAGE)
+            page_qs = self.ordered(queryset)
+            if position is not None:
+                page_qs = self.after(page_qs, position)
+            page = list(page_qs[:page_size])
+
+            accepted = accept(page) if accept and page else {lead.id for lead in page}
+            for lead in page:
+                position = self.position_of(lead)
+                if lead.id in accepted and lead.id not in taken:
+                    taken.add(lead.id)
+                    leads.append(lead)
+                    if len(leads) >= limit:
+                        break
+
+            if len(leads) >= limit:
+                break
+
+            if len(page) < page_size:
+                # End of the lists: start a new pass, once
+                if wrapped:
+                    break
+                wrapped = True
+                position = None
+
+        if position is None:
+            self.reset()
+        else:
+            self.save(position)
+        return leads
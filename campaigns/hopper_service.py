@@ -40,6 +40,7 @@ class HopperService:
             list: Eligible Lead objects
         """
         from leads.models import Lead, LeadList
+        from leads.timezones import calling_hours_q
         from campaigns.models import Campaign
         
         try:
@@ -80,6 +81,13 @@ class HopperService:
                 Q(last_dial_attempt__lt=retry_cutoff)  # Retry after delay
             )
             
+            # Only leads whose local time is inside calling hours
+            if campaign.local_call_time:
+                hours_query = calling_hours_q(campaign, now=now)
+                if hours_query is None:
+                    return []
+                query &= hours_query
+            
             # Order by priority and last dial attempt
             leads = Lead.objects.filter(query).order_by(
                 '-priority',  # High priority first
@@ -0,0 +1,220 @@
+# campaigns/leases.py
+"""
+Redis leases - leader election and single-flight locks with fencing tokens
+
+A lease is a Redis key holding the holder's fencing token, set only if
+absent and with a TTL. Each acquisition takes the next value of a per-name
+counter, so tokens only ever grow. The holder renews well before the TTL
+runs out; if it dies or stalls the key expires and another process takes
+over within LEASE_TTL seconds.
+
+Renew and release act only while the key still holds the caller's token.
+Writers that must never run twice for one campaign (the hopper pop) also
+compare the token inside their own Lua script, so a process that lost its
+lease while paused cannot act on stale ownership when it wakes up.
+
+Data Structures:
+- lease:{name} (String, TTL) - fencing token of the current holder
+- lease:{name}:owner (String, TTL) - holder identity, for status pages
+- lease:{name}:fence (String) - last token issued
+"""
+
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS = lease, owner, fence; ARGV = ttl_ms, owner
+ACQUIRE_LEASE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local token = redis.call('INCR', KEYS[3])
+redis.call('SET', KEYS[1], token, 'PX', ARGV[1])
+redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[1])
+return token
+"""
+
+# KEYS = lease, owner; ARGV = token, ttl_ms
+RENEW_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+redis.call('PEXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+# KEYS = lease, owner; ARGV = token
+RELEASE_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return 1
+"""
+
+# Prologue for scripts that take a lease key as their last KEY and a fencing
+# token as their last ARGV ('' = unfenced)
+FENCE_CHECK_LUA = """
+if ARGV[#ARGV] ~= '' and redis.call('GET', KEYS[#KEYS]) ~= ARGV[#ARGV] then
+    return redis.error_reply('FENCED lease lost')
+end
+"""
+
+
+class LeaseLost(Exception):
+    """A fenced write was refused because the lease has moved on"""
+
+
+def get_worker_id():
+    """Identity of this process, used as the lease owner and in status reports"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def default_lease_ttl():
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return float(autodialer_settings.get('LEASE_TTL', 10))
+
+
+def lease_key(name):
+    return f"lease:{name}"
+
+
+class Lease:
+    """
+    A named lease held by at most one process at a time
+
+    Usage:
+        lease = Lease('hopper_fill')
+        while True:
+            if lease.hold():
+                ...  # leader work, fenced with lease.token where it matters
+            time.sleep(1)
+    """
+
+    def __init__(self, name, ttl=None, owner=None, redis=None):
+        self.name = name
+        self.ttl = float(ttl or default_lease_ttl())
+        self.owner = owner or get_worker_id()
+        self.token = None
+        self._renewed_at = 0.0
+        self._redis = redis
+
+    def __repr__(self):
+        return f"<Lease {self.name} token={self.token}>"
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @property
+    def key(self):
+        return lease_key(self.name)
+
+    @property
+    def _keys(self):
+        return [self.key, f"{self.key}:owner"]
+
+    @property
+    def held(self):
+        """Whether this process holds the lease, as of the last renewal"""
+        return self.token is not None and time.monotonic() - self._renewed_at < self.ttl
+
+    def acquire(self):
+        """Take the lease if nobody holds it; returns True on success"""
+        token = int(self.redis.register_script(ACQUIRE_LEASE_LUA)(
+            keys=self._keys + [f"{self.key}:fence"],
+            args=[int(self.ttl * 1000), self.owner]
+        ))
+        if not token:
+            return False
+        self.token = token
+        self._renewed_at = time.monotonic()
+        logger.info(f"Lease {self.name} acquired by {self.owner} (token {token})")
+        return True
+
+    def renew(self):
+        """Extend the lease; returns False (and forgets it) if it was lost"""
+        if self.token is None:
+            return False
+        renewed = self.redis.register_script(RENEW_LEASE_LUA)(
+            keys=self._keys, args=[self.token, int(self.ttl * 1000)]
+        )
+        if not renewed:
+            logger.warning(f"Lease {self.name} lost by {self.owner} (token {self.token})")
+            self.token = None
+            return False
+        self._renewed_at = time.monotonic()
+        return True
+
+    def release(self):
+        """Give the lease up so another process can take it immediately"""
+        if self.token is None:
+            return
+        try:
+            self.redis.register_script(RELEASE_LEASE_LUA)(keys=self._keys, args=[self.token])
+        except Exception as e:
+            logger.error(f"Lease {self.name} release failed: {e}")
+        self.token = None
+
+    def hold(self):
+        """
+        Keep or take the lease; call this from every iteration of a loop
+
+        Renews once a third of the TTL has passed, so a holder that loops
+        at least that often never lets the lease lapse.
+        """
+        if self.token is not None:
+            if time.monotonic() - self._renewed_at < self.ttl / 3:
+                return True
+            if self.renew():
+                return True
+        return self.acquire()
+
+    @staticmethod
+    def holder(name, redis=None):
+        """(token, owner) of the current holder, or None"""
+        if redis is None:
+            from django_redis import get_redis_connection
+            redis = get_redis_connection("default")
+        token, owner = redis.mget(lease_key(name), f"{lease_key(name)}:owner")
+        if token is None:
+            return None
+        return int(token), owner.decode() if owner else ''
+
+
+def campaign_lease(campaign_id, ttl=None):
+    """The lease that makes one process the dialer for a campaign"""
+    return Lease(f"campaign:{campaign_id}:dialer", ttl=ttl)
+
+
+@contextmanager
+def single_flight(name, ttl):
+    """
+    Run a block in at most one process at a time
+
+    Yields the Lease, or None when another process is already running it.
+    `ttl` should cover the block's run time; the lease is released on exit.
+
+        with single_flight('recycle_failed_calls', ttl=300) as lease:
+            if lease is None:
+                return
+            ...
+    """
+    lease = Lease(name, ttl=ttl)
+    if not lease.acquire():
+        yield None
+        return
+    try:
+        yield lease
+    finally:
+        lease.release()
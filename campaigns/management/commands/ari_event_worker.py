@@ -20,6 +20,7 @@ from channels.layers import get_channel_layer
 
 from telephony.models import AsteriskServer
 from telephony.services import AsteriskService
+from telephony.event_journal import get_journal
 from campaigns.models import Campaign
 from campaigns.services import HopperService
 from agents.models import AgentDialerSession
@@ -57,7 +58,10 @@ class ARIEventWorker:
             self.running = True
             logger.info("Connected to Asterisk ARI")
             
+            journal = get_journal()
             async for message in websocket:
+                if journal:
+                    journal.record(self.server.id, message)
                 try:
                     logger.debug(f"Received ARI event: {message[:200]}...")  # Log first 200 chars
                     event = json.loads(message)
@@ -0,0 +1,62 @@
+# campaigns/management/commands/dialer_engine.py
+
+import asyncio
+import logging
+
+from django.core.management.base import BaseCommand
+
+from campaigns.dialer_engine import DialerEngine
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Dialer engine - one pacing loop per active predictive campaign'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-id',
+            type=int,
+            action='append',
+            help='Dial for specific campaign only (may be repeated)'
+        )
+        parser.add_argument(
+            '--reload-interval',
+            type=float,
+            default=10.0,
+            help='Seconds between campaign configuration reloads (default: 10)'
+        )
+        parser.add_argument(
+            '--report-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between latency/overrun reports (default: 60)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            help='Worker threads for blocking dial work'
+        )
+        parser.add_argument(
+            '--test-mode',
+            action='store_true',
+            help='Test mode: log pacing decisions without actually dialing'
+        )
+
+    def handle(self, *args, **options):
+        engine = DialerEngine(
+            campaign_ids=options.get('campaign_id'),
+            reload_interval=options['reload_interval'],
+            report_interval=options['report_interval'],
+            max_workers=options.get('threads'),
+            test_mode=options['test_mode'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Starting Dialer Engine ({engine.worker_id})...'))
+        if options['test_mode']:
+            self.stdout.write(self.style.WARNING('TEST MODE: No actual calls will be placed'))
+
+        try:
+            asyncio.run(engine.run())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nStopping Dialer Engine'))
@@ -5,13 +5,18 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db.models import Q, Count
 from datetime import timedelta
-import pytz
 
+from campaigns.leases import Lease, default_lease_ttl, single_flight
 from campaigns.models import Campaign, DialerHopper
-from leads.models import Lead, DNCEntry, LeadList
+from leads.models import Lead, LeadList
+from leads.dnc_filter import get_dnc_filter
+from leads.timezones import calling_hours_q
 
 logger = logging.getLogger(__name__)
 
+# Sorted hopper: only queue leads that become eligible within this window
+SCHEDULE_HORIZON = timedelta(minutes=5)
+
 
 class Command(BaseCommand):
     help = 'Fill hopper with eligible leads for predictive/progressive campaigns'
@@ -42,15 +47,23 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Starting Hopper Fill Service...'))
 
         if run_once:
-            self.fill_hoppers(campaign_id)
+            with single_flight('hopper_fill', ttl=max(default_lease_ttl(), 120)) as lease:
+                if lease is None:
+                    self.stdout.write(self.style.WARNING('Another hopper fill is running'))
+                    return
+                self.fill_hoppers(campaign_id)
         else:
             import time
+            # Leader election: standby copies wait for the lease to lapse
+            lease = Lease('hopper_fill', ttl=max(default_lease_ttl(), interval * 3))
             while True:
                 try:
-                    self.fill_hoppers(campaign_id)
+                    if lease.hold():
+                        self.fill_hoppers(campaign_id)
                     time.sleep(interval)
                 except KeyboardInterrupt:
                     self.stdout.write(self.style.WARNING('\\nStopping Hopper Fill Service'))
+                    lease.release()
                     break
                 except Exception as e:
                     logger.error(f'Hopper fill error: {e}', exc_info=True)
@@ -101,7 +114,13 @@ class Command(BaseCommand):
         # 4. Insert into Redis hopper
         if eligible_leads:
             try:
-                added = HopperService.add_leads(campaign.id, eligible_leads)
+                if HopperService.sorted_hopper_enabled():
+                    eligible_leads = list(eligible_leads)
+                    priorities, eligible_at = self.schedule_leads(campaign, eligible_leads)
+                    eligible_leads = [lead for lead in eligible_leads if lead.id in priorities]
+                    added = HopperService.add_leads(campaign.id, eligible_leads, priorities, eligible_at)
+                else:
+                    added = HopperService.add_leads(campaign.id, eligible_leads)
                 logger.info(f'{campaign.name}: Added {added} leads to Redis hopper')
             except Exception as e:
                 logger.error(f'Error adding leads to Redis hopper: {e}')
@@ -113,17 +132,26 @@ class Command(BaseCommand):
                            f'Needed: {needed}')
 
     def get_eligible_leads(self, campaign, limit):
-        """Get leads eligible for dialing"""
+        """
+        Get leads eligible for dialing
+
+        Pages forward from the campaign's fill cursor in lead_order, so
+        each fill only reads about as many leads as it adds. Queued ids and
+        DNC numbers are checked per page instead of with NOT IN lists.
+        """
         from campaigns.services import HopperService
+        from campaigns.fill_cursor import FillCursor
         
         # Get all lead lists assigned to this campaign
         from leads.models import LeadList
-        lead_lists = LeadList.objects.filter(assigned_campaign=campaign)
+        lead_list_ids = list(LeadList.objects.filter(assigned_campaign=campaign).values_list('id', flat=True))
+        if not lead_list_ids:
+            return []
         
         # Base query: leads in those lead lists
         leads = Lead.objects.filter(
-            lead_list__in=lead_lists
-        ).select_related('lead_list')
+            lead_list_id__in=lead_list_ids
+        )
 
         # Filter by status
         leads = leads.filter(
@@ -135,64 +163,92 @@ class Command(BaseCommand):
             call_count__lt=campaign.max_attempts
         )
 
-        # Exclude leads already in Redis hopper or dialing
-        queued_ids = HopperService.get_queued_lead_ids(campaign.id)
-        # If queued_ids is large, avoid passing a huge list to exclude()
-        if queued_ids and len(queued_ids) < 50000:
-            leads = leads.exclude(id__in=queued_ids)
-
-        # DNC Check
-        if campaign.use_internal_dnc:
-            dnc_numbers = DNCEntry.objects.values_list('phone_number', flat=True)
-            leads = leads.exclude(phone_number__in=dnc_numbers)
+        # Sorted hopper honours retry_delay itself; skip leads not due soon
+        if HopperService.sorted_hopper_enabled():
+            retry_cutoff = timezone.now() + SCHEDULE_HORIZON - timedelta(seconds=campaign.retry_delay)
+            leads = leads.filter(
+                Q(last_dial_attempt__isnull=True) | Q(last_dial_attempt__lte=retry_cutoff)
+            )
 
         # Timezone Check (if enabled) – if it filters everything out, just return empty
         if campaign.local_call_time:
             leads = self.filter_by_calling_hours(leads, campaign)
+            if leads.query.is_empty():
+                return []
+
+        # Exclude leads already in Redis hopper or dialing (bounded by hopper size)
+        queued_ids = HopperService.get_queued_lead_ids(campaign.id)
 
-        # Order by campaign preference
-        if campaign.lead_order == 'down':
-            leads = leads.order_by('id')
-        elif campaign.lead_order == 'up':
-            leads = leads.order_by('-id')
-        elif campaign.lead_order == 'oldest_first':
-            leads = leads.order_by('created_at')
-        elif campaign.lead_order == 'newest_first':
-            leads = leads.order_by('-created_at')
-        elif campaign.lead_order == 'random':
-            leads = leads.order_by('?')
+        def accept(page):
+            candidates = [lead for lead in page if lead.id not in queued_ids]
 
-        return leads[:limit]
+            # DNC Check against the in-memory filter, one batch per page
+            if campaign.use_internal_dnc and candidates:
+                blocked = get_dnc_filter().contains_many(lead.phone_number for lead in candidates)
+                candidates = [lead for lead, is_dnc in zip(candidates, blocked) if not is_dnc]
+
+            return {lead.id for lead in candidates}
+
+        return FillCursor(campaign).fetch(leads, limit, accept=accept)
 
     def filter_by_calling_hours(self, leads, campaign):
-        """Filter leads based on timezone and calling hours"""
-        now = timezone.now()
-        campaign_tz = pytz.timezone(campaign.timezone)
-        
-        # Get current time in campaign timezone
-        campaign_now = now.astimezone(campaign_tz)
-        current_time = campaign_now.time()
-        current_day = campaign_now.weekday()
-
-        # Check if within campaign hours
-        if current_time < campaign.daily_start_time or current_time > campaign.daily_end_time:
-            # Outside calling hours, return empty queryset
+        """
+        Filter leads to those whose local time is inside calling hours
+
+        Lead.timezone comes from the phone prefix; only the known zones are
+        checked here, and the lead filter is a `timezone IN (...)` index scan.
+        Leads with no known timezone use the campaign's timezone.
+        """
+        query = calling_hours_q(campaign)
+        if query is None:
+            # Outside calling hours everywhere, return empty queryset
             return leads.none()
+        return leads.filter(query)
+
+    def schedule_leads(self, campaign, leads):
+        """
+        Priority and earliest dial time for each lead (sorted hopper)
+
+        Retries wait retry_delay after the last attempt; callbacks wait for
+        their scheduled time. Leads not due within SCHEDULE_HORIZON are left
+        for a later fill.
 
-        # For leads with timezone info, filter by their local time
-        # This is a simplified version - full implementation would check each lead's timezone
-        # For now, we'll just use campaign timezone
-        return leads
+        Returns: ({lead_id: priority}, {lead_id: eligible datetime})
+        """
+        from django.db.models import Min
+        from leads.models import CallbackSchedule
+
+        now = timezone.now()
+        horizon = now + SCHEDULE_HORIZON
+
+        callbacks = dict(
+            CallbackSchedule.objects.filter(
+                campaign=campaign,
+                lead_id__in=[lead.id for lead in leads if lead.status == 'callback'],
+                is_completed=False
+            ).values('lead_id').annotate(due=Min('scheduled_time')).values_list('lead_id', 'due')
+        )
+
+        priorities = {}
+        eligible_at = {}
+        for lead in leads:
+            when = callbacks.get(lead.id)
+            if when is None and lead.last_dial_attempt:
+                when = lead.last_dial_attempt + timedelta(seconds=campaign.retry_delay)
+            if when and when > horizon:
+                continue
+
+            priorities[lead.id] = self.calculate_priority(lead, campaign)
+            if when and when > now:
+                eligible_at[lead.id] = when
+
+        return priorities, eligible_at
 
     def calculate_priority(self, lead, campaign):
         """Calculate priority for lead (1-99, higher = sooner)"""
         # Base priority
         priority = 50
 
-        # Callbacks get higher priority
-        if lead.status == 'callback':
-            priority = 80
-
         # Leads with previous contact get medium-high priority
         if lead.call_count > 0:
             priority = 60
@@ -201,6 +257,16 @@ class Command(BaseCommand):
         if lead.call_count == 0:
             priority = 50
 
+        # Callbacks get higher priority (checked last so they are not overridden)
+        if lead.status == 'callback':
+            priority = 80
+
+        # Lead-level priority nudges within the same band
+        if lead.priority == 'high':
+            priority += 5
+        elif lead.priority == 'low':
+            priority -= 5
+
         # Could add more logic here:
         # - Lead score
         # - Time since last contact
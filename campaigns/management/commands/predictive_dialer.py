@@ -4,15 +4,13 @@ import logging
 import time
 from decimal import Decimal
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 from django.db.models import Q, Count
 
+from campaigns.leases import LeaseLost, campaign_lease, default_lease_ttl
 from campaigns.models import Campaign, DialerHopper
 from users.models import AgentStatus
 from agents.models import AgentDialerSession
-from telephony.models import AsteriskServer
-from telephony.services import AsteriskService
-from calls.models import CallLog
+from telephony.services import get_server_pool
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +45,10 @@ class Command(BaseCommand):
         if test_mode:
             self.stdout.write(self.style.WARNING('TEST MODE: No actual calls will be placed'))
 
+        # Campaign leases: several copies can run, each campaign dials from one
+        self.leases = {}
+        self.lease_ttl = max(default_lease_ttl(), interval * 3)
+
         while True:
             try:
                 self.dial_cycle(campaign_id, test_mode)
@@ -70,6 +72,9 @@ class Command(BaseCommand):
             campaigns = campaigns.filter(id=campaign_id)
 
         for campaign in campaigns:
+            lease = self.leases.setdefault(campaign.id, campaign_lease(campaign.id, ttl=self.lease_ttl))
+            if not test_mode and not lease.hold():
+                continue
             try:
                 # **CRITICAL: Clean up stuck leads before dialing**
                 # This prevents leads from staying in dialing set forever when calls fail
@@ -158,7 +163,13 @@ class Command(BaseCommand):
         logger.info(f'{campaign.name}: Dialing {dial_count} calls (agents={available_agents}, active={active_calls})')
 
         # 4. Get leads from hopper (Redis)
-        leads = HopperService.get_next_leads(campaign.id, count=dial_count)
+        try:
+            leads = HopperService.get_next_leads(
+                campaign.id, count=dial_count, fence=self.leases[campaign.id].token
+            )
+        except LeaseLost as e:
+            logger.warning(f'{campaign.name}: not dialing, {e}')
+            return
         logger.info(f"Fetched {len(leads)} leads from hopper")
 
         # 5. Originate calls
@@ -212,104 +223,15 @@ class Command(BaseCommand):
     def originate_call(self, campaign, lead_data, test_mode=False):
         """Originate a call for a hopper entry"""
         from campaigns.services import HopperService
-        
-        # Get Asterisk server
-        server = AsteriskServer.objects.filter(is_active=True).first()
-        if not server:
-            logger.error('No active Asterisk server found')
-            return
 
-        lead_id = int(lead_data['id'])
-        phone_number = lead_data['phone_number']
-
-        # Increment call count to prevent infinite loop
-        from leads.models import Lead
-        try:
-            lead = Lead.objects.get(id=lead_id)
-            lead.call_count += 1
-            lead.save(update_fields=['call_count'])
-        except Lead.DoesNotExist:
-            logger.error(f'Lead {lead_id} does not exist')
-            return
-
-        # Register dialing in Redis
-        HopperService.register_dialing(campaign.id, lead_id)
-        
-        # Track timestamp for timeout-based cleanup
-        import time
-        r = HopperService.get_redis()
-        timestamp_key = f"campaign:{campaign.id}:dialing_timestamps"
-        r.hset(timestamp_key, lead_id, int(time.time()))
-        
         if test_mode:
-            logger.info(f'TEST: Would dial {phone_number} for lead {lead_id}')
-            # Immediately unregister since we aren't really dialing
-            HopperService.unregister_dialing(campaign.id, lead_id)
+            logger.info(f'TEST: Would dial {lead_data["phone_number"]} for lead {lead_data["id"]}')
             return
 
-        # Prepare dial string
-        # Use campaign dial_prefix if configured
-        dial_number = phone_number
-        if campaign.dial_prefix:
-            dial_number = f"{campaign.dial_prefix}{phone_number}"
-
-        # Originate call via ARI
-        service = AsteriskService(server)
-        
-        try:
-            # Prepare channel variables
-            variables = {
-                'CALL_TYPE': 'autodial',
-                'CAMPAIGN_ID': str(campaign.id),
-                'LEAD_ID': str(lead_id),
-                'CUSTOMER_NUMBER': phone_number,
-            }
-            
-            # Pass hopper id if we have it (for legacy DB tracking)
-            hopper_id = lead_data.get('hopper_id')
-            if hopper_id:
-                variables['HOPPER_ID'] = str(hopper_id)
-            
-            # Add AMD variables if enabled
-            if campaign.amd_enabled:
-                variables.update({
-                    'AMD_ENABLED': '1',
-                    'AMD_SILENCE': '2500',      # Initial silence (ms)
-                    'AMD_AFTER_GREETING_SILENCE': '800',  # After greeting silence
-                    'AMD_TOTAL_ANALYSIS_TIME': '5000',    # Total analysis time
-                    'AMD_MIN_WORD_LENGTH': '100',         # Minimum word length
-                    'AMD_BETWEEN_WORDS_SILENCE': '50',    # Between words silence
-                    'AMD_MAXIMUM_NUMBER_OF_WORDS': '3',   # Max words
-                    'AMD_MAXIMUM_WORD_LENGTH': '5000',    # Max word length
-                })
-            
-            # Originate to Local channel that goes through dialplan (_X. in from-campaign hits AMD/Stasis)
-            result = service.originate_local_channel(
-                number=dial_number,
-                context='from-campaign',
-                callerid=f"Campaign {campaign.name}",
-                variables=variables
-            )
-
-            if result.get('success'):
-                channel_id = result.get('channel_id')
-                
-                # Create call log
-                CallLog.objects.create(
-                    channel=channel_id,
-                    call_type='outbound',
-                    call_status='initiated',
-                    called_number=phone_number,
-                    campaign=campaign,
-                    lead_id=lead_id, 
-                    start_time=timezone.now()
-                )
-                
-                logger.info(f'Originated call {channel_id} for {phone_number} (call_count={lead.call_count})')
-            else:
-                logger.error(f'Failed to originate call: {result.get("error")}')
-                HopperService.unregister_dialing(campaign.id, lead_id)
+        # Least-loaded healthy Asterisk server
+        server = get_server_pool().pick()
+        if not server:
+            logger.error('No active Asterisk server found')
+            return
 
-        except Exception as e:
-            logger.error(f'Exception originating call: {e}', exc_info=True)
-            HopperService.unregister_dialing(campaign.id, lead_id)
+        HopperService.originate_lead(campaign, lead_data, server)
@@ -1,12 +1,13 @@
+import uuid
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db.models import Q
 
 from campaigns.models import OutboundQueue, Campaign, CampaignCarrier
 from agents.models import AgentDialerSession
-from telephony.services import AsteriskService
+from telephony.services import AsteriskService, get_server_pool
 from telephony.routing import (
-    select_carrier_for_campaign,
+    get_carrier_router,
     build_dial_number,
     build_call_variables,
 )
@@ -22,16 +23,27 @@ class Command(BaseCommand):
         if options.get('campaign_id'):
             qs = qs.filter(campaign_id=options['campaign_id'])
         # Find one ready agent session per campaign
-        for item in qs.order_by('created_at')[:20]:
+        router = get_carrier_router()
+        pool = get_server_pool()
+        batches = {}
+        for item in qs.select_related('campaign').order_by('created_at')[:20]:
             session = AgentDialerSession.objects.filter(
                 campaign=item.campaign,
                 status='ready'
             ).order_by('created_at').first()
             if not session:
                 continue
-            carrier = select_carrier_for_campaign(item.campaign)
-            target_server = carrier.asterisk_server if carrier else session.asterisk_server
-            service = AsteriskService(target_server)
+            channel_id = str(uuid.uuid4())
+            route = router.acquire(item.campaign, channel_id=channel_id)
+            if not route['success']:
+                # Trunks at their channel/CPS limits; leave it pending
+                continue
+            carrier = route['carrier']
+            # Stay on the agent's server so the customer leg can join its bridge
+            target_server = pool.pick(carrier=carrier, among={session.asterisk_server_id})
+            if target_server is None:
+                router.release_channel(channel_id)
+                continue
             # Originate via Local into from-campaign; dialplan selects carrier by prefix
             number_to_dial = build_dial_number(item.phone_number, campaign=item.campaign, carrier=carrier)
             variables = build_call_variables(
@@ -40,22 +52,31 @@ class Command(BaseCommand):
                 queue_item=item,
                 carrier=carrier,
             )
-            res = service.originate_local_channel(
-                number=number_to_dial,
-                context='from-campaign',
-                app='autodialer',
-                callerid=f"OUT {item.phone_number}",
-                variables=variables,
-            )
-            if res.get('success'):
-                item.status = 'dialing'
-                item.attempts += 1
-                item.last_tried_at = timezone.now()
-                item.save()
-                self.stdout.write(self.style.SUCCESS(f"Dialing {item.phone_number} for {item.campaign.name}"))
-            else:
-                item.status = 'failed'
+            batch = batches.setdefault(target_server.id, (target_server, [], []))
+            batch[1].append((item, channel_id))
+            batch[2].append({
+                'number': number_to_dial,
+                'context': 'from-campaign',
+                'app': 'autodialer',
+                'callerid': f"OUT {item.phone_number}",
+                'variables': variables,
+                'channel_id': channel_id,
+            })
+
+        # One concurrent burst per server
+        for target_server, items, calls in batches.values():
+            results = AsteriskService(target_server).originate_batch(calls)
+            for (item, channel_id), res in zip(items, results):
                 item.attempts += 1
                 item.last_tried_at = timezone.now()
-                item.save()
-                self.stderr.write(f"Failed to originate {item.phone_number}: {res.get('error')}")
+                if res.get('success'):
+                    item.status = 'dialing'
+                    item.save()
+                    self.stdout.write(self.style.SUCCESS(f"Dialing {item.phone_number} for {item.campaign.name}"))
+                else:
+                    item.status = 'failed'
+                    item.save()
+                    router.release_channel(channel_id)
+                    self.stderr.write(f"Failed to originate {item.phone_number}: {res.get('error')}")
+
+        router.flush_usage()
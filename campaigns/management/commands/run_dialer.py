@@ -1,14 +1,17 @@
 import time
+import uuid
 import logging
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import Count, Q
+from campaigns.leases import campaign_lease, default_lease_ttl, get_worker_id
+from campaigns.sharding import CampaignShard
 from campaigns.models import Campaign, OutboundQueue
 from agents.models import AgentDialerSession
-from telephony.services import AsteriskService
+from telephony.services import AsteriskService, get_server_pool
 from telephony.routing import (
-    select_carrier_for_campaign,
+    get_carrier_router,
     build_dial_number,
     build_call_variables,
 )
@@ -20,9 +23,17 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting Dialer Engine...'))
+        # Campaigns are sharded over every running copy; the campaign lease
+        # keeps a campaign on one copy while the shards rebalance
+        self.leases = {}
+        self.shard = CampaignShard('run_dialer', get_worker_id(), ttl=max(15, default_lease_ttl()))
+        shard_refreshed = 0
         
         while True:
             try:
+                if time.monotonic() - shard_refreshed >= 5:
+                    self.shard.refresh()
+                    shard_refreshed = time.monotonic()
                 self.run_dialer_loop()
             except Exception as e:
                 logger.error(f"Dialer Loop Error: {e}")
@@ -34,6 +45,15 @@ class Command(BaseCommand):
         active_campaigns = Campaign.objects.filter(status='active', is_active=True)
 
         for campaign in active_campaigns:
+            if not self.shard.owns(campaign.id):
+                lease = self.leases.pop(campaign.id, None)
+                if lease:
+                    lease.release()
+                continue
+            lease = self.leases.setdefault(campaign.id, campaign_lease(campaign.id))
+            if not lease.hold():
+                continue
+
             # 2. Calculate Calls Needed
             # Formula: (Ready Agents * Ratio) - Active Ringing Calls
             
@@ -76,20 +96,37 @@ class Command(BaseCommand):
                 last_tried_at=timezone.now()
             )
 
-        # 4. Originate Calls via Asterisk
-        from telephony.models import AsteriskServer
-        server = AsteriskServer.objects.filter(is_active=True).first()
-        
-        if not server:
-            logger.error("No active Asterisk Server found!")
-            return
-
-        svc = AsteriskService(server)
-
+        # 4. Originate Calls via Asterisk, on the least-loaded server that
+        # carries the trunk, preferring servers that host the agents' bridges
+        pool = get_server_pool()
+        # Every live session counts, not only idle ones: agents on a call or
+        # still connecting will take the answers of this burst too
+        agent_server_ids = set(AgentDialerSession.objects.filter(
+            campaign=campaign,
+            status__in=('connecting', 'ready')
+        ).values_list('asterisk_server_id', flat=True))
+
+        # Group by target server so each server gets one concurrent burst
+        router = get_carrier_router()
+        batches = {}
+        deferred_ids = []
         for queue_item in leads_to_dial:
-            carrier = select_carrier_for_campaign(campaign)
-            target_server = carrier.asterisk_server if carrier and carrier.asterisk_server else server
-            svc = AsteriskService(target_server)
+            if deferred_ids:
+                deferred_ids.append(queue_item.id)
+                continue
+            channel_id = str(uuid.uuid4())
+            route = router.acquire(campaign, channel_id=channel_id)
+            if not route['success']:
+                # Every trunk is at its channel or CPS limit, or no server is up;
+                # try again next loop
+                deferred_ids.append(queue_item.id)
+                continue
+            carrier = route['carrier']
+            target_server = pool.pick(carrier=carrier, among=agent_server_ids)
+            if target_server is None:
+                router.release_channel(channel_id)
+                deferred_ids.append(queue_item.id)
+                continue
             dial_number = build_dial_number(queue_item.phone_number, campaign=campaign, carrier=carrier)
             # Originate
             variables = build_call_variables(
@@ -100,16 +137,29 @@ class Command(BaseCommand):
             )
 
             # We'll use originate_local_channel to let dialplan handle carrier selection
-            result = svc.originate_local_channel(
-                number=dial_number,
-                context='from-campaign',
-                app=target_server.ari_application,  # 'autodialer'
-                variables=variables,
-                callerid=f"{campaign.name} <{campaign.dial_prefix or ''}>"
-            )
-
-            if not result.get('success'):
-                logger.error(f"Failed to originate {queue_item.phone_number}: {result.get('error')}")
-                # Revert status
-                queue_item.status = 'failed'
-                queue_item.save()
+            batch = batches.setdefault(target_server.id, (target_server, [], []))
+            batch[1].append((queue_item, channel_id))
+            batch[2].append({
+                'number': dial_number,
+                'context': 'from-campaign',
+                'app': target_server.ari_application,  # 'autodialer'
+                'variables': variables,
+                'channel_id': channel_id,
+                'callerid': f"{campaign.name} <{campaign.dial_prefix or ''}>",
+            })
+
+        if deferred_ids:
+            OutboundQueue.objects.filter(id__in=deferred_ids).update(status='pending')
+
+        failed_ids = []
+        for target_server, queued, calls in batches.values():
+            results = AsteriskService(target_server).originate_batch(calls)
+            for (queue_item, channel_id), result in zip(queued, results):
+                if not result.get('success'):
+                    logger.error(f"Failed to originate {queue_item.phone_number}: {result.get('error')}")
+                    failed_ids.append(queue_item.id)
+                    router.release_channel(channel_id)
+
+        if failed_ids:
+            # Revert status
+            OutboundQueue.objects.filter(id__in=failed_ids).update(status='failed')
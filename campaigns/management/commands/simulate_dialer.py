@@ -0,0 +1,73 @@
+# campaigns/management/commands/simulate_dialer.py
+
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from campaigns.simulation import PACING_MODES, Scenario, compare_modes, ensure_schema, format_table
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Simulate predictive pacing modes offline and compare them side by side'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes',
+            default=','.join(PACING_MODES),
+            help=f'Comma-separated pacing modes (default: {",".join(PACING_MODES)})'
+        )
+        parser.add_argument('--agents', type=int, default=20, help='Staffed agents (default: 20)')
+        parser.add_argument('--duration', type=float, default=3600, help='Simulated seconds (default: 3600)')
+        parser.add_argument('--warmup', type=float, default=600, help='Seconds excluded from results (default: 600)')
+        parser.add_argument('--answer-rate', type=float, default=0.30, help='P(dial answered) (default: 0.30)')
+        parser.add_argument('--amd-rate', type=float, default=0.15, help='P(answer is a machine) (default: 0.15)')
+        parser.add_argument('--talk-mean', type=float, default=180, help='Mean talk seconds (default: 180)')
+        parser.add_argument('--talk-sd', type=float, default=120, help='Talk time std deviation (default: 120)')
+        parser.add_argument('--wrapup-mean', type=float, default=30, help='Mean wrap-up seconds (default: 30)')
+        parser.add_argument('--ring-mean', type=float, default=12, help='Mean seconds to answer (default: 12)')
+        parser.add_argument('--patience', type=float, default=2.0, help='Seconds before an answered call is abandoned (default: 2)')
+        parser.add_argument('--target-abandon', type=float, default=3.0, help='Target abandon %% (default: 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--seeds', type=int, default=1, help='Runs per mode, averaged (default: 1)')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = set(modes) - set(PACING_MODES)
+        if unknown:
+            raise CommandError(f"Unknown pacing modes: {', '.join(sorted(unknown))}")
+
+        if 'dial_level' in modes and connection.vendor == 'sqlite':
+            # Throwaway simulation database: build the schema from the models
+            ensure_schema()
+
+        scenario = Scenario(
+            agents=options['agents'],
+            duration=options['duration'],
+            warmup=options['warmup'],
+            answer_rate=options['answer_rate'],
+            amd_rate=options['amd_rate'],
+            talk_mean=options['talk_mean'],
+            talk_sd=options['talk_sd'],
+            wrapup_mean=options['wrapup_mean'],
+            ring_mean=options['ring_mean'],
+            patience=options['patience'],
+            target_abandon_rate=options['target_abandon'],
+            seed=options['seed'],
+        )
+
+        self.stdout.write(
+            f"Simulating {scenario.agents} agents for {scenario.duration:.0f}s "
+            f"({', '.join(modes)}; {options['seeds']} seed(s))..."
+        )
+        rows = compare_modes(scenario, modes, seeds=options['seeds'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        else:
+            self.stdout.write(format_table(rows))
+        self.stdout.write(self.style.SUCCESS('Simulation complete'))
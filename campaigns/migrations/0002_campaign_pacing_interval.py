@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-17 09:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='pacing_interval',
+            field=models.FloatField(default=1.0, help_text='Seconds between dialer engine pacing decisions', validators=[django.core.validators.MinValueValidator(0.2), django.core.validators.MaxValueValidator(60.0)]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-17 11:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0002_campaign_pacing_interval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='pacing_model',
+            field=models.CharField(choices=[('heuristic', 'Heuristic Ratio'), ('erlang_c', 'Erlang-C'), ('erlang_a', 'Erlang-A (with patience)')], default='heuristic', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='customer_patience',
+            field=models.FloatField(default=2.0, help_text='Seconds an answered customer waits for an agent (Erlang pacing)', validators=[django.core.validators.MinValueValidator(0.5)]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0003_campaign_pacing_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaignstats',
+            name='sales',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
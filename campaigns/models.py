@@ -321,6 +321,22 @@ class Campaign(TimeStampedModel):
     max_dial_ratio = models.FloatField(default=3.0)
     avg_talk_time = models.IntegerField(default=180)
     wrapup_time = models.IntegerField(default=30)
+    PACING_MODELS = [
+        ('heuristic', 'Heuristic Ratio'),
+        ('erlang_c', 'Erlang-C'),
+        ('erlang_a', 'Erlang-A (with patience)'),
+    ]
+    pacing_model = models.CharField(max_length=20, choices=PACING_MODELS, default='heuristic')
+    customer_patience = models.FloatField(
+        default=2.0,
+        validators=[MinValueValidator(0.5)],
+        help_text="Seconds an answered customer waits for an agent (Erlang pacing)"
+    )
+    pacing_interval = models.FloatField(
+        default=1.0,
+        validators=[MinValueValidator(0.2), MaxValueValidator(60.0)],
+        help_text="Seconds between dialer engine pacing decisions"
+    )
     
     # AMD settings
     amd_enabled = models.BooleanField(default=False)
@@ -610,6 +626,7 @@ class CampaignStats(TimeStampedModel):
     # Lead Statistics
     leads_processed = models.PositiveIntegerField(default=0)
     leads_dispositioned = models.PositiveIntegerField(default=0)
+    sales = models.PositiveIntegerField(default=0)
     
     # Time Statistics
     total_talk_time = models.PositiveIntegerField(default=0, help_text="Total talk time in seconds")
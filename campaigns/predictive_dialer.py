@@ -7,18 +7,26 @@ This module implements an intelligent predictive dialing algorithm that:
 3. Minimizes abandoned calls while maximizing agent utilization
 4. Supports AMD (Answering Machine Detection) integration
 
-Based on Erlang-C queuing theory with real-time adjustments.
+Pacing models:
+- heuristic: answer-rate ratio with abandon/availability multipliers
+- erlang_c / erlang_a: solve for the number of dialing lines that keeps
+  predicted abandonment under target (see campaigns.erlang)
 """
 
 import logging
 import math
+import threading
+import time
 from datetime import timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 from django.utils import timezone
-from django.db.models import Avg, Count, Q, F
+from django.db.models import Avg, Count, IntegerField, OuterRef, Q, F, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+from campaigns.dialer_counters import DialerCounters, redis_counters_enabled
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +45,7 @@ class DialerMetrics:
     answer_rate: float  # percentage (0-100)
     abandon_rate: float  # percentage (0-100)
     amd_rate: float  # answering machine rate (0-100)
+    calls_dialing: int = 0  # open calls not answered yet
 
 
 @dataclass
@@ -51,153 +60,271 @@ class DialerConfig:
     amd_timeout_ms: int = 3000  # AMD detection timeout
     predictive_enabled: bool = True
     adaptive_pacing: bool = True
+    pacing_model: str = 'heuristic'  # heuristic, erlang_c, erlang_a
+    patience: float = 2.0  # Seconds an answered customer waits for an agent
+    max_lines: int = 0  # Hard cap on dialing lines (0 = agents x max_dial_ratio)
+    no_answer_timeout: float = 30.0  # Seconds an unanswered dial holds its line
+    
+    @classmethod
+    def from_campaign(cls, campaign) -> 'DialerConfig':
+        """Build dialer configuration from a Campaign's pacing settings"""
+        return cls(
+            target_abandon_rate=campaign.target_abandon_rate,
+            max_dial_ratio=campaign.max_dial_ratio,
+            amd_enabled=campaign.amd_enabled,
+            predictive_enabled=campaign.dial_mode == 'predictive',
+            pacing_model=campaign.pacing_model,
+            patience=campaign.customer_patience,
+            max_lines=campaign.max_lines,
+            no_answer_timeout=campaign.dial_timeout,
+        )
 
 
-class PredictiveDialer:
+def _empty_metrics() -> DialerMetrics:
+    """Return empty metrics for missing campaign"""
+    return DialerMetrics(
+        agents_available=0, agents_busy=0, agents_wrapup=0, agents_total=0,
+        calls_in_progress=0, calls_in_queue=0,
+        avg_talk_time=180.0, avg_wrapup_time=30.0, avg_ring_time=15.0,
+        answer_rate=30.0, abandon_rate=0.0, amd_rate=15.0
+    )
+
+
+class MetricsSnapshot:
     """
-    Intelligent Predictive Dialing Algorithm
+    Per-tick DialerMetrics for every dialing campaign
     
-    Phase 4.1: Dynamic dial ratio calculation based on real-time metrics
+    All campaigns are measured together in two grouped, conditional-aggregate
+    queries (campaign/agent/hopper side and CallLog side), so the cost of a
+    pacing tick stays flat as the number of campaigns grows. With
+    DIALER_METRICS_SOURCE='redis' the CallLog side is read from the ARI-fed
+    rolling counters instead (see campaigns.dialer_counters).
     
     Usage:
-        dialer = PredictiveDialer(campaign_id)
-        ratio = dialer.calculate_dial_ratio()
-        calls_to_make = dialer.get_calls_to_dial()
+        snapshot = MetricsSnapshot(ttl=1.0)
+        metrics = snapshot.get(campaign_id)
     """
     
-    def __init__(self, campaign_id: int, config: DialerConfig = None):
-        self.campaign_id = campaign_id
-        self.config = config or DialerConfig()
-        self._metrics_cache = None
-        self._cache_time = None
-        self._cache_ttl = 5  # seconds
+    # Calls still open after this long are treated as stale rather than live
+    OPEN_CALL_LOOKBACK = timedelta(hours=2)
     
-    def get_metrics(self, force_refresh: bool = False) -> DialerMetrics:
-        """
-        Get current dialer metrics with caching
-        
-        Args:
-            force_refresh: Force refresh metrics from database
-        
-        Returns:
-            DialerMetrics: Current metrics
-        """
-        now = timezone.now()
-        
-        # Use cached metrics if available and fresh
-        if (not force_refresh and 
-            self._metrics_cache and 
-            self._cache_time and 
-            (now - self._cache_time).total_seconds() < self._cache_ttl):
-            return self._metrics_cache
-        
-        metrics = self._fetch_metrics()
-        self._metrics_cache = metrics
-        self._cache_time = now
+    def __init__(self, ttl: float = None):
+        if ttl is None:
+            ttl = getattr(settings, 'AUTODIALER_SETTINGS', {}).get('DIALER_METRICS_TTL', 1.0)
+        self.ttl = ttl
+        self.built_at = None
+        self.build_seconds = 0.0
+        self._metrics: Dict[int, DialerMetrics] = {}
+        self._tracked: Set[int] = set()
+        self._lock = threading.Lock()
+    
+    def get(self, campaign_id: int, force_refresh: bool = False) -> DialerMetrics:
+        """Return metrics for one campaign, rebuilding the snapshot if stale"""
+        with self._lock:
+            if force_refresh or self._is_stale():
+                self._build()
+            
+            if campaign_id not in self._metrics and campaign_id not in self._tracked:
+                # Campaigns that are not active (yet) are tracked from first use
+                self._tracked.add(campaign_id)
+                self._build()
+            
+            return self._metrics.get(campaign_id) or _empty_metrics()
+    
+    def get_all(self, force_refresh: bool = False) -> Dict[int, DialerMetrics]:
+        """Return metrics for every campaign in the snapshot"""
+        with self._lock:
+            if force_refresh or self._is_stale():
+                self._build()
+            return dict(self._metrics)
+    
+    def _is_stale(self) -> bool:
+        return self.built_at is None or (time.monotonic() - self.built_at) >= self.ttl
+    
+    def _build(self):
+        """Rebuild metrics for all active and tracked campaigns"""
+        started = time.monotonic()
+        try:
+            self._metrics = self._fetch_all(timezone.now())
+        except Exception as e:
+            logger.error(f"Error building dialer metrics snapshot: {e}", exc_info=True)
+            if not self._metrics:
+                raise
+        self.built_at = time.monotonic()
+        self.build_seconds = self.built_at - started
+    
+    def _fetch_all(self, now) -> Dict[int, DialerMetrics]:
+        """Fetch metrics for all campaigns in two grouped queries"""
+        campaigns = self._fetch_campaign_rows()
+        if not campaigns:
+            return {}
+        
+        call_rows = None
+        if redis_counters_enabled():
+            try:
+                call_rows = self._fetch_counter_rows(list(campaigns.keys()))
+            except Exception as e:
+                logger.warning(f"Redis dialer counters unavailable, using CallLog: {e}")
+        if call_rows is None:
+            call_rows = self._fetch_call_rows(list(campaigns.keys()), now)
+        
+        metrics = {}
+        for campaign_id, row in campaigns.items():
+            calls = call_rows.get(campaign_id)
+            metrics[campaign_id] = self._build_metrics(row, calls)
         
         return metrics
     
-    def _fetch_metrics(self) -> DialerMetrics:
-        """Fetch real-time metrics from database"""
+    def _fetch_campaign_rows(self) -> Dict[int, Dict]:
+        """Campaign settings, agent state counts and hopper counts in one query"""
         from users.models import AgentStatus
+        from campaigns.models import Campaign, DialerHopper
+        
+        online_statuses = [
+            status for status, _ in AgentStatus.STATUS_CHOICES if status != 'offline'
+        ]
+        
+        def agent_count(*statuses):
+            return Count(
+                'campaignagent',
+                filter=Q(
+                    campaignagent__is_active=True,
+                    campaignagent__user__agent_status__status__in=statuses,
+                ),
+            )
+        
+        hopper_dialing = DialerHopper.objects.filter(
+            campaign_id=OuterRef('pk'),
+            status='dialing'
+        ).order_by().values('campaign_id').annotate(n=Count('id')).values('n')
+        
+        rows = Campaign.objects.filter(
+            Q(status='active') | Q(id__in=self._tracked)
+        ).annotate(
+            agents_available=agent_count('available'),
+            agents_busy=agent_count('busy'),
+            agents_wrapup=agent_count('wrapup'),
+            agents_total=agent_count(*online_statuses),
+            calls_in_queue=Coalesce(Subquery(hopper_dialing, output_field=IntegerField()), 0),
+        ).values(
+            'id', 'avg_talk_time', 'wrapup_time',
+            'agents_available', 'agents_busy', 'agents_wrapup', 'agents_total',
+            'calls_in_queue',
+        )
+        
+        return {row['id']: row for row in rows}
+    
+    def _fetch_call_rows(self, campaign_ids: List[int], now) -> Dict[int, Dict]:
+        """Hourly rates, 15-minute averages and open calls per campaign in one query"""
         from calls.models import CallLog
-        from campaigns.models import Campaign, CampaignAgent, DialerHopper
         
-        now = timezone.now()
-        today = now.date()
         last_hour = now - timedelta(hours=1)
         last_15_min = now - timedelta(minutes=15)
         
-        # Get campaign
-        campaign = Campaign.objects.filter(id=self.campaign_id).first()
-        if not campaign:
-            return self._empty_metrics()
-        
-        # Get agent counts
-        agent_ids = CampaignAgent.objects.filter(
-            campaign_id=self.campaign_id,
-            is_active=True
-        ).values_list('user_id', flat=True)
-        
-        agent_statuses = AgentStatus.objects.filter(
-            user_id__in=agent_ids
-        ).exclude(status='offline')
-        
-        agents_available = agent_statuses.filter(status='available').count()
-        agents_busy = agent_statuses.filter(status='busy').count()
-        agents_wrapup = agent_statuses.filter(status='wrapup').count()
-        agents_total = agent_statuses.count()
-        
-        # Get call metrics from last hour
-        calls_query = CallLog.objects.filter(
-            campaign_id=self.campaign_id,
-            start_time__gte=last_hour
+        in_hour = Q(start_time__gte=last_hour)
+        recent_talk = Q(start_time__gte=last_15_min, talk_duration__gt=0)
+        
+        rows = CallLog.objects.filter(
+            campaign_id__in=campaign_ids,
+            start_time__gte=now - self.OPEN_CALL_LOOKBACK,
+        ).order_by().values('campaign_id').annotate(
+            total_calls=Count('id', filter=in_hour),
+            answered_calls=Count(
+                'id', filter=in_hour & (Q(call_status='answered') | Q(answer_time__isnull=False))
+            ),
+            abandoned_calls=Count('id', filter=in_hour & Q(call_status='abandoned')),
+            amd_calls=Count('id', filter=in_hour & Q(call_status='machine')),
+            avg_talk=Avg('talk_duration', filter=recent_talk),
+            avg_ring=Avg('ring_duration', filter=recent_talk),
+            calls_in_progress=Count('id', filter=Q(end_time__isnull=True)),
+            calls_dialing=Count('id', filter=Q(end_time__isnull=True, answer_time__isnull=True)),
         )
         
-        total_calls = calls_query.count()
-        answered_calls = calls_query.filter(
-            Q(call_status='answered') | Q(answer_time__isnull=False)
-        ).count()
-        abandoned_calls = calls_query.filter(call_status='abandoned').count()
-        amd_calls = calls_query.filter(call_status='machine').count()
+        return {row['campaign_id']: row for row in rows}
+    
+    @staticmethod
+    def _fetch_counter_rows(campaign_ids: List[int]) -> Dict[int, Dict]:
+        """Same shape as _fetch_call_rows, read from the ARI-fed Redis buckets"""
+        rows = {}
+        for campaign_id, window in DialerCounters.read_windows(campaign_ids).items():
+            hour, recent = window['hour'], window['recent']
+            rows[campaign_id] = {
+                'total_calls': int(hour['attempts']),
+                'answered_calls': int(hour['answered']),
+                'abandoned_calls': int(hour['abandoned']),
+                'amd_calls': int(hour['machine']),
+                'avg_talk': recent['talk_sum'] / recent['talk_n'] if recent['talk_n'] else None,
+                'avg_ring': recent['ring_sum'] / recent['ring_n'] if recent['ring_n'] else None,
+                'calls_in_progress': window['calls_in_progress'],
+                'calls_dialing': window['calls_dialing'],
+            }
+        return rows
+    
+    @staticmethod
+    def _build_metrics(row: Dict, calls: Optional[Dict]) -> DialerMetrics:
+        """Combine campaign-side and call-side rows into DialerMetrics"""
+        calls = calls or {}
+        total_calls = calls.get('total_calls') or 0
         
         # Calculate rates
-        answer_rate = (answered_calls / total_calls * 100) if total_calls > 0 else 30.0
-        abandon_rate = (abandoned_calls / total_calls * 100) if total_calls > 0 else 0.0
-        amd_rate = (amd_calls / total_calls * 100) if total_calls > 0 else 15.0
-        
-        # Get average times from last 15 minutes (more recent = more accurate)
-        recent_calls = CallLog.objects.filter(
-            campaign_id=self.campaign_id,
-            start_time__gte=last_15_min,
-            talk_duration__gt=0
-        )
-        
-        avg_times = recent_calls.aggregate(
-            avg_talk=Avg('talk_duration'),
-            avg_ring=Avg('ring_duration')
-        )
-        
-        avg_talk_time = avg_times['avg_talk'] or campaign.avg_talk_time or 180.0
-        avg_ring_time = avg_times['avg_ring'] or 15.0
-        
-        # Estimate wrapup time
-        avg_wrapup_time = campaign.wrapup_time or 30.0
-        
-        # Get current call counts
-        calls_in_progress = CallLog.objects.filter(
-            campaign_id=self.campaign_id,
-            end_time__isnull=True
-        ).count()
-        
-        calls_in_queue = DialerHopper.objects.filter(
-            campaign_id=self.campaign_id,
-            status='dialing'
-        ).count()
+        if total_calls > 0:
+            answer_rate = calls['answered_calls'] / total_calls * 100
+            abandon_rate = calls['abandoned_calls'] / total_calls * 100
+            amd_rate = calls['amd_calls'] / total_calls * 100
+        else:
+            answer_rate, abandon_rate, amd_rate = 30.0, 0.0, 15.0
         
         return DialerMetrics(
-            agents_available=agents_available,
-            agents_busy=agents_busy,
-            agents_wrapup=agents_wrapup,
-            agents_total=agents_total,
-            calls_in_progress=calls_in_progress,
-            calls_in_queue=calls_in_queue,
-            avg_talk_time=avg_talk_time,
-            avg_wrapup_time=avg_wrapup_time,
-            avg_ring_time=avg_ring_time,
+            agents_available=row['agents_available'],
+            agents_busy=row['agents_busy'],
+            agents_wrapup=row['agents_wrapup'],
+            agents_total=row['agents_total'],
+            calls_in_progress=calls.get('calls_in_progress') or 0,
+            calls_in_queue=row['calls_in_queue'],
+            calls_dialing=calls.get('calls_dialing') or 0,
+            avg_talk_time=float(calls.get('avg_talk') or row['avg_talk_time'] or 180.0),
+            avg_wrapup_time=float(row['wrapup_time'] or 30.0),
+            avg_ring_time=float(calls.get('avg_ring') or 15.0),
             answer_rate=answer_rate,
             abandon_rate=abandon_rate,
             amd_rate=amd_rate
         )
+
+
+class PredictiveDialer:
+    """
+    Intelligent Predictive Dialing Algorithm
     
-    def _empty_metrics(self) -> DialerMetrics:
-        """Return empty metrics for missing campaign"""
-        return DialerMetrics(
-            agents_available=0, agents_busy=0, agents_wrapup=0, agents_total=0,
-            calls_in_progress=0, calls_in_queue=0,
-            avg_talk_time=180.0, avg_wrapup_time=30.0, avg_ring_time=15.0,
-            answer_rate=30.0, abandon_rate=0.0, amd_rate=15.0
-        )
+    Phase 4.1: Dynamic dial ratio calculation based on real-time metrics
+    
+    Usage:
+        dialer = PredictiveDialer(campaign_id)
+        ratio = dialer.calculate_dial_ratio()
+        calls_to_make = dialer.get_calls_to_dial()
+    """
+    
+    def __init__(self, campaign_id: int, config: DialerConfig = None,
+                 snapshot: 'MetricsSnapshot' = None):
+        self.campaign_id = campaign_id
+        self.config = config or DialerConfig()
+        self.snapshot = snapshot
+    
+    def get_metrics(self, force_refresh: bool = False) -> DialerMetrics:
+        """
+        Get current dialer metrics from the shared snapshot
+        
+        Args:
+            force_refresh: Force a snapshot rebuild from database
+        
+        Returns:
+            DialerMetrics: Current metrics
+        """
+        return self._fetch_metrics(force_refresh)
+    
+    def _fetch_metrics(self, force_refresh: bool = False) -> DialerMetrics:
+        """Read this campaign's metrics from the per-tick snapshot"""
+        snapshot = self.snapshot or DialerManager.get_snapshot()
+        return snapshot.get(self.campaign_id, force_refresh=force_refresh)
     
     def calculate_dial_ratio(self) -> float:
         """
@@ -223,6 +350,11 @@ class PredictiveDialer:
             # Simple ratio mode
             return self.config.min_dial_ratio
         
+        if self.uses_erlang:
+            solution = self.solve_erlang(metrics)
+            staffed = metrics.agents_available + metrics.agents_busy + metrics.agents_wrapup
+            return round(solution.lines / max(staffed, 1), 2)
+        
         # Step 1: Calculate base ratio from answer rate
         # If 30% of calls are answered, we need ~3.3 calls per agent
         effective_answer_rate = metrics.answer_rate / 100
@@ -272,6 +404,66 @@ class PredictiveDialer:
         
         return round(final_ratio, 2)
     
+    @property
+    def uses_erlang(self) -> bool:
+        return self.config.pacing_model in ('erlang_c', 'erlang_a')
+    
+    def solve_erlang(self, metrics: DialerMetrics):
+        """
+        Solve for the dialing lines that keep predicted abandonment on target
+        
+        Measured answer, AMD, talk, wrap-up and ring times, and the agents
+        idle right now, feed the Erlang-C or Erlang-A model in
+        campaigns.erlang. A line is held for the ring time when answered
+        (plus AMD analysis for machines) and for the no-answer timeout
+        otherwise. If the measured abandon rate is already
+        over the hard limit, the target is halved until it recovers.
+        
+        Returns:
+            PacingSolution: lines, predicted abandon and occupancy
+        """
+        from campaigns.erlang import solve_lines
+        
+        staffed = metrics.agents_available + metrics.agents_busy + metrics.agents_wrapup
+        
+        answer_rate = metrics.answer_rate / 100
+        machine_rate = metrics.amd_rate / 100 if self.config.amd_enabled else 0.0
+        human_answer_rate = max(answer_rate - machine_rate, 0.0)
+        
+        line_time = (
+            answer_rate * metrics.avg_ring_time
+            + machine_rate * self.config.amd_timeout_ms / 1000
+            + (1 - answer_rate) * self.config.no_answer_timeout
+        )
+        
+        target = self.config.target_abandon_rate
+        if metrics.abandon_rate >= self.config.max_abandon_rate:
+            target *= 0.5
+        
+        max_lines = int(math.ceil(staffed * self.config.max_dial_ratio))
+        if self.config.max_lines:
+            max_lines = min(max_lines, self.config.max_lines)
+        
+        solution = solve_lines(
+            agents=staffed,
+            human_answer_rate=human_answer_rate,
+            line_time=line_time,
+            service_time=metrics.avg_talk_time + metrics.avg_wrapup_time,
+            target_abandon=target,
+            max_lines=max_lines,
+            model=self.config.pacing_model,
+            patience=self.config.patience,
+            available=metrics.agents_available,
+            ring_time=metrics.avg_ring_time,
+        )
+        
+        logger.debug(
+            f"Campaign {self.campaign_id} {self.config.pacing_model}: {solution.lines} lines "
+            f"(abandon={solution.predicted_abandon:.2f}%, occupancy={solution.predicted_occupancy:.1f}%)"
+        )
+        
+        return solution
+    
     def _predict_agent_availability(self, metrics: DialerMetrics, seconds_ahead: float) -> int:
         """
         Predict how many agents will be available in N seconds
@@ -338,14 +530,21 @@ class PredictiveDialer:
         if metrics.agents_available == 0 and metrics.agents_wrapup == 0:
             return 0
         
-        dial_ratio = self.calculate_dial_ratio()
-        
-        # Calculate target concurrent calls
-        effective_agents = metrics.agents_available + (metrics.agents_wrapup * 0.5)
-        target_calls = effective_agents * dial_ratio
+        if self.config.predictive_enabled and self.uses_erlang:
+            # Lines the model allows in flight, minus lines already in flight
+            # (open calls not answered yet, plus hopper rows in dialing)
+            target_calls = self.solve_erlang(metrics).lines
+            current_calls = metrics.calls_dialing + metrics.calls_in_queue
+        else:
+            dial_ratio = self.calculate_dial_ratio()
+            
+            # Calculate target concurrent calls
+            effective_agents = metrics.agents_available + (metrics.agents_wrapup * 0.5)
+            target_calls = effective_agents * dial_ratio
+            
+            # Subtract calls already in progress/ringing
+            current_calls = metrics.calls_in_progress + metrics.calls_in_queue
         
-        # Subtract calls already in progress/ringing
-        current_calls = metrics.calls_in_progress + metrics.calls_in_queue
         calls_needed = target_calls - current_calls
         
         # Don't dial negative
@@ -359,14 +558,17 @@ class PredictiveDialer:
         
         return calls_to_dial
     
-    def get_dialer_status(self) -> Dict:
+    def get_dialer_status(self, force_refresh: bool = True) -> Dict:
         """
         Get comprehensive dialer status for monitoring
         
+        Args:
+            force_refresh: Rebuild the metrics snapshot before reporting
+        
         Returns:
             dict: Dialer status including metrics and recommendations
         """
-        metrics = self.get_metrics(force_refresh=True)
+        metrics = self.get_metrics(force_refresh=force_refresh)
         dial_ratio = self.calculate_dial_ratio()
         calls_to_dial = self.get_calls_to_dial()
         
@@ -392,6 +594,15 @@ class PredictiveDialer:
         if metrics.answer_rate < 20:
             warnings.append('Low answer rate - check lead quality')
         
+        prediction = None
+        if self.config.predictive_enabled and self.uses_erlang:
+            solution = self.solve_erlang(metrics)
+            prediction = {
+                'lines': solution.lines,
+                'abandon_rate': round(solution.predicted_abandon, 2),
+                'occupancy': round(solution.predicted_occupancy, 1),
+            }
+        
         return {
             'campaign_id': self.campaign_id,
             'timestamp': timezone.now().isoformat(),
@@ -405,6 +616,7 @@ class PredictiveDialer:
                 'agent_utilization': round(agent_utilization, 1),
                 'calls_in_progress': metrics.calls_in_progress,
                 'calls_in_queue': metrics.calls_in_queue,
+                'calls_dialing': metrics.calls_dialing,
                 'answer_rate': round(metrics.answer_rate, 1),
                 'abandon_rate': round(metrics.abandon_rate, 1),
                 'amd_rate': round(metrics.amd_rate, 1),
@@ -415,6 +627,8 @@ class PredictiveDialer:
                 'dial_ratio': dial_ratio,
                 'calls_to_dial': calls_to_dial,
                 'mode': 'predictive' if self.config.predictive_enabled else 'power',
+                'pacing_model': self.config.pacing_model,
+                'prediction': prediction,
                 'amd_enabled': self.config.amd_enabled,
             },
             'config': {
@@ -437,19 +651,30 @@ class DialerManager:
     """
     
     _dialers: Dict[int, PredictiveDialer] = {}
+    _snapshot: Optional[MetricsSnapshot] = None
+    
+    @classmethod
+    def get_snapshot(cls) -> MetricsSnapshot:
+        """Get the metrics snapshot shared by all dialers in this process"""
+        if cls._snapshot is None:
+            cls._snapshot = MetricsSnapshot()
+        return cls._snapshot
     
     @classmethod
     def get_dialer(cls, campaign_id: int) -> PredictiveDialer:
         """Get or create dialer for campaign"""
         if campaign_id not in cls._dialers:
-            cls._dialers[campaign_id] = PredictiveDialer(campaign_id)
+            cls._dialers[campaign_id] = PredictiveDialer(campaign_id, snapshot=cls.get_snapshot())
         return cls._dialers[campaign_id]
     
     @classmethod
-    def dial_for_campaign(cls, campaign_id: int) -> int:
+    def dial_for_campaign(cls, campaign_id: int, fence: Optional[int] = None) -> int:
         """
         Dial calls for a campaign based on predictive algorithm
         
+        Args:
+            fence: campaign lease token of the caller (see campaigns.leases)
+        
         Returns:
             int: Number of calls initiated
         """
@@ -462,7 +687,7 @@ class DialerManager:
             return 0
         
         # Get leads from hopper and initiate calls
-        initiated = HopperService.dial_leads(campaign_id, calls_to_dial)
+        initiated = HopperService.dial_leads(campaign_id, calls_to_dial, fence=fence)
         
         logger.info(f"Campaign {campaign_id}: Dialed {initiated} calls (requested {calls_to_dial})")
         
@@ -475,9 +700,12 @@ class DialerManager:
         
         statuses = []
         
+        # One snapshot rebuild covers every campaign below
+        cls.get_snapshot().get_all(force_refresh=True)
+        
         for campaign in Campaign.objects.filter(status='active'):
             dialer = cls.get_dialer(campaign.id)
-            status = dialer.get_dialer_status()
+            status = dialer.get_dialer_status(force_refresh=False)
             status['campaign_name'] = campaign.name
             statuses.append(status)
         
@@ -0,0 +1,220 @@
+# campaigns/rollups.py
+"""
+Daily stats rollups - CampaignStats and AgentDailyStats from CallLog
+
+Each rollup is one grouped aggregate over a start_time range (index range
+scan, no per-row date cast) written with one bulk upsert
+(INSERT ... ON CONFLICT DO UPDATE on the (owner, date) unique key).
+
+Incremental mode reads a watermark, finds which (owner, day) groups have a
+CallLog updated since then and recomputes only those groups, so the jobs
+can run every few seconds on busy days. Groups are always recomputed in
+full rather than patched with deltas, so a call that changes status after
+it was first counted is never double counted, and re-running is harmless.
+CallLog writers that use save(update_fields=...) must include updated_at,
+or their change is invisible here until the next full pass.
+
+Data Structures:
+- rollup:{name}:watermark (String) - ISO time of the last incremental run
+"""
+
+import logging
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Re-read this far behind the watermark so rows from transactions that
+# committed late (updated_at set before the previous run read) are caught
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def day_bounds(day):
+    """[start, end) datetimes of a local calendar day"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, dt_time.min), tz)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min), tz)
+    return start, end
+
+
+def _watermark_key(name):
+    return f"rollup:{name}:watermark"
+
+
+def get_watermark(name):
+    from django_redis import get_redis_connection
+    value = get_redis_connection("default").get(_watermark_key(name))
+    return datetime.fromisoformat(value.decode()) if value else None
+
+
+def set_watermark(name, when):
+    from django_redis import get_redis_connection
+    get_redis_connection("default").set(_watermark_key(name), when.isoformat())
+
+
+def _changed_groups(owner_field, since):
+    """{day: {owner_id, ...}} for CallLogs updated since `since`"""
+    from calls.models import CallLog
+
+    changed = (
+        CallLog.objects
+        .filter(updated_at__gte=since, **{f'{owner_field}__isnull': False})
+        .annotate(day=TruncDate('start_time', tzinfo=timezone.get_current_timezone()))
+        .values_list('day', owner_field)
+        .distinct()
+    )
+    groups = {}
+    for day, owner_id in changed:
+        groups.setdefault(day, set()).add(owner_id)
+    return groups
+
+
+def _run_incremental(name, rollup, owner_field):
+    """Recompute the groups touched since the watermark with `rollup(day, owner_ids)`"""
+    started = timezone.now()
+    since = get_watermark(name)
+    if since is None:
+        # First run: a full rollup of today, then go incremental
+        written = rollup(timezone.localdate(), None)
+    else:
+        written = 0
+        for day, owner_ids in _changed_groups(owner_field, since - WATERMARK_OVERLAP).items():
+            written += rollup(day, owner_ids)
+    set_watermark(name, started)
+    return written
+
+
+# ============================================================================
+# CampaignStats
+# ============================================================================
+
+def rollup_campaign_stats(day=None, campaign_ids=None):
+    """
+    Recompute CampaignStats for one day
+
+    With `campaign_ids` only those campaigns are recomputed; without, every
+    active campaign gets a row for the day, zeros included.
+    Returns: number of rows upserted
+    """
+    from campaigns.models import Campaign, CampaignStats
+    from calls.models import CallLog
+
+    day = day or timezone.localdate()
+    start, end = day_bounds(day)
+
+    calls = CallLog.objects.filter(start_time__gte=start, start_time__lt=end)
+    if campaign_ids is None:
+        campaign_ids = list(Campaign.objects.filter(status='active').values_list('id', flat=True))
+        fill_zeros = True
+    else:
+        fill_zeros = False
+    calls = calls.filter(campaign_id__in=campaign_ids)
+
+    totals = {
+        row['campaign_id']: row
+        for row in calls.values('campaign_id').annotate(
+            total=Count('id'),
+            answered=Count('id', filter=Q(call_status='answered') | Q(answer_time__isnull=False)),
+            dropped=Count('id', filter=Q(call_status='dropped')),
+            sales=Count('id', filter=Q(disposition__is_sale=True)),
+            avg_duration=Avg('talk_duration', filter=Q(talk_duration__gt=0)),
+        )
+    }
+
+    rows = []
+    for campaign_id in (campaign_ids if fill_zeros else totals):
+        row = totals.get(campaign_id, {})
+        total = row.get('total', 0)
+        answered = row.get('answered', 0)
+        sales = row.get('sales', 0)
+        rows.append(CampaignStats(
+            campaign_id=campaign_id,
+            date=day,
+            calls_made=total,
+            calls_answered=answered,
+            calls_dropped=row.get('dropped', 0),
+            sales=sales,
+            contact_rate=round(answered / total * 100, 2) if total > 0 else 0,
+            conversion_rate=round(sales / answered * 100, 2) if answered > 0 else 0,
+            average_call_duration=int(row.get('avg_duration') or 0),
+        ))
+
+    CampaignStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['campaign', 'date'],
+        update_fields=[
+            'calls_made', 'calls_answered', 'calls_dropped', 'sales',
+            'contact_rate', 'conversion_rate', 'average_call_duration', 'updated_at',
+        ],
+    )
+    return len(rows)
+
+
+def rollup_campaign_stats_incremental():
+    """Recompute only the campaign-days with CallLogs changed since the last run"""
+    return _run_incremental('campaign_stats', rollup_campaign_stats, 'campaign_id')
+
+
+# ============================================================================
+# AgentDailyStats
+# ============================================================================
+
+def rollup_agent_daily_stats(day=None, agent_ids=None):
+    """
+    Recompute AgentDailyStats for one day
+
+    Without `agent_ids` every agent with a call that day is recomputed, and
+    agents with a row but no calls left (all reassigned) are zeroed.
+    Returns: number of rows upserted
+    """
+    from users.models import AgentDailyStats
+    from calls.models import CallLog
+
+    day = day or timezone.localdate()
+    start, end = day_bounds(day)
+
+    calls = CallLog.objects.filter(start_time__gte=start, start_time__lt=end, agent__isnull=False)
+    if agent_ids is not None:
+        calls = calls.filter(agent_id__in=agent_ids)
+
+    rows = [
+        AgentDailyStats(
+            agent_id=row['agent_id'],
+            date=day,
+            calls_made=row['total'],
+            calls_answered=row['answered'],
+            talk_time=row['talk_time'] or 0,
+            sales=row['sales'],
+        )
+        for row in calls.values('agent_id').annotate(
+            total=Count('id'),
+            answered=Count('id', filter=Q(answer_time__isnull=False)),
+            talk_time=Sum('talk_duration'),
+            sales=Count('id', filter=Q(disposition__is_sale=True)),
+        )
+    ]
+
+    if agent_ids is None:
+        counted = {row.agent_id for row in rows}
+        rows.extend(
+            AgentDailyStats(agent_id=agent_id, date=day, calls_made=0, calls_answered=0, talk_time=0, sales=0)
+            for agent_id in AgentDailyStats.objects.filter(date=day).exclude(agent_id__in=counted)
+            .values_list('agent_id', flat=True)
+        )
+
+    AgentDailyStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['agent', 'date'],
+        update_fields=['calls_made', 'calls_answered', 'talk_time', 'sales', 'updated_at'],
+    )
+    return len(rows)
+
+
+def rollup_agent_daily_stats_incremental():
+    """Recompute only the agent-days with CallLogs changed since the last run"""
+    return _run_incremental('agent_daily_stats', rollup_agent_daily_stats, 'agent_id')
@@ -2,11 +2,14 @@
 
 import logging
 import json
+import time
 from decimal import Decimal
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Q
 from datetime import timedelta
 
+from .leases import FENCE_CHECK_LUA, LeaseLost, lease_key
 from .models import Campaign, CampaignStats, DialerHopper
 
 logger = logging.getLogger(__name__)
@@ -18,15 +21,16 @@ class DropRateMonitor:
     """
     
     @staticmethod
-    def check_and_adjust_dial_level(campaign):
+    def check_and_adjust_dial_level(campaign, now=None):
         """
         Check drop rate for campaign and adjust dial_level if needed
+        `now` anchors the one-hour window (defaults to the current time)
         Returns: dict with status and any adjustments made
         """
         from calls.models import CallLog
 
         # Get stats for last hour
-        one_hour_ago = timezone.now() - timedelta(hours=1)
+        one_hour_ago = (now or timezone.now()) - timedelta(hours=1)
         
         # Count total answered calls in last hour (Answered time is set)
         answered_calls = CallLog.objects.filter(
@@ -219,23 +223,69 @@ class HopperService:
     Data Structures:
     - campaign:{id}:hopper (List) - Lead IDs waiting to dial
     - campaign:{id}:dialing (Set) - Lead IDs currently being dialed
+    - campaign:{id}:dialing_timestamps (Hash) - When each lead started dialing
     - lead:{id}:data (Hash) - Cached lead details
+
+    Sorted hopper (AUTODIALER_SETTINGS['HOPPER_MODE'] = 'zset'):
+    - campaign:{id}:hopper:ready (Sorted Set) - eligible leads, score from
+      priority then eligible time (lowest pops first)
+    - campaign:{id}:hopper:delayed (Sorted Set) - leads not yet eligible,
+      score = eligible time (ms); promoted to ready when due
+    - campaign:{id}:hopper:priority (Hash) - priority (1-99) per queued lead
     """
+
+    AMD_VARIABLES = {
+        'AMD_ENABLED': '1',
+        'AMD_SILENCE': '2500',                # Initial silence (ms)
+        'AMD_AFTER_GREETING_SILENCE': '800',  # After greeting silence
+        'AMD_TOTAL_ANALYSIS_TIME': '5000',    # Total analysis time
+        'AMD_MIN_WORD_LENGTH': '100',         # Minimum word length
+        'AMD_BETWEEN_WORDS_SILENCE': '50',    # Between words silence
+        'AMD_MAXIMUM_NUMBER_OF_WORDS': '3',   # Max words
+        'AMD_MAXIMUM_WORD_LENGTH': '5000',    # Max word length
+    }
     
     @staticmethod
     def get_redis():
         from django_redis import get_redis_connection
         return get_redis_connection("default")
         
+    # Sorted hopper scores: (100 - priority) * weight + eligible time in ms,
+    # so higher priority always wins and equal priorities pop oldest-eligible first
+    PRIORITY_WEIGHT = 10 ** 13
+    DEFAULT_PRIORITY = 50
+
+    @staticmethod
+    def sorted_hopper_enabled():
+        """Whether the hopper uses the priority/time-aware sorted sets"""
+        autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+        return autodialer_settings.get('HOPPER_MODE', 'list') == 'zset'
+
     @staticmethod
-    def add_leads(campaign_id, leads):
+    def hopper_score(priority, eligible_ms):
+        """Ready-set score for a lead; lower pops first"""
+        return (100 - int(priority)) * HopperService.PRIORITY_WEIGHT + int(eligible_ms)
+
+    @staticmethod
+    def add_leads(campaign_id, leads, priorities=None, eligible_at=None, pipe=None):
         """
         Add leads to Redis hopper and cache their data
+
+        In sorted mode `priorities` ({lead_id: 1-99}) and `eligible_at`
+        ({lead_id: datetime}) place each lead; leads not yet eligible wait in
+        the delayed set. Fill order breaks ties, so lead_order is preserved.
+        When `pipe` is given the commands are only queued on it and the
+        caller executes it, so several campaigns can go in one round trip.
         """
-        r = HopperService.get_redis()
-        pipe = r.pipeline()
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = HopperService.get_redis().pipeline()
         
         hopper_key = f"campaign:{campaign_id}:hopper"
+        sorted_mode = HopperService.sorted_hopper_enabled()
+        priorities = priorities or {}
+        eligible_at = eligible_at or {}
+        now_ms = int(time.time() * 1000)
         
         added_count = 0
         for lead in leads:
@@ -251,69 +301,209 @@ class HopperService:
             pipe.hmset(lead_key, lead_data)
             pipe.expire(lead_key, 3600)  # Cache for 1 hour
             
-            # Add to hopper list (push to right/tail)
-            pipe.rpush(hopper_key, lead.id)
+            if sorted_mode:
+                priority = priorities.get(lead.id, HopperService.DEFAULT_PRIORITY)
+                when = eligible_at.get(lead.id)
+                when_ms = int(when.timestamp() * 1000) if when else 0
+
+                pipe.hset(f"{hopper_key}:priority", lead.id, priority)
+                if when_ms > now_ms:
+                    pipe.zadd(f"{hopper_key}:delayed", {lead.id: when_ms + added_count})
+                else:
+                    # Fill position breaks ties among equals
+                    score = HopperService.hopper_score(priority, now_ms + added_count)
+                    pipe.zadd(f"{hopper_key}:ready", {lead.id: score})
+            else:
+                # Add to hopper list (push to right/tail)
+                pipe.rpush(hopper_key, lead.id)
             added_count += 1
             
-        pipe.execute()
+        if own_pipe:
+            pipe.execute()
         return added_count
 
+    # Change a queued lead's priority in place, keeping its eligible time
+    REPRIORITIZE_LUA = """
+    local weight = tonumber(ARGV[3])
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    if not score and redis.call('ZSCORE', KEYS[2], ARGV[1]) == false then
+        return 0
+    end
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+    if score then
+        local eligible = tonumber(score) % weight
+        local new_score = (100 - tonumber(ARGV[2])) * weight + eligible
+        redis.call('ZADD', KEYS[1], string.format('%.0f', new_score), ARGV[1])
+    end
+    return 1
+    """
+
     @staticmethod
-    def get_next_leads(campaign_id, count=1):
+    def reprioritize(campaign_id, lead_id, priority):
         """
-        Pop leads from the hopper
-        Fallback to database if Redis cache is missing
+        Move a queued lead to a new priority (1-99) in O(log n)
+        Returns: True if the lead was in the sorted hopper
         """
+        hopper_key = f"campaign:{campaign_id}:hopper"
+        r = HopperService.get_redis()
+        script = r.register_script(HopperService.REPRIORITIZE_LUA)
+        return bool(script(
+            keys=[f"{hopper_key}:ready", f"{hopper_key}:delayed", f"{hopper_key}:priority"],
+            args=[lead_id, int(priority), HopperService.PRIORITY_WEIGHT]
+        ))
+
+    # Move up to N ids from the hopper list into the dialing set (stamped for
+    # timeout cleanup) and return each id with its cached lead hash, atomically.
+    # Both pop scripts refuse to run for a stale campaign lease (FENCE_CHECK_LUA)
+    POP_LEADS_LUA = FENCE_CHECK_LUA + """
+    local count = tonumber(ARGV[1])
+    local ids = redis.call('LRANGE', KEYS[1], 0, count - 1)
+    if #ids == 0 then
+        return {}
+    end
+    redis.call('LTRIM', KEYS[1], #ids, -1)
+
+    local result = {}
+    for _, id in ipairs(ids) do
+        redis.call('SADD', KEYS[2], id)
+        redis.call('HSET', KEYS[3], id, ARGV[2])
+        result[#result + 1] = id
+        result[#result + 1] = redis.call('HGETALL', 'lead:' .. id .. ':data')
+    end
+    return result
+    """
+
+    # Promote due leads from delayed to ready, then pop the best N ready
+    # leads into the dialing set, returning ids with their cached hashes
+    POP_SORTED_LEADS_LUA = FENCE_CHECK_LUA + """
+    local count = tonumber(ARGV[1])
+    local now_ms = tonumber(ARGV[3])
+    local weight = tonumber(ARGV[4])
+
+    local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now_ms, 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[5]))
+    for i = 1, #due, 2 do
+        local priority = tonumber(redis.call('HGET', KEYS[3], due[i]) or ARGV[6])
+        local score = (100 - priority) * weight + tonumber(due[i + 1])
+        redis.call('ZADD', KEYS[1], string.format('%.0f', score), due[i])
+        redis.call('ZREM', KEYS[2], due[i])
+    end
+
+    local ids = redis.call('ZRANGE', KEYS[1], 0, count - 1)
+    if #ids == 0 then
+        return {}
+    end
+    redis.call('ZREM', KEYS[1], unpack(ids))
+    redis.call('HDEL', KEYS[3], unpack(ids))
+
+    local result = {}
+    for _, id in ipairs(ids) do
+        redis.call('SADD', KEYS[4], id)
+        redis.call('HSET', KEYS[5], id, ARGV[2])
+        result[#result + 1] = id
+        result[#result + 1] = redis.call('HGETALL', 'lead:' .. id .. ':data')
+    end
+    return result
+    """
+
+    @staticmethod
+    def get_next_leads(campaign_id, count=1, fence=None):
+        """
+        Pop leads from the hopper straight into the dialing set
+        One scripted round trip; cache misses are back-filled from the
+        database with a single query
+
+        `fence` is the caller's campaign lease token; the pop raises
+        LeaseLost if another process has taken the campaign since.
+        """
+        from redis.exceptions import ResponseError
         from leads.models import Lead
-        
+
+        if count <= 0:
+            return []
+
         r = HopperService.get_redis()
         hopper_key = f"campaign:{campaign_id}:hopper"
-        
-        leads = []
-        # Pop 'count' items from left/head
-        for _ in range(count):
-            lead_id = r.lpop(hopper_key)
-            if lead_id:
-                lead_id = int(lead_id)
-                
-                # Try to fetch cached data first
-                lead_key = f"lead:{lead_id}:data"
-                data = r.hgetall(lead_key)
-                
-                if data:
-                    # Convert bytes to string
-                    clean_data = {k.decode('utf-8'): v.decode('utf-8') for k, v in data.items()}
-                    leads.append(clean_data)
-                else:
-                    # Cache miss - fetch from database
-                    try:
-                        lead = Lead.objects.get(id=lead_id)
-                        lead_data = {
-                            'id': str(lead.id),
-                            'phone_number': lead.phone_number,
-                            'first_name': lead.first_name or '',
-                            'last_name': lead.last_name or '',
-                            'call_count': str(lead.call_count),
-                        }
-                        
-                        # Cache it for next time
-                        r.hmset(lead_key, lead_data)
-                        r.expire(lead_key, 3600)  # Cache for 1 hour
-                        
-                        leads.append(lead_data)
-                    except Lead.DoesNotExist:
-                        logger.warning(f"Lead {lead_id} not found in database")
-                        continue
+        dialing_keys = [
+            f"campaign:{campaign_id}:dialing",
+            f"campaign:{campaign_id}:dialing_timestamps",
+        ]
+        fence_key = lease_key(f"campaign:{campaign_id}:dialer")
+        fence = str(fence or '')
+        now = time.time()
+
+        try:
+            if HopperService.sorted_hopper_enabled():
+                pop_leads = r.register_script(HopperService.POP_SORTED_LEADS_LUA)
+                raw = pop_leads(
+                    keys=[f"{hopper_key}:ready", f"{hopper_key}:delayed", f"{hopper_key}:priority"]
+                         + dialing_keys + [fence_key],
+                    args=[
+                        count, int(now), int(now * 1000), HopperService.PRIORITY_WEIGHT,
+                        max(count * 10, 100), HopperService.DEFAULT_PRIORITY, fence,
+                    ]
+                )
             else:
-                break
-                
-        return leads
+                pop_leads = r.register_script(HopperService.POP_LEADS_LUA)
+                raw = pop_leads(keys=[hopper_key] + dialing_keys + [fence_key], args=[count, int(now), fence])
+        except ResponseError as e:
+            if 'FENCED' in str(e):
+                raise LeaseLost(f"Campaign {campaign_id} lease token {fence} is no longer current")
+            raise
+
+        popped = []
+        missing = []
+        for lead_id, fields in zip(raw[::2], raw[1::2]):
+            lead_id = int(lead_id)
+            if fields:
+                # Convert bytes to string
+                values = [v.decode('utf-8') for v in fields]
+                popped.append((lead_id, dict(zip(values[::2], values[1::2]))))
+            else:
+                popped.append((lead_id, None))
+                missing.append(lead_id)
+
+        if missing:
+            # Cache miss - fetch from database
+            found = {}
+            pipe = r.pipeline()
+            for lead in Lead.objects.filter(id__in=missing).only(
+                'id', 'phone_number', 'first_name', 'last_name', 'call_count'
+            ):
+                lead_data = {
+                    'id': str(lead.id),
+                    'phone_number': lead.phone_number,
+                    'first_name': lead.first_name or '',
+                    'last_name': lead.last_name or '',
+                    'call_count': str(lead.call_count),
+                }
+                found[lead.id] = lead_data
+
+                # Cache it for next time
+                lead_key = f"lead:{lead.id}:data"
+                pipe.hset(lead_key, mapping=lead_data)
+                pipe.expire(lead_key, 3600)  # Cache for 1 hour
+            pipe.execute()
+
+            gone = [lead_id for lead_id in missing if lead_id not in found]
+            if gone:
+                logger.warning(f"Leads {gone} not found in database")
+                HopperService.release_dialing(campaign_id, gone)
+
+            popped = [(lead_id, data or found.get(lead_id)) for lead_id, data in popped]
+
+        return [data for _, data in popped if data]
 
     @staticmethod
     def get_hopper_count(campaign_id):
-        """Get number of leads in hopper"""
+        """Get number of leads in hopper (ready and delayed)"""
         r = HopperService.get_redis()
-        return r.llen(f"campaign:{campaign_id}:hopper")
+        hopper_key = f"campaign:{campaign_id}:hopper"
+        if HopperService.sorted_hopper_enabled():
+            pipe = r.pipeline()
+            pipe.zcard(f"{hopper_key}:ready")
+            pipe.zcard(f"{hopper_key}:delayed")
+            return sum(pipe.execute())
+        return r.llen(hopper_key)
 
     @staticmethod
     def register_dialing(campaign_id, lead_id):
@@ -327,6 +517,41 @@ class HopperService:
         r = HopperService.get_redis()
         r.srem(f"campaign:{campaign_id}:dialing", lead_id)
         
+    @staticmethod
+    def release_dialing(campaign_id, lead_ids):
+        """Remove leads that will not be dialed from the dialing set"""
+        if not lead_ids:
+            return
+        pipe = HopperService.get_redis().pipeline()
+        pipe.srem(f"campaign:{campaign_id}:dialing", *lead_ids)
+        pipe.hdel(f"campaign:{campaign_id}:dialing_timestamps", *lead_ids)
+        pipe.execute()
+
+    @staticmethod
+    def requeue_leads(campaign_id, leads):
+        """
+        Put popped leads that will not be dialed back in the hopper
+        `leads` are get_next_leads() dicts; their attempt was not counted
+        """
+        from leads.models import Lead
+
+        if not leads:
+            return 0
+        # Queued before leaving the dialing set, so a fill in between
+        # cannot add them a second time
+        added = HopperService.add_leads(campaign_id, [
+            Lead(
+                id=int(lead_data['id']),
+                phone_number=lead_data['phone_number'],
+                first_name=lead_data.get('first_name', ''),
+                last_name=lead_data.get('last_name', ''),
+                call_count=int(lead_data.get('call_count') or 0),
+            )
+            for lead_data in leads
+        ])
+        HopperService.release_dialing(campaign_id, [lead_data['id'] for lead_data in leads])
+        return added
+
     @staticmethod
     def get_active_call_count(campaign_id):
         """Get count of currently dialing leads"""
@@ -340,8 +565,11 @@ class HopperService:
         hopper_key = f"campaign:{campaign_id}:hopper"
         dialing_key = f"campaign:{campaign_id}:dialing"
         
-        # Get all from list
-        hopper_ids = r.lrange(hopper_key, 0, -1)
+        if HopperService.sorted_hopper_enabled():
+            hopper_ids = r.zrange(f"{hopper_key}:ready", 0, -1) + r.zrange(f"{hopper_key}:delayed", 0, -1)
+        else:
+            # Get all from list
+            hopper_ids = r.lrange(hopper_key, 0, -1)
         # Get all from set
         dialing_ids = r.smembers(dialing_key)
         
@@ -354,8 +582,311 @@ class HopperService:
             
         return all_ids
 
+    # Candidates (ARGV[2..]) that are neither queued nor dialing. List mode
+    # scans the hopper list once on the server; sorted mode is one ZSCORE per
+    # candidate. KEYS = hopper list, ready, delayed, dialing; ARGV[1] = mode
+    UNQUEUED_LUA = """
+    local sorted = ARGV[1] == 'zset'
+    local queued = {}
+    if not sorted then
+        for _, id in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+            queued[id] = true
+        end
+    end
+    local missing = {}
+    for i = 2, #ARGV do
+        local id = ARGV[i]
+        if not queued[id] and redis.call('SISMEMBER', KEYS[4], id) == 0
+            and not (sorted and (redis.call('ZSCORE', KEYS[2], id) or redis.call('ZSCORE', KEYS[3], id))) then
+            missing[#missing + 1] = id
+        end
+    end
+    return missing
+    """
+
+    @staticmethod
+    def filter_unqueued(candidates):
+        """
+        Drop leads already in their campaign's hopper or being dialed
+
+        `candidates` is {campaign_id: [lead_id, ...]}; the membership checks
+        run in Redis, one pipelined script call per campaign.
+        Returns: {campaign_id: [lead_id, ...]} of leads not queued anywhere
+        """
+        candidates = {cid: list(ids) for cid, ids in candidates.items() if ids}
+        if not candidates:
+            return {}
+
+        r = HopperService.get_redis()
+        script = r.register_script(HopperService.UNQUEUED_LUA)
+        mode = 'zset' if HopperService.sorted_hopper_enabled() else 'list'
+        pipe = r.pipeline(transaction=False)
+        for campaign_id, lead_ids in candidates.items():
+            hopper_key = f"campaign:{campaign_id}:hopper"
+            script(
+                keys=[hopper_key, f"{hopper_key}:ready", f"{hopper_key}:delayed", f"campaign:{campaign_id}:dialing"],
+                args=[mode] + lead_ids,
+                client=pipe
+            )
+        results = pipe.execute()
+
+        return {
+            campaign_id: [int(lid) for lid in missing]
+            for campaign_id, missing in zip(candidates, results)
+            if missing
+        }
+
     @staticmethod
     def clear_hopper(campaign_id):
         """Clear the Redis hopper"""
         r = HopperService.get_redis()
-        r.delete(f"campaign:{campaign_id}:hopper")
+        hopper_key = f"campaign:{campaign_id}:hopper"
+        r.delete(hopper_key, f"{hopper_key}:ready", f"{hopper_key}:delayed", f"{hopper_key}:priority")
+
+    @staticmethod
+    def dial_leads(campaign_id, count, fence=None):
+        """
+        Pop up to `count` leads from the hopper and originate them as one burst
+        `fence` is the caller's campaign lease token (see campaigns.leases)
+
+        Carrier capacity is reserved before any lead is popped, so a burst
+        larger than the trunks' channel/CPS headroom leaves the rest of the
+        leads in the hopper instead of spending an attempt on them.
+        Returns: number of calls successfully originated
+        """
+        from agents.models import AgentDialerSession
+        from telephony.routing import get_carrier_router
+        from telephony.services import AsteriskService, get_server_pool
+
+        campaign = Campaign.objects.filter(id=campaign_id).first()
+        if not campaign or count <= 0:
+            return 0
+
+        pool = get_server_pool()
+        if not pool.servers():
+            logger.error('No active Asterisk server found')
+            return 0
+
+        router = get_carrier_router()
+        routes = HopperService.reserve_routes(campaign, count, router=router)
+        if not routes:
+            return 0
+
+        try:
+            leads = HopperService.get_next_leads(campaign_id, count=len(routes), fence=fence)
+        except LeaseLost as e:
+            logger.warning(f'Not dialing: {e}')
+            leads = []
+        for channel_id, _ in routes[len(leads):]:
+            router.release_channel(channel_id)
+        routes = routes[:len(leads)]
+
+        # Spread the burst over the least-loaded servers that carry each
+        # call's trunk, preferring those hosting the campaign's live agent
+        # sessions - not only idle ones: agents on a call or still
+        # connecting will take the answers of this burst too
+        agent_server_ids = set(AgentDialerSession.objects.filter(
+            campaign_id=campaign_id,
+            status__in=('connecting', 'ready')
+        ).values_list('asterisk_server_id', flat=True))
+
+        # Servers are picked before the attempt is counted: a lead no
+        # server can take goes back to the hopper untouched
+        servers = {}
+        placed = []
+        unplaced = []
+        for lead_data, (channel_id, carrier) in zip(leads, routes):
+            server = pool.pick(carrier=carrier, among=agent_server_ids)
+            if server is None:
+                router.release_channel(channel_id)
+                unplaced.append(lead_data)
+                continue
+            servers[channel_id] = server
+            placed.append((lead_data, (channel_id, carrier)))
+        HopperService.requeue_leads(campaign_id, unplaced)
+
+        leads, calls, routes = HopperService.prepare_originates(
+            campaign, [lead_data for lead_data, _ in placed], routes=[route for _, route in placed]
+        )
+        if not calls:
+            return 0
+
+        batches = {}
+        for lead_data, call in zip(leads, calls):
+            server = servers[call['channel_id']]
+            batch = batches.setdefault(server.id, (server, [], []))
+            batch[1].append(lead_data)
+            batch[2].append(call)
+
+        initiated = 0
+        for server, server_leads, server_calls in batches.values():
+            results = AsteriskService(server).originate_batch(server_calls)
+            for call, result in zip(server_calls, results):
+                if not result.get('success'):
+                    router.release_channel(call['channel_id'])
+            initiated += HopperService.record_originates(campaign, server_leads, results, server=server)
+        return initiated
+
+    @staticmethod
+    def reserve_routes(campaign, count, router=None):
+        """
+        Reserve carrier capacity for up to `count` calls
+        Stops at the first call no carrier can take right now
+
+        Returns: [(channel_id, carrier)] - originate each call with its
+        channel_id; carrier is None when the campaign has no carriers
+        """
+        import uuid
+        from telephony.routing import get_carrier_router
+
+        router = router or get_carrier_router()
+        routes = []
+        for _ in range(count):
+            channel_id = str(uuid.uuid4())
+            route = router.acquire(campaign, channel_id=channel_id)
+            if not route['success']:
+                logger.debug(
+                    f"Carrier capacity for {len(routes)}/{count} calls on campaign {campaign.id}"
+                )
+                break
+            routes.append((channel_id, route['carrier']))
+        return routes
+
+    @staticmethod
+    def originate_lead(campaign, lead_data, server):
+        """
+        Originate one autodial call for a lead popped from the hopper
+        Returns: True if Asterisk accepted the originate
+        """
+        from telephony.services import AsteriskService
+
+        leads, calls, _ = HopperService.prepare_originates(campaign, [lead_data])
+        if not calls:
+            return False
+
+        try:
+            result = AsteriskService(server).originate_local_channel(**calls[0])
+        except Exception as e:
+            logger.error(f'Exception originating call: {e}', exc_info=True)
+            result = {'success': False, 'error': str(e)}
+
+        return HopperService.record_originates(campaign, leads, [result], server=server) == 1
+
+    @staticmethod
+    def prepare_originates(campaign, leads, routes=None):
+        """
+        Count the attempt for leads about to be originated
+        Leads are already in the dialing set (get_next_leads moved them)
+
+        `routes` ([(channel_id, carrier)], one per lead, from
+        reserve_routes()) sets each call's ARI channel id and carrier
+        prefix; the routes of leads that no longer exist are released.
+
+        Returns: (leads, calls, routes) for the leads that still exist, where
+        calls holds the originate_local_channel() kwargs for each lead
+        """
+        from django.db.models import F
+        from leads.models import Lead
+        from telephony.routing import build_dial_number, get_carrier_router
+
+        routes = routes or [(None, None)] * len(leads)
+        lead_ids = [int(lead_data['id']) for lead_data in leads]
+        existing = set(Lead.objects.filter(id__in=lead_ids).values_list('id', flat=True))
+        gone = set(lead_ids) - existing
+        for lead_id in gone:
+            logger.error(f'Lead {lead_id} does not exist')
+        HopperService.release_dialing(campaign.id, list(gone))
+
+        kept = []
+        for lead_data, route in zip(leads, routes):
+            if int(lead_data['id']) in existing:
+                kept.append((lead_data, route))
+            elif route[0]:
+                get_carrier_router().release_channel(route[0])
+        if not kept:
+            return [], [], []
+        leads = [lead_data for lead_data, _ in kept]
+        routes = [route for _, route in kept]
+
+        # Increment call count to prevent infinite loop
+        Lead.objects.filter(id__in=existing).update(call_count=F('call_count') + 1)
+
+        calls = []
+        for lead_data, (channel_id, carrier) in zip(leads, routes):
+            phone_number = lead_data['phone_number']
+
+            # Carrier prefix, then campaign dial_prefix, if configured
+            dial_number = build_dial_number(phone_number, campaign=campaign, carrier=carrier)
+
+            variables = {
+                'CALL_TYPE': 'autodial',
+                'CAMPAIGN_ID': str(campaign.id),
+                'LEAD_ID': str(lead_data['id']),
+                'CUSTOMER_NUMBER': phone_number,
+            }
+            if carrier:
+                variables['CARRIER_ID'] = str(carrier.id)
+
+            # Pass hopper id if we have it (for legacy DB tracking)
+            hopper_id = lead_data.get('hopper_id')
+            if hopper_id:
+                variables['HOPPER_ID'] = str(hopper_id)
+
+            if campaign.amd_enabled:
+                variables.update(HopperService.AMD_VARIABLES)
+
+            # Local channel through dialplan (_X. in from-campaign hits AMD/Stasis)
+            call = {
+                'number': dial_number,
+                'context': 'from-campaign',
+                'callerid': f"Campaign {campaign.name}",
+                'variables': variables,
+            }
+            if channel_id:
+                call['channel_id'] = channel_id
+            calls.append(call)
+
+        return leads, calls, routes
+
+    @staticmethod
+    def record_originates(campaign, leads, results, server=None):
+        """
+        Log accepted originates and release the leads Asterisk rejected
+        Returns: number of calls successfully originated
+        """
+        from calls.models import CallLog
+        from reports.signals import broadcast_call_log
+
+        call_logs = []
+        failed = []
+        for lead_data, result in zip(leads, results):
+            if not result.get('success'):
+                logger.error(f'Failed to originate call to {lead_data["phone_number"]}: {result.get("error")}')
+                failed.append(lead_data['id'])
+                continue
+
+            call_logs.append(CallLog(
+                channel=result.get('channel_id'),
+                call_type='outbound',
+                call_status='initiated',
+                called_number=lead_data['phone_number'],
+                campaign=campaign,
+                lead_id=int(lead_data['id']),
+                asterisk_server=server,
+                start_time=timezone.now()
+            ))
+
+        HopperService.release_dialing(campaign.id, failed)
+
+        if call_logs:
+            CallLog.objects.bulk_create(call_logs)
+            logger.info(f'Originated {len(call_logs)} calls for campaign {campaign.name}')
+
+            # bulk_create sends no post_save: broadcast what call_log_changed would have
+            try:
+                for call_log in call_logs:
+                    broadcast_call_log(call_log)
+            except Exception as e:
+                logger.error(f"Error broadcasting originated calls: {e}")
+
+        return len(call_logs)
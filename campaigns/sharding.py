@@ -0,0 +1,148 @@
+# campaigns/sharding.py
+"""
+Campaign sharding across dialer workers
+
+Dialer processes register in a Redis pool with a heartbeat. Every worker
+builds the same consistent-hash ring from the live members and runs only
+the campaigns that hash to itself, so adding a worker moves roughly 1/N of
+the campaigns and a dead worker's campaigns spread over the survivors once
+its heartbeat expires. During a handover the campaign lease
+(campaigns.leases) keeps the old and new owner from dialing at once.
+
+Data Structures:
+- dialer:pool:{pool}:workers (ZSET) - worker id -> heartbeat expiry (epoch)
+"""
+
+import bisect
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes
+
+    Usage:
+        ring = HashRing(['host-a:101', 'host-b:202'])
+        owner = ring.node_for(f"campaign:{campaign_id}")
+    """
+
+    REPLICAS = 128  # virtual nodes per worker; evens out small pools
+
+    def __init__(self, nodes=(), replicas=None):
+        self.replicas = replicas or self.REPLICAS
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(self.replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node_for(self, key):
+        """Worker owning `key`, or None on an empty ring"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._owners[index]
+
+    def assign(self, keys):
+        """{key: worker} for many keys"""
+        return {key: self.node_for(key) for key in keys}
+
+
+def campaign_shard_key(campaign_id):
+    return f"campaign:{campaign_id}"
+
+
+class WorkerRegistry:
+    """
+    Live membership of a dialer worker pool
+
+    Usage:
+        registry = WorkerRegistry('dialer_engine')
+        registry.heartbeat(worker_id, ttl=30)
+        ring = registry.ring()
+    """
+
+    def __init__(self, pool, redis=None):
+        self.pool = pool
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @property
+    def key(self):
+        return f"dialer:pool:{self.pool}:workers"
+
+    def heartbeat(self, worker_id, ttl):
+        """Join the pool or stay in it for another `ttl` seconds"""
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(self.key, '-inf', now)
+        pipe.zadd(self.key, {worker_id: now + ttl})
+        pipe.execute()
+
+    def leave(self, worker_id):
+        """Drop out at once so the others rebalance on their next reload"""
+        try:
+            self.redis.zrem(self.key, worker_id)
+        except Exception as e:
+            logger.error(f"Could not leave dialer pool {self.pool}: {e}")
+
+    def live_workers(self):
+        return sorted(member.decode() for member in self.redis.zrangebyscore(self.key, time.time(), '+inf'))
+
+    def ring(self):
+        return HashRing(self.live_workers())
+
+
+class CampaignShard:
+    """
+    The campaigns one worker owns in its pool
+
+    Call refresh() from the worker's reload loop; it heartbeats and rebuilds
+    the ring, logging any change in membership.
+    """
+
+    def __init__(self, pool, worker_id, ttl, redis=None):
+        self.registry = WorkerRegistry(pool, redis=redis)
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.ring = HashRing([worker_id])
+
+    def refresh(self):
+        try:
+            self.registry.heartbeat(self.worker_id, self.ttl)
+            ring = self.registry.ring()
+        except Exception as e:
+            # Redis down: keep the last known ring rather than dropping campaigns
+            logger.error(f"Dialer pool {self.registry.pool} refresh failed: {e}")
+            return self.ring
+        if ring.nodes != self.ring.nodes:
+            logger.info(f"Dialer pool {self.registry.pool}: {len(ring)} workers {ring.nodes}")
+        self.ring = ring
+        return ring
+
+    def owns(self, campaign_id):
+        owner = self.ring.node_for(campaign_shard_key(campaign_id))
+        return owner is None or owner == self.worker_id
+
+    def leave(self):
+        self.registry.leave(self.worker_id)
@@ -0,0 +1,9 @@
+"""
+Offline predictive dialer simulation
+
+Drives the real pacing classes with synthetic agents and traffic.
+Run with: python manage.py simulate_dialer --settings=autodialer.settings_sim
+"""
+
+from .engine import PACING_MODES, DialerSimulator, Scenario, SimulationResult
+from .benchmark import compare_modes, ensure_schema, format_table, run_mode
@@ -0,0 +1,437 @@
+# campaigns/simulation/engine.py
+"""
+Discrete-event call center simulation for the predictive dialer
+
+Synthetic agents and customers are driven by the real pacing classes:
+PredictiveDialer (heuristic / Erlang models) reads its metrics from the
+simulation instead of the database, and the 'dial_level' mode runs
+DropRateMonitor.check_and_adjust_dial_level against CallLog rows the
+simulation writes to the configured database.
+"""
+
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from campaigns.predictive_dialer import DialerConfig, DialerMetrics, PredictiveDialer
+
+PACING_MODES = ('power', 'heuristic', 'erlang_c', 'erlang_a', 'dial_level')
+
+# Bucketed rolling windows, same shape as campaigns.dialer_counters
+BUCKET_SECONDS = 60
+RATE_WINDOW_BUCKETS = 60
+AVERAGE_WINDOW_BUCKETS = 15
+
+
+@dataclass
+class Scenario:
+    """Synthetic traffic and staffing for one simulation run"""
+    agents: int = 20
+    duration: float = 3600.0            # simulated seconds
+    warmup: float = 600.0               # excluded from the reported results
+    tick: float = 1.0                   # seconds between pacing decisions
+    answer_rate: float = 0.30           # P(dial is answered), human or machine
+    amd_rate: float = 0.15              # P(answer is a machine)
+    ring_mean: float = 12.0             # seconds to answer
+    ring_timeout: float = 30.0          # seconds before a no-answer is released
+    amd_detect_time: float = 3.0        # seconds AMD needs before hanging up
+    talk_mean: float = 180.0
+    talk_sd: float = 120.0
+    wrapup_mean: float = 30.0
+    patience: float = 2.0               # seconds a connected customer waits for an agent
+    target_abandon_rate: float = 3.0
+    max_dial_ratio: float = 3.0
+    amd_enabled: bool = True
+    seed: int = 42
+
+
+@dataclass
+class SimulationResult:
+    """Outcome of one simulation run, measured after warm-up"""
+    mode: str
+    dials: int = 0
+    human_answers: int = 0
+    connected: int = 0
+    abandoned: int = 0
+    machines: int = 0
+    agent_seconds: float = 0.0
+    talk_seconds: float = 0.0
+    wrapup_seconds: float = 0.0
+    idle_seconds: float = 0.0
+    decisions: int = 0
+    decision_cpu: List[float] = field(default_factory=list)
+
+    @property
+    def abandon_rate(self) -> float:
+        return self.abandoned / self.human_answers * 100 if self.human_answers else 0.0
+
+    @property
+    def utilization(self) -> float:
+        return self.talk_seconds / self.agent_seconds * 100 if self.agent_seconds else 0.0
+
+    @property
+    def occupancy(self) -> float:
+        busy = self.talk_seconds + self.wrapup_seconds
+        return busy / self.agent_seconds * 100 if self.agent_seconds else 0.0
+
+    @property
+    def idle_per_agent_hour(self) -> float:
+        """Idle seconds per staffed agent-hour"""
+        return self.idle_seconds / self.agent_seconds * 3600 if self.agent_seconds else 0.0
+
+    def cpu_percentile(self, pct: float) -> float:
+        """Per-decision CPU cost in microseconds"""
+        if not self.decision_cpu:
+            return 0.0
+        ordered = sorted(self.decision_cpu)
+        index = min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)
+        return ordered[max(index, 0)] * 1e6
+
+    def as_dict(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'dials': self.dials,
+            'human_answers': self.human_answers,
+            'connected': self.connected,
+            'abandoned': self.abandoned,
+            'machines': self.machines,
+            'abandon_rate': round(self.abandon_rate, 2),
+            'utilization': round(self.utilization, 1),
+            'occupancy': round(self.occupancy, 1),
+            'idle_per_agent_hour': round(self.idle_per_agent_hour, 1),
+            'decisions': self.decisions,
+            'cpu_mean_us': round(sum(self.decision_cpu) / len(self.decision_cpu) * 1e6, 1) if self.decision_cpu else 0.0,
+            'cpu_p95_us': round(self.cpu_percentile(95), 1),
+        }
+
+
+class _Buckets:
+    """Minute buckets of call outcomes for rolling pacing windows"""
+
+    FIELDS = ('attempts', 'answered', 'abandoned', 'machine', 'talk_sum', 'talk_n', 'ring_sum', 'ring_n')
+
+    def __init__(self):
+        self._buckets: Dict[int, Dict[str, float]] = {}
+
+    def add(self, now: float, **values):
+        bucket = self._buckets.setdefault(int(now // BUCKET_SECONDS), dict.fromkeys(self.FIELDS, 0.0))
+        for name, value in values.items():
+            bucket[name] += value
+
+    def window(self, now: float, buckets: int) -> Dict[str, float]:
+        current = int(now // BUCKET_SECONDS)
+        totals = dict.fromkeys(self.FIELDS, 0.0)
+        for index in range(current - buckets + 1, current + 1):
+            bucket = self._buckets.get(index)
+            if bucket:
+                for name, value in bucket.items():
+                    totals[name] += value
+        # Forget buckets no window can reach any more
+        for index in [i for i in self._buckets if i <= current - RATE_WINDOW_BUCKETS]:
+            del self._buckets[index]
+        return totals
+
+
+class SimulatedMetrics:
+    """
+    Stands in for MetricsSnapshot: PredictiveDialer reads the simulation's
+    current state through the same get() interface.
+    """
+
+    def __init__(self):
+        self.metrics: Optional[DialerMetrics] = None
+
+    def get(self, campaign_id: int, force_refresh: bool = False) -> DialerMetrics:
+        return self.metrics
+
+
+class DialerSimulator:
+    """
+    Run one scenario under one pacing mode
+
+    Usage:
+        result = DialerSimulator(Scenario(agents=30), 'erlang_a').run()
+    """
+
+    def __init__(self, scenario: Scenario, mode: str, campaign=None):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode: {mode}")
+        if mode == 'dial_level' and campaign is None:
+            raise ValueError("dial_level mode needs a database Campaign")
+
+        self.scenario = scenario
+        self.mode = mode
+        self.campaign = campaign
+        self.rng = random.Random(scenario.seed)
+        self.result = SimulationResult(mode=mode)
+
+        self.now = 0.0
+        self._events = []
+        self._seq = itertools.count()
+        self._call_ids = itertools.count(1)
+
+        self.idle_agents = deque(range(scenario.agents))
+        self.agent_state = {agent: 'available' for agent in range(scenario.agents)}
+        self.waiting = deque()          # answered call ids waiting for an agent
+        self.calls: Dict[int, Dict] = {}
+        self.buckets = _Buckets()
+
+        self.metrics_source = SimulatedMetrics()
+        self.dialer = None
+        if mode != 'dial_level':
+            self.dialer = PredictiveDialer(
+                campaign_id=0,
+                config=DialerConfig(
+                    target_abandon_rate=scenario.target_abandon_rate,
+                    max_dial_ratio=scenario.max_dial_ratio,
+                    amd_enabled=scenario.amd_enabled,
+                    predictive_enabled=mode != 'power',
+                    pacing_model=mode if mode in ('erlang_c', 'erlang_a') else 'heuristic',
+                    patience=scenario.patience,
+                    no_answer_timeout=scenario.ring_timeout,
+                    amd_timeout_ms=int(scenario.amd_detect_time * 1000),
+                ),
+                snapshot=self.metrics_source,
+            )
+
+        self._call_logs = []
+        self._anchor = None
+        self._next_monitor = 0.0
+
+    # ========================================================================
+    # Event loop
+    # ========================================================================
+
+    def run(self) -> SimulationResult:
+        if self.mode == 'dial_level':
+            from django.utils import timezone
+            self._anchor = timezone.now() - timedelta(seconds=self.scenario.duration)
+
+        self._schedule(0.0, self._on_tick)
+        while self._events:
+            at, _, handler, args = heapq.heappop(self._events)
+            if at > self.scenario.duration:
+                break
+            self._advance(at)
+            handler(*args)
+
+        self._advance(self.scenario.duration)
+        return self.result
+
+    def _schedule(self, at: float, handler, *args):
+        heapq.heappush(self._events, (at, next(self._seq), handler, args))
+
+    def _advance(self, at: float):
+        """Accrue agent time in each state up to `at`"""
+        start = max(self.now, self.scenario.warmup)
+        if at > start:
+            span = at - start
+            counts = {'available': 0, 'busy': 0, 'wrapup': 0}
+            for state in self.agent_state.values():
+                counts[state] += 1
+            self.result.agent_seconds += span * len(self.agent_state)
+            self.result.idle_seconds += span * counts['available']
+            self.result.talk_seconds += span * counts['busy']
+            self.result.wrapup_seconds += span * counts['wrapup']
+        self.now = at
+
+    @property
+    def measuring(self) -> bool:
+        return self.now >= self.scenario.warmup
+
+    # ========================================================================
+    # Pacing decisions
+    # ========================================================================
+
+    def _on_tick(self):
+        self._refresh_metrics()
+
+        started = time.process_time()
+        count = self._decide()
+        elapsed = time.process_time() - started
+
+        if self.measuring:
+            self.result.decisions += 1
+            self.result.decision_cpu.append(elapsed)
+
+        for _ in range(count):
+            self._dial()
+
+        self._schedule(self.now + self.scenario.tick, self._on_tick)
+
+    def _decide(self) -> int:
+        if self.dialer is not None:
+            return self.dialer.get_calls_to_dial()
+
+        # dial_level mode: same pacing as the predictive_dialer command,
+        # with DropRateMonitor adjusting dial_level once a simulated minute
+        from campaigns.services import DropRateMonitor
+
+        if self.now >= self._next_monitor:
+            self._next_monitor = self.now + BUCKET_SECONDS
+            self._flush_call_logs()
+            DropRateMonitor.check_and_adjust_dial_level(self.campaign, now=self._wallclock(self.now))
+
+        available = len(self.idle_agents)
+        if available == 0:
+            return 0
+        target = int(available * max(float(self.campaign.dial_level), 1.0))
+        return max(0, target - self._open_calls())
+
+    def _refresh_metrics(self):
+        hour = self.buckets.window(self.now, RATE_WINDOW_BUCKETS)
+        recent = self.buckets.window(self.now, AVERAGE_WINDOW_BUCKETS)
+        attempts = hour['attempts']
+
+        counts = {'available': 0, 'busy': 0, 'wrapup': 0}
+        for state in self.agent_state.values():
+            counts[state] += 1
+
+        self.metrics_source.metrics = DialerMetrics(
+            agents_available=counts['available'],
+            agents_busy=counts['busy'],
+            agents_wrapup=counts['wrapup'],
+            agents_total=len(self.agent_state),
+            calls_in_progress=self._open_calls(),
+            calls_in_queue=0,
+            calls_dialing=sum(1 for call in self.calls.values() if call['answer'] is None),
+            avg_talk_time=recent['talk_sum'] / recent['talk_n'] if recent['talk_n'] else 180.0,
+            avg_wrapup_time=self.scenario.wrapup_mean,
+            avg_ring_time=recent['ring_sum'] / recent['ring_n'] if recent['ring_n'] else 15.0,
+            answer_rate=hour['answered'] / attempts * 100 if attempts else 30.0,
+            abandon_rate=hour['abandoned'] / attempts * 100 if attempts else 0.0,
+            amd_rate=hour['machine'] / attempts * 100 if attempts else 15.0,
+        )
+
+    def _open_calls(self) -> int:
+        return len(self.calls)
+
+    # ========================================================================
+    # Call lifecycle
+    # ========================================================================
+
+    def _dial(self):
+        s = self.scenario
+        call_id = next(self._call_ids)
+        call = {'start': self.now, 'answer': None, 'end': None, 'agent': None, 'ring': None, 'abandoned': False}
+        self.calls[call_id] = call
+        if self.measuring:
+            self.result.dials += 1
+
+        if self.rng.random() < s.answer_rate:
+            ring = min(self.rng.expovariate(1 / s.ring_mean), s.ring_timeout)
+            machine = self.rng.random() < s.amd_rate
+            self._schedule(self.now + ring, self._on_answer, call_id, machine)
+        else:
+            self._schedule(self.now + s.ring_timeout, self._on_end, call_id)
+
+    def _on_answer(self, call_id: int, machine: bool):
+        call = self.calls[call_id]
+        call['answer'] = self.now
+        call['ring'] = self.now - call['start']
+        self.buckets.add(self.now, answered=1, ring_sum=call['ring'], ring_n=1)
+
+        if machine and self.scenario.amd_enabled:
+            self.buckets.add(self.now, machine=1)
+            if self.measuring:
+                self.result.machines += 1
+            self._schedule(self.now + self.scenario.amd_detect_time, self._on_end, call_id)
+            return
+
+        if self.measuring:
+            self.result.human_answers += 1
+
+        if self.idle_agents:
+            self._connect(call_id, self.idle_agents.popleft())
+        else:
+            self.waiting.append(call_id)
+            self._schedule(self.now + self.scenario.patience, self._on_patience, call_id)
+
+    def _on_patience(self, call_id: int):
+        call = self.calls.get(call_id)
+        if call is None or call['agent'] is not None:
+            return
+        self.waiting.remove(call_id)
+        call['abandoned'] = True
+        if self.measuring:
+            self.result.abandoned += 1
+        self._on_end(call_id)
+
+    def _connect(self, call_id: int, agent: int):
+        call = self.calls[call_id]
+        call['agent'] = agent
+        self._set_agent(agent, 'busy')
+        if self.measuring:
+            self.result.connected += 1
+        self._schedule(self.now + self._talk_time(), self._on_talk_end, call_id)
+
+    def _on_talk_end(self, call_id: int):
+        agent = self.calls[call_id]['agent']
+        self._on_end(call_id)
+        self._set_agent(agent, 'wrapup')
+        self._schedule(self.now + self.rng.expovariate(1 / self.scenario.wrapup_mean), self._on_wrapup_end, agent)
+
+    def _on_wrapup_end(self, agent: int):
+        if self.waiting:
+            self._connect(self.waiting.popleft(), agent)
+        else:
+            self._set_agent(agent, 'available')
+            self.idle_agents.append(agent)
+
+    def _on_end(self, call_id: int):
+        call = self.calls.pop(call_id)
+        call['end'] = self.now
+
+        talk = self.now - call['answer'] if call['agent'] is not None else 0.0
+        self.buckets.add(
+            self.now, attempts=1, abandoned=1 if call['abandoned'] else 0,
+            talk_sum=talk, talk_n=1 if talk > 0 else 0,
+        )
+
+        if self.campaign is not None:
+            self._record_call_log(call, talk)
+
+    def _set_agent(self, agent: int, state: str):
+        self.agent_state[agent] = state
+
+    def _talk_time(self) -> float:
+        """Lognormal talk time with the scenario's mean and standard deviation"""
+        mean, sd = self.scenario.talk_mean, self.scenario.talk_sd
+        sigma2 = math.log(1 + (sd / mean) ** 2)
+        return self.rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+    # ========================================================================
+    # Database side (dial_level mode)
+    # ========================================================================
+
+    def _wallclock(self, at: float):
+        return self._anchor + timedelta(seconds=at)
+
+    def _record_call_log(self, call: Dict, talk: float):
+        from calls.models import CallLog
+
+        self._call_logs.append(CallLog(
+            call_type='outbound',
+            call_status='answered' if call['answer'] is not None else 'no_answer',
+            called_number='0000000000',
+            campaign=self.campaign,
+            agent=self.campaign.created_by if call['agent'] is not None else None,
+            start_time=self._wallclock(call['start']),
+            answer_time=self._wallclock(call['answer']) if call['answer'] is not None else None,
+            end_time=self._wallclock(call['end']),
+            talk_duration=int(talk),
+            ring_duration=int(call['ring']) if call['ring'] is not None else None,
+        ))
+
+    def _flush_call_logs(self):
+        from calls.models import CallLog
+
+        if self._call_logs:
+            CallLog.objects.bulk_create(self._call_logs, batch_size=1000)
+            self._call_logs = []
@@ -11,11 +11,14 @@ This module includes all Celery tasks for:
 """
 
 import logging
+from collections import defaultdict
 from datetime import timedelta
 
 from celery import shared_task
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F
+from django.db.models.functions import Coalesce, NullIf
+from campaigns.leases import campaign_lease, single_flight
 from campaigns.predictive_dialer import DialerManager
 
 logger = logging.getLogger(__name__)
@@ -54,18 +57,27 @@ def check_auto_wrapup_timeouts():
 @shared_task
 def predictive_dial():
     """
-    PHASE 4.1: Runs every second to dial calls based on predictive algorithm
+    PHASE 4.1: Dial calls for all predictive campaigns once
+
+    No longer on the beat schedule; `manage.py dialer_engine` runs the
+    pacing loops continuously. Kept for one-off/manual dispatch.
     """
     from campaigns.models import Campaign
     
     total_dialed = 0
     
     for campaign in Campaign.objects.filter(status='active', dial_mode='predictive'):
+        # Skip campaigns a dialer engine (or another run of this task) owns
+        lease = campaign_lease(campaign.id)
+        if not lease.acquire():
+            continue
         try:
-            dialed = DialerManager.dial_for_campaign(campaign.id)
+            dialed = DialerManager.dial_for_campaign(campaign.id, fence=lease.token)
             total_dialed += dialed
         except Exception as e:
             logger.error(f"Error dialing for campaign {campaign.id}: {e}")
+        finally:
+            lease.release()
     
     return {'dialed': total_dialed}
 
@@ -82,6 +94,9 @@ def recycle_failed_calls():
     Finds calls that failed (no answer, busy, dropped) and
     re-adds eligible leads to the hopper for retry.
     
+    All active campaigns are handled in one pass: a single grouped CallLog
+    query, hopper membership checked in Redis, one pipelined re-queue.
+    
     Schedule: Every 5 minutes
     """
     from campaigns.models import Campaign
@@ -89,50 +104,61 @@ def recycle_failed_calls():
     from calls.models import CallLog
     from leads.models import Lead
     
-    stats = {
-        'total_recycled': 0,
-        'by_campaign': {},
-        'by_status': {}
-    }
-    
-    try:
-        now = timezone.now()
-        cutoff = now - timedelta(hours=4)
-        
-        recycle_statuses = ['failed', 'no_answer', 'busy', 'dropped', 'congestion']
-        
-        for campaign in Campaign.objects.filter(status='active'):
-            max_attempts = campaign.max_attempts or 3
-            
-            failed_calls = CallLog.objects.filter(
-                campaign=campaign,
+    with single_flight('recycle_failed_calls', ttl=300) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
+
+        stats = {
+            'total_recycled': 0,
+            'by_campaign': {},
+            'by_status': {}
+        }
+
+        try:
+            now = timezone.now()
+            cutoff = now - timedelta(hours=4)
+
+            recycle_statuses = ['failed', 'no_answer', 'busy', 'dropped', 'congestion']
+
+            # One grouped scan for every active campaign; max_attempts of 0 means 3
+            failed = CallLog.objects.filter(
+                campaign__status='active',
                 call_status__in=recycle_statuses,
                 start_time__gte=cutoff,
                 lead__isnull=False,
-                lead__call_count__lt=max_attempts
-            ).values_list('lead_id', flat=True).distinct()
-            
-            if not failed_calls:
-                continue
-            
-            existing_in_hopper = HopperService.get_queued_lead_ids(campaign.id)
-            
-            leads_to_add = Lead.objects.filter(
-                id__in=failed_calls,
-                status__in=['no_answer', 'busy', 'callback']
-            ).exclude(id__in=existing_in_hopper)
-            
-            if leads_to_add.exists():
-                count = HopperService.add_leads(campaign.id, leads_to_add)
+                lead__status__in=['no_answer', 'busy', 'callback'],
+                lead__call_count__lt=Coalesce(NullIf(F('campaign__max_attempts'), 0), 3)
+            ).values_list('campaign_id', 'lead_id').distinct()
+
+            candidates = defaultdict(set)
+            for campaign_id, lead_id in failed:
+                candidates[campaign_id].add(lead_id)
+
+            # Set difference against hopper + dialing happens in Redis
+            to_add = HopperService.filter_unqueued(candidates)
+            if not to_add:
+                return stats
+
+            leads = Lead.objects.in_bulk(
+                {lead_id for lead_ids in to_add.values() for lead_id in lead_ids}
+            )
+            names = dict(Campaign.objects.filter(id__in=to_add).values_list('id', 'name'))
+
+            pipe = HopperService.get_redis().pipeline(transaction=False)
+            for campaign_id, lead_ids in to_add.items():
+                count = HopperService.add_leads(
+                    campaign_id, [leads[lid] for lid in lead_ids if lid in leads], pipe=pipe
+                )
                 stats['total_recycled'] += count
-                stats['by_campaign'][campaign.name] = count
-                logger.info(f"Recycled {count} failed calls for campaign {campaign.name}")
-        
-        return stats
-        
-    except Exception as e:
-        logger.error(f"Error in recycle_failed_calls: {e}", exc_info=True)
-        return {'error': str(e)}
+                stats['by_campaign'][names.get(campaign_id, campaign_id)] = count
+                logger.info(f"Recycled {count} failed calls for campaign {names.get(campaign_id, campaign_id)}")
+            pipe.execute()
+
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error in recycle_failed_calls: {e}", exc_info=True)
+            return {'error': str(e)}
 
 
 @shared_task
@@ -431,21 +457,25 @@ def fill_hopper():
     from campaigns.models import Campaign
     from campaigns.services import HopperService
     
-    try:
-        for campaign in Campaign.objects.filter(status='active'):
-            current_count = HopperService.get_hopper_count(campaign.id)
-            target = campaign.hopper_level or 100
-            
-            if current_count < target * 0.5:
-                filled = HopperService.fill_hopper(campaign.id, target - current_count)
-                if filled > 0:
-                    logger.info(f"Filled hopper for {campaign.name}: +{filled} leads")
-        
-        return {'success': True}
-        
-    except Exception as e:
-        logger.error(f"Error in fill_hopper: {e}")
-        return {'error': str(e)}
+    with single_flight('hopper_fill', ttl=120) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
+
+        try:
+            for campaign in Campaign.objects.filter(status='active'):
+                current_count = HopperService.get_hopper_count(campaign.id)
+                target = campaign.hopper_level or 100
+
+                if current_count < target * 0.5:
+                    filled = HopperService.fill_hopper(campaign.id, target - current_count)
+                    if filled > 0:
+                        logger.info(f"Filled hopper for {campaign.name}: +{filled} leads")
+
+            return {'success': True}
+
+        except Exception as e:
+            logger.error(f"Error in fill_hopper: {e}")
+            return {'error': str(e)}
 
 
 @shared_task
@@ -483,115 +513,60 @@ def cleanup_stale_hopper_entries():
 # ============================================================================
 
 @shared_task
-def update_campaign_stats():
+def update_campaign_stats(incremental=False):
     """
     Update campaign statistics
     
-    Schedule: Every 5 minutes
+    One grouped aggregate and one bulk upsert for all active campaigns.
+    With incremental=True only the campaign-days whose CallLogs changed
+    since the last run are recomputed (cheap enough to run every few seconds).
+    
+    Schedule: Every 5 minutes (or incremental every few seconds)
     """
-    from campaigns.models import Campaign, CampaignStats
-    from calls.models import CallLog
-    from django.db.models import Avg, Sum
+    from campaigns.rollups import rollup_campaign_stats, rollup_campaign_stats_incremental
     
-    try:
-        today = timezone.now().date()
+    with single_flight('update_campaign_stats', ttl=120) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
         
-        for campaign in Campaign.objects.filter(status='active'):
-            calls = CallLog.objects.filter(
-                campaign=campaign,
-                start_time__date=today
-            )
-            
-            total_calls = calls.count()
-            answered_calls = calls.filter(
-                Q(call_status='answered') | Q(answer_time__isnull=False)
-            ).count()
-            dropped_calls = calls.filter(call_status='dropped').count()
-            
-            # Get dispositions marked as sale
-            sales = calls.filter(disposition__is_sale=True).count()
-            
-            # Calculate average duration
-            avg_duration = calls.filter(
-                talk_duration__gt=0
-            ).aggregate(avg=Avg('talk_duration'))['avg'] or 0
-            
-            # Calculate rates
-            contact_rate = (answered_calls / total_calls * 100) if total_calls > 0 else 0
-            conversion_rate = (sales / answered_calls * 100) if answered_calls > 0 else 0
+        try:
+            if incremental:
+                rows = rollup_campaign_stats_incremental()
+            else:
+                rows = rollup_campaign_stats()
+            return {'success': True, 'rows': rows}
             
-            CampaignStats.objects.update_or_create(
-                campaign=campaign,
-                date=today,
-                defaults={
-                    'calls_made': total_calls,
-                    'calls_answered': answered_calls,
-                    'calls_dropped': dropped_calls,
-                    'sales': sales,
-                    'contact_rate': round(contact_rate, 2),
-                    'conversion_rate': round(conversion_rate, 2),
-                    'average_call_duration': int(avg_duration)
-                }
-            )
-        
-        return {'success': True}
-        
-    except Exception as e:
-        logger.error(f"Error in update_campaign_stats: {e}")
-        return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error in update_campaign_stats: {e}")
+            return {'error': str(e)}
 
 
 @shared_task
-def update_agent_daily_stats():
+def update_agent_daily_stats(incremental=False):
     """
     Update agent daily statistics
     
-    Schedule: Every 10 minutes
+    One grouped aggregate and one bulk upsert for every agent with calls
+    today; incremental=True recomputes only agents with changed CallLogs.
+    
+    Schedule: Every 10 minutes (or incremental every few seconds)
     """
-    from django.contrib.auth.models import User
-    from users.models import AgentDailyStats
-    from calls.models import CallLog
-    from django.db.models import Sum, Avg
+    from campaigns.rollups import rollup_agent_daily_stats, rollup_agent_daily_stats_incremental
     
-    try:
-        today = timezone.now().date()
-        
-        # Get all agents who made calls today
-        agents_with_calls = CallLog.objects.filter(
-            start_time__date=today,
-            agent__isnull=False
-        ).values_list('agent_id', flat=True).distinct()
+    with single_flight('update_agent_daily_stats', ttl=120) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
         
-        for agent_id in agents_with_calls:
-            calls = CallLog.objects.filter(
-                agent_id=agent_id,
-                start_time__date=today
-            )
-            
-            total_calls = calls.count()
-            answered_calls = calls.filter(answer_time__isnull=False).count()
-            total_talk_time = calls.aggregate(
-                total=Sum('talk_duration')
-            )['total'] or 0
-            
-            sales = calls.filter(disposition__is_sale=True).count()
+        try:
+            if incremental:
+                rows = rollup_agent_daily_stats_incremental()
+            else:
+                rows = rollup_agent_daily_stats()
+            return {'agents_updated': rows}
             
-            AgentDailyStats.objects.update_or_create(
-                agent_id=agent_id,
-                date=today,
-                defaults={
-                    'calls_made': total_calls,
-                    'calls_answered': answered_calls,
-                    'talk_time': total_talk_time,
-                    'sales': sales
-                }
-            )
-        
-        return {'agents_updated': len(agents_with_calls)}
-        
-    except Exception as e:
-        logger.error(f"Error in update_agent_daily_stats: {e}")
-        return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error in update_agent_daily_stats: {e}")
+            return {'error': str(e)}
 
 
 # ============================================================================
@@ -682,14 +657,17 @@ def check_agent_registrations():
     
     logger = logging.getLogger(__name__)
     
-    server = AsteriskServer.objects.filter(is_active=True).first()
-    if not server:
+    servers = list(AsteriskServer.objects.filter(is_active=True))
+    if not servers:
         return
-        
-    service = AsteriskService(server)
     
     # 1. Bulk get all endpoint statuses first (Optimization)
-    all_endpoints = service.get_all_endpoint_statuses()
+    # Agents may register on any server; registered anywhere counts
+    all_endpoints = {}
+    for server in servers:
+        for extension, info in AsteriskService(server).get_all_endpoint_statuses().items():
+            if info.get('registered') or extension not in all_endpoints:
+                all_endpoints[extension] = info
     
     # 2. Check agents marked as ONLINE (Available/Busy/Wrapup)
     online_agents = AgentStatus.objects.exclude(status='offline').select_related('user', 'user__profile')
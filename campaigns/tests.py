@@ -1,3 +1,215 @@
-from django.test import TestCase
+import math
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from campaigns.erlang import binomial_table, free_probability, solve_lines, transient_abandon
+from campaigns.leases import FENCE_CHECK_LUA, Lease, lease_key, single_flight
+from campaigns.models import Campaign
+from campaigns.predictive_dialer import DialerConfig, DialerMetrics, MetricsSnapshot, PredictiveDialer
+from campaigns.simulation import PACING_MODES, Scenario, compare_modes, ensure_schema
+
+
+class SimulationSmokeTests(TransactionTestCase):
+    """
+    Runs in autocommit, as simulate_dialer does: the schema editor that
+    fills in columns the migrations lack cannot run inside a transaction
+    on SQLite
+    """
+
+    def setUp(self):
+        ensure_schema()
+
+    def test_compare_every_mode(self):
+        scenario = Scenario(agents=3, duration=300, warmup=60, seed=7)
+        rows = compare_modes(scenario, PACING_MODES)
+
+        self.assertEqual([row['mode'] for row in rows], list(PACING_MODES))
+        for row in rows:
+            self.assertGreater(row['dials'], 0, row['mode'])
+            self.assertGreaterEqual(row['abandon_rate'], 0, row['mode'])
+        self.assertIn('final_dial_level', rows[-1])
+
+        # dial_level's Campaign and CallLogs are rolled back
+        self.assertFalse(Campaign.objects.exists())
+
+
+class ErlangSolverTests(SimpleTestCase):
+    """Pins the pacing solver to values worked out by hand"""
+
+    def test_binomial_table(self):
+        table = binomial_table(3, 0.3)
+        for n in range(4):
+            for k in range(4):
+                expected = math.comb(n, k) * 0.3 ** k * 0.7 ** (n - k) if k <= n else 0.0
+                self.assertAlmostEqual(table[n, k], expected)
+
+    def test_free_probability(self):
+        # Erlang-C: the agent frees up within ring + patience seconds
+        self.assertAlmostEqual(free_probability(180, 15, 2, 'erlang_c'), 1 - math.exp(-17 / 180))
+        # Erlang-A: E[exp(-T/s)] = s / (s + mean patience) for exponential T
+        self.assertAlmostEqual(free_probability(180, 15, 2, 'erlang_a'), 1 - math.exp(-15 / 180) * 180 / 182)
+
+        # Both models agree as patience goes to 0 and to infinity
+        for model in ('erlang_c', 'erlang_a'):
+            self.assertAlmostEqual(free_probability(180, 15, 0, model), 1 - math.exp(-15 / 180))
+            self.assertAlmostEqual(free_probability(180, 15, 1e9, model), 1.0, places=6)
+
+    def test_transient_abandon(self):
+        # One idle agent: E[max(0, A - 1)] / E[A] = (Lp - 1 + (1-p)^L) / Lp
+        abandon = transient_abandon(4, 0.5, available=1, in_service=0, free_prob=0.0)
+        for lines in range(1, 5):
+            expected = (lines * 0.5 - 1 + 0.5 ** lines) / (lines * 0.5)
+            self.assertAlmostEqual(abandon[lines], expected)
+        self.assertEqual(abandon[0], 0.0)
+
+        # One busy agent who frees up with probability 0.25
+        self.assertAlmostEqual(transient_abandon(1, 0.4, available=0, in_service=1, free_prob=0.25)[1], 0.75)
+
+    def test_solve_lines(self):
+        # One idle agent, half the dials answered: 2 lines abandon 25%, 3 lines 41.7%
+        solution = solve_lines(1, 0.5, line_time=20, service_time=200, target_abandon=30, max_lines=5)
+        self.assertEqual(solution.lines, 2)
+        self.assertAlmostEqual(solution.predicted_abandon, 25.0)
+        self.assertAlmostEqual(solution.arrival_rate, 2 * 0.5 / 20)
+
+        solution = solve_lines(1, 0.5, line_time=20, service_time=200, target_abandon=10, max_lines=5)
+        self.assertEqual(solution.lines, 1)
+        self.assertEqual(solution.predicted_abandon, 0.0)
+
+        # Every dial answered: exactly one line per idle agent
+        self.assertEqual(solve_lines(8, 1.0, 20, 200, 3, 24, available=5).lines, 5)
+
+        self.assertEqual(solve_lines(0, 0.5, 20, 200, 3, 5).lines, 0)
+        with self.assertRaises(ValueError):
+            solve_lines(1, 0.5, 20, 200, 3, 5, model='erlang_b')
+
+    def test_erlang_a_approaches_erlang_c(self):
+        def lines(model, patience):
+            return solve_lines(
+                10, 0.25, line_time=20, service_time=210, target_abandon=3, max_lines=30,
+                model=model, patience=patience, available=2, ring_time=15,
+            ).lines
+
+        # Exponential patience is the more cautious model for the same mean
+        self.assertLess(lines('erlang_a', 300), lines('erlang_c', 300))
+
+        # With unbounded patience every busy agent is as good as idle
+        everyone_idle = solve_lines(10, 0.25, 20, 210, 3, 30, available=10).lines
+        self.assertEqual(lines('erlang_c', 1e9), everyone_idle)
+        self.assertEqual(lines('erlang_a', 1e9), everyone_idle)
+
+    def test_dialer_solves_from_measured_state(self):
+        dialer = PredictiveDialer(0, config=DialerConfig(pacing_model='erlang_c', amd_enabled=False))
+        metrics = DialerMetrics(
+            agents_available=4, agents_busy=0, agents_wrapup=0, agents_total=4,
+            calls_in_progress=0, calls_in_queue=0,
+            avg_talk_time=180.0, avg_wrapup_time=30.0, avg_ring_time=15.0,
+            answer_rate=100.0, abandon_rate=0.0, amd_rate=0.0,
+        )
+        self.assertEqual(dialer.solve_erlang(metrics).lines, 4)
+
+
+class LeaseTests(SimpleTestCase):
+    """Leases and fencing tokens against fakeredis (with Lua)"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+
+    def lease(self, owner, ttl=10):
+        return Lease('test', ttl=ttl, owner=owner, redis=self.redis)
+
+    def fenced_write(self, token):
+        script = self.redis.register_script(FENCE_CHECK_LUA + "return redis.call('INCR', KEYS[1])")
+        return script(keys=['writes', lease_key('test')], args=[str(token)])
+
+    def test_second_holder_cannot_acquire(self):
+        first, second = self.lease('first'), self.lease('second')
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertFalse(second.renew())
+        self.assertEqual(Lease.holder('test', redis=self.redis), (first.token, 'first'))
+
+        self.assertTrue(first.renew())
+        self.assertTrue(first.hold())
+
+        first.release()
+        self.assertIsNone(Lease.holder('test', redis=self.redis))
+        self.assertTrue(second.acquire())
+
+    def test_tokens_only_grow(self):
+        tokens = []
+        for owner in ('a', 'b', 'c'):
+            lease = self.lease(owner)
+            self.assertTrue(lease.acquire())
+            tokens.append(lease.token)
+            lease.release()
+        self.assertEqual(tokens, sorted(set(tokens)))
+
+    def test_expired_token_rejected_after_takeover(self):
+        stale = self.lease('stale', ttl=0.05)
+        self.assertTrue(stale.acquire())
+        self.assertEqual(self.fenced_write(stale.token), 1)
+
+        time.sleep(0.1)
+        current = self.lease('current')
+        self.assertTrue(current.acquire())
+        self.assertGreater(current.token, stale.token)
+
+        # The old holder can neither write, renew nor release
+        token = stale.token
+        with self.assertRaisesRegex(Exception, 'FENCED'):
+            self.fenced_write(token)
+        self.assertFalse(stale.renew())
+        self.assertIsNone(stale.token)
+        stale.token = token
+        stale.release()
+        self.assertEqual(Lease.holder('test', redis=self.redis), (current.token, 'current'))
+
+        self.assertEqual(self.fenced_write(current.token), 2)
+        self.assertEqual(self.fenced_write(''), 3)  # unfenced
+
+    def test_single_flight(self):
+        with mock.patch('django_redis.get_redis_connection', return_value=self.redis):
+            holder = Lease('job', ttl=10, owner='elsewhere')
+            self.assertTrue(holder.acquire())
+            with single_flight('job', ttl=10) as lease:
+                self.assertIsNone(lease)
+
+            holder.release()
+            with single_flight('job', ttl=10) as lease:
+                self.assertIsNotNone(lease)
+                with single_flight('job', ttl=10) as nested:
+                    self.assertIsNone(nested)
+            self.assertIsNone(Lease.holder('job', redis=self.redis))
+
+
+class MetricsSnapshotTests(TransactionTestCase):
+    """Runs in autocommit for ensure_schema, like SimulationSmokeTests"""
+
+    def setUp(self):
+        ensure_schema()
+        user = User.objects.create_user('pacer')
+        self.campaigns = [
+            Campaign.objects.create(name=f'Campaign {i}', created_by=user, start_date=timezone.now(), status=status)
+            for i, status in enumerate(['active', 'active', 'active', 'paused'])
+        ]
+
+    def test_one_build_per_tick(self):
+        snapshot = MetricsSnapshot(ttl=60)
+        with mock.patch.object(snapshot, '_build', wraps=snapshot._build) as build:
+            for campaign in self.campaigns[:3]:
+                snapshot.get(campaign.id)
+            self.assertEqual(build.call_count, 1)
+
+            # A campaign outside the bulk load is added once, then tracked
+            paused = self.campaigns[3].id
+            snapshot.get(paused)
+            snapshot.get(paused)
+            self.assertEqual(build.call_count, 2)
+            self.assertIn(paused, snapshot.get_all())
@@ -28,6 +28,7 @@ urlpatterns = [
     
     # API endpoints
     path('<int:pk>/api/stats/', views.campaign_stats_api, name='stats_api'),
+    path('api/dialer-status/', views.dialer_status_api, name='dialer_status_api'),
     
     # Additional management views (we'll add these later)
     # path('<int:pk>/hours/', views.CampaignHoursView.as_view(), name='hours'),
@@ -459,6 +459,69 @@ def campaign_stats_api(request, pk):
     return JsonResponse(stats)
 
 
+@supervisor_required
+@require_http_methods(["GET"])
+def dialer_status_api(request):
+    """
+    Dialer pool status: live dialer engines, the engine each active
+    predictive campaign is assigned to, the current lease holder and the
+    campaign loop's tick latency from that engine's last report, plus each
+    ARI worker's event queue depths and lag and its ARI request latencies
+    per route over the last report period
+    """
+    from django.core.cache import cache
+    from .leases import Lease
+    from .sharding import WorkerRegistry, campaign_shard_key
+
+    registry = WorkerRegistry('dialer_engine')
+    ring = registry.ring()
+    reports = {worker: cache.get(f"dialer_engine:status:{worker}") or {} for worker in ring.nodes}
+
+    campaigns = []
+    for campaign in Campaign.objects.filter(status='active', dial_mode='predictive').only('id', 'name'):
+        assigned = ring.node_for(campaign_shard_key(campaign.id))
+        holder = Lease.holder(f"campaign:{campaign.id}:dialer")
+        tick = (reports.get(assigned, {}).get('campaigns') or {}).get(campaign.id)
+        campaigns.append({
+            'campaign_id': campaign.id,
+            'name': campaign.name,
+            'assigned_worker': assigned,
+            'lease_holder': holder[1] if holder else None,
+            'lease_token': holder[0] if holder else None,
+            'tick': tick,
+        })
+
+    workers = [
+        {
+            'worker_id': worker,
+            'campaigns': sum(1 for c in campaigns if c['assigned_worker'] == worker),
+            'last_report': reports[worker].get('timestamp'),
+            'snapshot_build_ms': reports[worker].get('snapshot_build_ms'),
+        }
+        for worker in ring.nodes
+    ]
+
+    ari_workers = []
+    for worker in WorkerRegistry('ari_worker').live_workers():
+        pipeline = cache.get(f"ari_worker:status:{worker}") or {}
+        ari_workers.append({
+            'worker_id': worker,
+            'last_report': pipeline.get('timestamp'),
+            'depth': pipeline.get('depth'),
+            'max_lag_ms': pipeline.get('max_lag_ms'),
+            'blocked_submits': pipeline.get('blocked_submits'),
+            'shards': pipeline.get('shards', []),
+            'ari_latency': pipeline.get('ari_latency', {}),
+        })
+
+    return JsonResponse({
+        'workers': workers,
+        'campaigns': campaigns,
+        'ari_workers': ari_workers,
+        'last_updated': timezone.now().isoformat(),
+    })
+
+
 @login_required
 def script_management(request, pk):
     """
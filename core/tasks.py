@@ -15,8 +15,10 @@ def process_lead_import_task(import_id):
     """
     Process lead import file asynchronously
     """
-    from leads.models import LeadImport, Lead, DNCEntry
+    from leads.models import LeadImport, Lead
+    from leads.dnc_filter import get_dnc_filter
     
+    dnc = get_dnc_filter()
     try:
         lead_import = LeadImport.objects.get(id=import_id)
         lead_import.status = 'processing'
@@ -66,7 +68,7 @@ def process_lead_import_task(import_id):
                         
                         # Check DNC if enabled
                         if lead_import.check_dnc:
-                            if DNCEntry.objects.filter(phone_number=phone_number).exists():
+                            if dnc.contains(phone_number):
                                 lead_import.failed_imports += 1
                                 continue
                         
@@ -136,7 +138,7 @@ def process_lead_import_task(import_id):
                     
                     # Check DNC if enabled
                     if lead_import.check_dnc:
-                        if DNCEntry.objects.filter(phone_number=phone_number).exists():
+                        if dnc.contains(phone_number):
                             lead_import.failed_imports += 1
                             continue
                     
@@ -87,8 +87,8 @@ echo ""
 echo -e "${YELLOW}Terminal 2: Celery Worker${NC}"
 echo "  source env/bin/activate && celery -A autodialer worker -l info"
 echo ""
-echo -e "${YELLOW}Terminal 3: Predictive Dialer${NC}"
-echo "  source env/bin/activate && python3 manage.py predictive_dialer --interval=3"
+echo -e "${YELLOW}Terminal 3: Dialer Engine${NC}"
+echo "  source env/bin/activate && python3 manage.py dialer_engine"
 echo ""
 echo -e "${YELLOW}Terminal 4: ARI Event Worker${NC}"
 echo "  source env/bin/activate && python3 manage.py ari_event_worker"
@@ -0,0 +1,234 @@
+# leads/dnc_filter.py
+"""
+In-memory Do Not Call membership filter
+
+Every process keeps the DNC list as a sorted NumPy int64 array of
+normalized numbers. A single check is a binary search and a batch of
+thousands is one vectorized searchsorted - neither touches the database.
+
+The array is built once, then kept current incrementally:
+- dnc_entry_post_save adds the number locally and bumps a cache version;
+  other processes notice within CHECK_INTERVAL seconds and pull the
+  entries saved since their last pull. The pull window reaches back
+  PULL_OVERLAP seconds, so an entry saved before a concurrent one but
+  committed after it is still picked up (an id watermark would skip it).
+- Deleting or renumbering an entry bumps the generation, which makes every
+  process rebuild from scratch.
+- Every process also rebuilds every REBUILD_INTERVAL seconds, so a write
+  that slipped past both (a very long transaction, a bulk insert without
+  signals) is never missed for long.
+
+Numbers are compared by digits only, with the US leading 1 dropped the
+same way clean_phone_number() does, so '+1 (555) 123-4567' and '5551234567'
+match.
+"""
+
+import logging
+import re
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'dnc_filter:version'
+GENERATION_KEY = 'dnc_filter:generation'
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_number(phone_number):
+    """Integer key for a phone number, or None if it has no digits"""
+    if not phone_number:
+        return None
+    digits = _NON_DIGITS.sub('', str(phone_number))
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if not digits or len(digits) > 18:
+        return None
+    return int(digits)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class DNCFilter:
+    """
+    Sorted-array DNC set for one process
+
+    Usage:
+        dnc = get_dnc_filter()
+        if dnc.contains('+15551234567'): ...
+        blocked = dnc.blocked(lead_phone_numbers)
+    """
+
+    CHECK_INTERVAL = 5.0   # seconds between cache version checks
+    MERGE_THRESHOLD = 1024  # pending additions before merging into the array
+    PULL_OVERLAP = 120.0   # seconds each pull re-reads before the last one
+    REBUILD_INTERVAL = 900.0  # seconds between full rebuilds
+
+    def __init__(self):
+        self._numbers = np.empty(0, dtype=np.int64)
+        self._pending = set()
+        self._pulled_at = None   # database-clock time the last read started
+        self._built_at = 0.0
+        self._version = None
+        self._generation = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        self.refresh()
+        return int(self._numbers.size) + len(self._pending)
+
+    # ========================================================================
+    # Lookups
+    # ========================================================================
+
+    def contains(self, phone_number):
+        """Whether a single number is on the DNC list"""
+        key = normalize_number(phone_number)
+        if key is None:
+            return False
+        self.refresh()
+        if key in self._pending:
+            return True
+        numbers = self._numbers
+        index = np.searchsorted(numbers, key)
+        return bool(index < numbers.size and numbers[index] == key)
+
+    def contains_many(self, phone_numbers):
+        """Boolean array, aligned with `phone_numbers`, of DNC membership"""
+        phone_numbers = list(phone_numbers)
+        if not phone_numbers:
+            return np.zeros(0, dtype=bool)
+        self.refresh()
+
+        keys = [normalize_number(number) for number in phone_numbers]
+        valid = np.array([key is not None for key in keys], dtype=bool)
+        values = np.array([key or 0 for key in keys], dtype=np.int64)
+
+        numbers = self._numbers
+        if numbers.size:
+            index = np.searchsorted(numbers, values)
+            found = numbers[np.minimum(index, numbers.size - 1)] == values
+        else:
+            found = np.zeros(values.size, dtype=bool)
+
+        if self._pending:
+            with self._lock:
+                pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            found |= np.isin(values, pending)
+        return found & valid
+
+    def blocked(self, phone_numbers):
+        """Set of the given numbers that are on the DNC list"""
+        phone_numbers = list(phone_numbers)
+        found = self.contains_many(phone_numbers)
+        return {number for number, hit in zip(phone_numbers, found) if hit}
+
+    # ========================================================================
+    # Maintenance
+    # ========================================================================
+
+    def add(self, phone_number):
+        """Add a number locally (signal handler); merged into the array in bulk"""
+        key = normalize_number(phone_number)
+        if key is None:
+            return
+        with self._lock:
+            self._pending.add(key)
+            if len(self._pending) >= self.MERGE_THRESHOLD:
+                self._merge_pending()
+
+    def refresh(self, force=False):
+        """Rebuild or pull new entries if another process changed the list"""
+        now = time.monotonic()
+        if not force and self._generation is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+
+        with self._lock:
+            if not force and self._generation is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return
+            self._checked_at = now
+
+            generation = cache.get(GENERATION_KEY, 0)
+            version = cache.get(VERSION_KEY, 0)
+            if force or generation != self._generation or now - self._built_at >= self.REBUILD_INTERVAL:
+                self._rebuild()
+                self._generation = generation
+            elif version != self._version:
+                self._pull_new()
+            self._version = version
+
+    def _rebuild(self):
+        from .models import DNCEntry
+
+        started = time.monotonic()
+        pulled_at = timezone.now()
+        keys = []
+        for phone_number in DNCEntry.objects.values_list('phone_number', flat=True).iterator(chunk_size=10000):
+            key = normalize_number(phone_number)
+            if key is not None:
+                keys.append(key)
+
+        self._numbers = np.unique(np.array(keys, dtype=np.int64))
+        self._pending = set()
+        self._pulled_at = pulled_at
+        self._built_at = time.monotonic()
+        logger.info(
+            f"DNC filter built: {self._numbers.size} numbers in "
+            f"{(time.monotonic() - started) * 1000:.0f}ms"
+        )
+
+    def _pull_new(self):
+        from .models import DNCEntry
+
+        pulled_at = timezone.now()
+        since = self._pulled_at - timedelta(seconds=self.PULL_OVERLAP)
+        rows = DNCEntry.objects.filter(updated_at__gte=since).values_list('phone_number', flat=True)
+        for phone_number in rows:
+            key = normalize_number(phone_number)
+            if key is not None:
+                self._pending.add(key)
+        self._pulled_at = pulled_at
+        self._merge_pending()
+
+    def _merge_pending(self):
+        if self._pending:
+            pending = np.fromiter(self._pending, dtype=np.int64)
+            self._numbers = np.union1d(self._numbers, pending)
+            self._pending = set()
+
+
+_dnc_filter = None
+_dnc_filter_lock = threading.Lock()
+
+
+def get_dnc_filter():
+    """Process-wide DNC filter"""
+    global _dnc_filter
+    if _dnc_filter is None:
+        with _dnc_filter_lock:
+            if _dnc_filter is None:
+                _dnc_filter = DNCFilter()
+    return _dnc_filter
+
+
+def dnc_added(phone_number):
+    """A DNC entry was created: update this process, tell the others"""
+    get_dnc_filter().add(phone_number)
+    _bump(VERSION_KEY)
+
+
+def dnc_invalidated():
+    """Entries were removed or changed in bulk: every process rebuilds"""
+    _bump(GENERATION_KEY)
@@ -5,8 +5,9 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from .models import (
-    Lead, LeadList, LeadImport, DNCEntry, CallbackSchedule, LeadNote, LeadFilter
+    Lead, LeadList, LeadImport, CallbackSchedule, LeadNote, LeadFilter
 )
+from .dnc_filter import get_dnc_filter, normalize_number
 from campaigns.models import Campaign
 
 
@@ -68,8 +69,8 @@ class LeadCreateForm(forms.ModelForm):
     def clean_phone_number(self):
         phone_number = self.cleaned_data['phone_number']
         
-        # Check if phone is in DNC list
-        if DNCEntry.objects.filter(phone_number=phone_number).exists():
+        # Check if phone is in DNC list (matched by digits, as everywhere else)
+        if get_dnc_filter().contains(phone_number):
             raise forms.ValidationError("This phone number is in the Do Not Call list.")
         
         return phone_number
@@ -107,12 +108,12 @@ class LeadUpdateForm(LeadCreateForm):
     def clean_phone_number(self):
         phone_number = self.cleaned_data['phone_number']
         
-        # Skip DNC check if phone number hasn't changed
-        if self.instance and self.instance.phone_number == phone_number:
+        # Skip DNC check if phone number hasn't changed (formatting aside)
+        if self.instance and normalize_number(self.instance.phone_number) == normalize_number(phone_number):
             return phone_number
         
         # Check if phone is in DNC list for new numbers
-        if DNCEntry.objects.filter(phone_number=phone_number).exists():
+        if get_dnc_filter().contains(phone_number):
             raise forms.ValidationError("This phone number is in the Do Not Call list.")
         
         return phone_number
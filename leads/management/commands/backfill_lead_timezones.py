@@ -0,0 +1,64 @@
+"""
+Management Command: Backfill Lead Timezones
+
+Derives Lead.timezone from the phone prefix for existing leads, in id
+order and in batches. New and edited leads get it on save.
+
+Usage:
+    python manage.py backfill_lead_timezones
+    python manage.py backfill_lead_timezones --all --batch-size=10000
+"""
+
+from django.core.management.base import BaseCommand
+
+from leads.models import Lead
+from leads.timezones import timezone_for_number
+
+
+class Command(BaseCommand):
+    help = 'Set Lead.timezone from the phone number prefix'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Leads per batch (default: 5000)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every lead, not only those without a timezone'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        leads = Lead.objects.all()
+        if not options['all']:
+            leads = leads.filter(timezone='')
+
+        last_id = 0
+        scanned = updated = 0
+        while True:
+            batch = list(
+                leads.filter(id__gt=last_id).order_by('id').only('id', 'phone_number', 'timezone')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            changed = []
+            for lead in batch:
+                zone = timezone_for_number(lead.phone_number)
+                if zone != lead.timezone:
+                    lead.timezone = zone
+                    changed.append(lead)
+
+            # bulk_update skips the Lead pre_save/post_save signals on purpose
+            Lead.objects.bulk_update(changed, ['timezone'])
+            updated += len(changed)
+            self.stdout.write(f'Scanned {scanned} leads, updated {updated}')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {updated} of {scanned} leads updated'))
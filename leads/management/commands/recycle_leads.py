@@ -4,16 +4,20 @@ Lead Recycling Management Command - Phase 2.4
 This command processes lead recycle rules and recycles eligible leads.
 Run this command periodically via cron or Celery Beat.
 
+Leads are recycled in chunks of set-based UPDATEs by leads.recycling's
+RecycleEngine; Lead signals do not fire for recycled leads.
+
 Usage:
     python manage.py recycle_leads
     python manage.py recycle_leads --dry-run
     python manage.py recycle_leads --rule-id=1
+    python manage.py recycle_leads --chunk-size=10000
 """
 
 import logging
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from django.db import transaction
+
+from leads.recycling import RecycleEngine
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +41,15 @@ class Command(BaseCommand):
             action='store_true',
             help='Show detailed output'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RecycleEngine.CHUNK_SIZE,
+            help=f'Leads updated per statement (default: {RecycleEngine.CHUNK_SIZE})'
+        )
 
     def handle(self, *args, **options):
-        from leads.models import LeadRecycleRule, LeadRecycleLog, Lead
+        from leads.models import LeadRecycleRule
         
         dry_run = options.get('dry_run', False)
         rule_id = options.get('rule_id')
@@ -58,6 +68,11 @@ class Command(BaseCommand):
             return
         
         total_recycled = 0
+        total_seconds = 0.0
+        engine = RecycleEngine(
+            chunk_size=options['chunk_size'],
+            on_chunk=self._report_chunk if verbose else None
+        )
         
         for rule in rules:
             # Check if rule is currently active (time-based)
@@ -73,8 +88,7 @@ class Command(BaseCommand):
             self.stdout.write(f"  Max attempts: {rule.max_attempts}")
             
             # Get eligible leads
-            eligible_leads = rule.get_eligible_leads()
-            count = eligible_leads.count()
+            count, sample_leads = engine.preview(rule)
             
             self.stdout.write(f"  Eligible leads: {count}")
             
@@ -83,7 +97,6 @@ class Command(BaseCommand):
             
             if dry_run:
                 # Show sample of leads that would be recycled
-                sample_leads = eligible_leads[:5]
                 for lead in sample_leads:
                     self.stdout.write(
                         f"    Would recycle: {lead.id} - {lead.first_name} {lead.last_name} "
@@ -93,80 +106,28 @@ class Command(BaseCommand):
                     self.stdout.write(f"    ... and {count - 5} more")
                 continue
             
-            # Recycle leads
-            recycled_count = self._recycle_leads(rule, eligible_leads, verbose)
-            total_recycled += recycled_count
-            
-            # Update rule statistics
-            rule.last_run = timezone.now()
-            rule.total_recycled += recycled_count
-            rule.save(update_fields=['last_run', 'total_recycled'])
+            # Recycle leads (also updates the rule's last_run and total_recycled)
+            result = engine.apply(rule)
+            total_recycled += result['recycled']
+            total_seconds += result['seconds']
             
-            self.stdout.write(self.style.SUCCESS(f"  Recycled: {recycled_count} leads"))
+            self.stdout.write(self.style.SUCCESS(
+                f"  Recycled: {result['recycled']} leads in {result['seconds']}s "
+                f"({result['rate']} leads/s)"
+            ))
         
         self.stdout.write('')
         if dry_run:
             self.stdout.write(self.style.WARNING(f'DRY RUN: Would have recycled {total_recycled} leads'))
         else:
-            self.stdout.write(self.style.SUCCESS(f'Total recycled: {total_recycled} leads'))
+            rate = round(total_recycled / total_seconds, 1) if total_seconds > 0 else 0.0
+            self.stdout.write(self.style.SUCCESS(
+                f'Total recycled: {total_recycled} leads in {total_seconds:.2f}s ({rate} leads/s)'
+            ))
 
-    def _recycle_leads(self, rule, leads, verbose=False):
-        """
-        Recycle leads according to rule
-        
-        Args:
-            rule: LeadRecycleRule instance
-            leads: QuerySet of Lead objects
-            verbose: Show detailed output
-        
-        Returns:
-            int: Number of leads recycled
-        """
-        from leads.models import LeadRecycleLog
-        
-        recycled_count = 0
-        
-        for lead in leads:
-            try:
-                with transaction.atomic():
-                    # Create log entry
-                    LeadRecycleLog.objects.create(
-                        rule=rule,
-                        lead=lead,
-                        old_status=lead.status,
-                        new_status=rule.target_status,
-                        old_call_count=lead.call_count
-                    )
-                    
-                    # Update lead
-                    lead.status = rule.target_status
-                    
-                    # Adjust priority if configured
-                    if rule.priority_adjustment != 0:
-                        current_priority = getattr(lead, 'priority', 'medium')
-                        # Simple priority adjustment logic
-                        priorities = ['low', 'medium', 'high']
-                        try:
-                            idx = priorities.index(current_priority)
-                            new_idx = max(0, min(2, idx + rule.priority_adjustment))
-                            lead.priority = priorities[new_idx]
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    lead.save(update_fields=['status', 'priority'])
-                    
-                    recycled_count += 1
-                    
-                    if verbose:
-                        self.stdout.write(
-                            f"    Recycled: {lead.id} - {lead.phone_number} "
-                            f"({rule.source_status} → {rule.target_status})"
-                        )
-                    
-            except Exception as e:
-                logger.error(f"Error recycling lead {lead.id}: {e}")
-                self.stdout.write(
-                    self.style.ERROR(f"    Error recycling lead {lead.id}: {e}")
-                )
-        
-        return recycled_count
+    def _report_chunk(self, rule, rows):
+        """Verbose progress: one line per committed chunk"""
+        self.stdout.write(
+            f"    Recycled chunk of {len(rows)} leads up to id {max(row[0] for row in rows)} "
+            f"({rule.source_status} → {rule.target_status})"
+        )
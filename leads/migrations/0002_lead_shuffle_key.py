@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+import leads.models
+
+
+def randomize_shuffle_keys(apps, schema_editor):
+    """AddField gives every existing row the same key; spread them out"""
+    table = apps.get_model('leads', 'Lead')._meta.db_table
+    if schema_editor.connection.vendor == 'postgresql':
+        expression = 'floor(random() * 2147483648)::integer'
+    else:
+        expression = 'abs(random()) % 2147483648'
+    schema_editor.execute(f'UPDATE {table} SET shuffle_key = {expression}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='shuffle_key',
+            field=models.PositiveIntegerField(db_index=True, default=leads.models.random_shuffle_key, editable=False, help_text='Random sort key for random lead order (hopper fill)'),
+        ),
+        migrations.RunPython(randomize_shuffle_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0002_lead_shuffle_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='timezone',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='IANA timezone from the phone prefix (local calling hours)', max_length=64),
+        ),
+    ]
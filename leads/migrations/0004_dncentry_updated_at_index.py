@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_lead_timezone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dncentry',
+            index=models.Index(fields=['updated_at'], name='leads_dncen_updated_08fd00_idx'),
+        ),
+    ]
@@ -5,8 +5,15 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from core.models import TimeStampedModel
+import random
 import uuid
 
+
+def random_shuffle_key():
+    """Stable random sort key; lets 'random' lead order page with an index"""
+    return random.randrange(2 ** 31)
+
+
 class LeadList(TimeStampedModel):
     """
     Lead lists to organize and group leads
@@ -198,6 +205,19 @@ class Lead(TimeStampedModel):
         default=0,
         help_text='Number of times call was answered'
     )
+    timezone = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='IANA timezone from the phone prefix (local calling hours)'
+    )
+    shuffle_key = models.PositiveIntegerField(
+        default=random_shuffle_key,
+        db_index=True,
+        editable=False,
+        help_text='Random sort key for random lead order (hopper fill)'
+    )
     last_status_change = models.DateTimeField(
         null=True,
         blank=True,
@@ -280,6 +300,7 @@ class DNCEntry(TimeStampedModel):
         verbose_name_plural = "DNC Entries"
         indexes = [
             models.Index(fields=['phone_number']),
+            models.Index(fields=['updated_at']),  # incremental DNC filter pulls
         ]
     
     def __str__(self):
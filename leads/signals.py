@@ -1,11 +1,13 @@
 # leads/signals.py
 
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
 from django.utils import timezone
 from .models import Lead, LeadList, DNCEntry, CallbackSchedule, LeadImport
 from .utils import clean_phone_number
+from .timezones import timezone_for_number
 
 
 @receiver(pre_save, sender=Lead)
@@ -16,6 +18,8 @@ def clean_lead_data(sender, instance, **kwargs):
     # Clean phone number
     if instance.phone_number:
         instance.phone_number = clean_phone_number(instance.phone_number)
+        # Local timezone from the number's prefix, for calling-hours filtering
+        instance.timezone = timezone_for_number(instance.phone_number)
     
     # Clean email
     if instance.email:
@@ -122,6 +126,23 @@ def dnc_entry_post_save(sender, instance, created, **kwargs):
         # Clear cache
         cache.delete('lead_statistics')
 
+    # Keep the in-memory DNC filters current once the row is visible
+    from .dnc_filter import dnc_added, dnc_invalidated
+    if created:
+        phone_number = instance.phone_number
+        transaction.on_commit(lambda: dnc_added(phone_number))
+    else:
+        transaction.on_commit(dnc_invalidated)
+
+
+@receiver(post_delete, sender=DNCEntry)
+def dnc_entry_post_delete(sender, instance, **kwargs):
+    """
+    Removed DNC numbers must drop out of every process's filter
+    """
+    from .dnc_filter import dnc_invalidated
+    transaction.on_commit(dnc_invalidated)
+
 
 @receiver(post_save, sender=CallbackSchedule)
 def callback_schedule_post_save(sender, instance, created, **kwargs):
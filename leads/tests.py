@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, skipUnlessDBFeature
 
-# Create your tests here.
+from leads.models import Lead, LeadList, LeadRecycleLog, LeadRecycleRule
+from leads.recycling import RecycleEngine
+
+
+@skipUnlessDBFeature('has_select_for_update', 'has_select_for_update_skip_locked')
+class RecycleEngineTests(TransactionTestCase):
+    """
+    Runs in autocommit, as recycle_leads does: select_for_update() is only
+    allowed inside the chunk's own transaction
+    """
+
+    def setUp(self):
+        user = User.objects.create_user('recycler')
+        self.lead_list = LeadList.objects.create(name='Recycle', created_by=user)
+        for i in range(5):
+            Lead.objects.create(
+                first_name='Lead', last_name=str(i), phone_number=f'555000{i:04d}',
+                lead_list=self.lead_list, status='no_answer', call_count=1
+            )
+        Lead.objects.create(
+            first_name='Lead', last_name='done', phone_number='5550009999',
+            lead_list=self.lead_list, status='no_answer', call_count=5
+        )
+        self.rule = LeadRecycleRule.objects.create(
+            name='No answer', lead_list=self.lead_list, source_status='no_answer',
+            target_status='new', recycle_after_hours=0, max_attempts=5
+        )
+
+    def test_apply_recycles_in_chunks(self):
+        result = RecycleEngine(chunk_size=2).apply(self.rule)
+
+        self.assertEqual(result['recycled'], 5)
+        self.assertEqual(result['chunks'], 3)
+        self.assertEqual(Lead.objects.filter(status='new').count(), 5)
+        self.assertEqual(Lead.objects.filter(status='no_answer', call_count=5).count(), 1)
+        self.assertEqual(LeadRecycleLog.objects.filter(rule=self.rule).count(), 5)
+
+        self.rule.refresh_from_db()
+        self.assertEqual(self.rule.total_recycled, 5)
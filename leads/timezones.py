@@ -0,0 +1,224 @@
+# leads/timezones.py
+"""
+Phone-prefix timezone lookup for local calling hours
+
+Each lead stores the IANA timezone of its number (Lead.timezone), derived
+once when the lead is saved by a longest-prefix match in a digit trie of
+NANP area codes and country calling codes. Hopper fill then asks which of
+the (few dozen) known zones are inside the campaign's calling window right
+now and selects leads with `timezone IN (...)` - an index scan, with no
+per-lead timezone math.
+
+Numbers without a '+' or '00' prefix are national numbers in
+AUTODIALER_SETTINGS['DEFAULT_COUNTRY_CODE'] (default '1').
+"""
+
+import re
+from datetime import time as dt_time
+
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+_NON_DIGITS = re.compile(r'\D')
+
+# NANP area codes by zone; states split across zones use the majority zone
+NANP_AREA_CODES = {
+    'America/New_York': (
+        '201 202 203 207 212 215 216 220 223 231 234 239 240 248 252 260 267 269 272 276 '
+        '283 301 302 304 305 313 315 317 321 326 330 332 336 339 347 351 352 380 386 401 '
+        '404 407 410 412 413 419 423 434 440 443 445 463 470 475 478 484 502 508 513 516 '
+        '517 518 540 551 561 567 570 571 574 582 585 586 603 606 607 609 610 614 616 617 '
+        '631 640 646 667 678 680 681 689 703 704 706 716 717 718 724 727 732 734 740 743 '
+        '754 757 762 765 770 771 772 774 781 786 802 803 804 810 812 813 814 826 828 835 '
+        '838 839 843 845 848 850 854 856 857 859 860 862 863 864 865 878 904 906 908 910 '
+        '912 914 917 919 929 930 934 937 941 943 947 948 954 959 973 978 980 984 989'
+    ),
+    'America/Toronto': (
+        '226 249 263 289 343 354 365 367 382 416 418 437 438 450 468 514 519 548 579 581 '
+        '613 647 683 705 742 753 807 819 873 905'
+    ),
+    'America/Chicago': (
+        '205 210 214 217 218 219 224 225 228 251 254 256 262 270 274 281 308 309 312 314 '
+        '316 318 319 320 325 331 334 337 346 361 364 402 405 409 414 417 430 432 447 464 '
+        '469 479 501 504 507 512 515 531 534 539 557 563 572 573 580 601 605 608 612 615 '
+        '618 620 629 630 636 641 651 659 660 662 682 701 708 712 713 715 726 730 731 737 '
+        '763 769 773 779 785 806 815 816 817 830 832 847 870 872 901 903 913 918 920 931 '
+        '936 938 940 945 952 956 972 975 979 985'
+    ),
+    'America/Winnipeg': '204 431 584',
+    'America/Regina': '306 474 639',
+    'America/Denver': '208 303 307 385 406 435 505 575 719 720 801 915 970 983 986',
+    'America/Edmonton': '368 403 587 780 825',
+    'America/Phoenix': '480 520 602 623 928',
+    'America/Los_Angeles': (
+        '206 209 213 253 279 310 323 341 350 360 408 415 424 425 442 458 503 509 510 530 '
+        '541 559 562 564 619 626 628 650 657 661 669 702 707 714 725 747 760 775 805 818 '
+        '820 831 840 858 909 916 925 949 951 971'
+    ),
+    'America/Vancouver': '236 250 604 672 778',
+    'America/Anchorage': '907',
+    'Pacific/Honolulu': '808',
+    'America/Puerto_Rico': '787 939',
+}
+
+# Country calling codes; multi-zone countries use their most populous zone
+COUNTRY_CODES = {
+    '7': 'Europe/Moscow',
+    '20': 'Africa/Cairo',
+    '27': 'Africa/Johannesburg',
+    '30': 'Europe/Athens',
+    '31': 'Europe/Amsterdam',
+    '32': 'Europe/Brussels',
+    '33': 'Europe/Paris',
+    '34': 'Europe/Madrid',
+    '39': 'Europe/Rome',
+    '41': 'Europe/Zurich',
+    '43': 'Europe/Vienna',
+    '44': 'Europe/London',
+    '45': 'Europe/Copenhagen',
+    '46': 'Europe/Stockholm',
+    '47': 'Europe/Oslo',
+    '48': 'Europe/Warsaw',
+    '49': 'Europe/Berlin',
+    '51': 'America/Lima',
+    '52': 'America/Mexico_City',
+    '54': 'America/Argentina/Buenos_Aires',
+    '55': 'America/Sao_Paulo',
+    '56': 'America/Santiago',
+    '57': 'America/Bogota',
+    '60': 'Asia/Kuala_Lumpur',
+    '61': 'Australia/Sydney',
+    '62': 'Asia/Jakarta',
+    '63': 'Asia/Manila',
+    '64': 'Pacific/Auckland',
+    '65': 'Asia/Singapore',
+    '66': 'Asia/Bangkok',
+    '81': 'Asia/Tokyo',
+    '82': 'Asia/Seoul',
+    '84': 'Asia/Ho_Chi_Minh',
+    '86': 'Asia/Shanghai',
+    '90': 'Europe/Istanbul',
+    '91': 'Asia/Kolkata',
+    '92': 'Asia/Karachi',
+    '94': 'Asia/Colombo',
+    '234': 'Africa/Lagos',
+    '254': 'Africa/Nairobi',
+    '351': 'Europe/Lisbon',
+    '353': 'Europe/Dublin',
+    '358': 'Europe/Helsinki',
+    '852': 'Asia/Hong_Kong',
+    '880': 'Asia/Dhaka',
+    '966': 'Asia/Riyadh',
+    '971': 'Asia/Dubai',
+    '972': 'Asia/Jerusalem',
+    '977': 'Asia/Kathmandu',
+}
+
+
+class PrefixTrie:
+    """Digit trie with longest-prefix lookup"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, prefix, value):
+        node = self.root
+        for digit in prefix:
+            node = node.setdefault(digit, {})
+        node[None] = value
+
+    def longest_match(self, digits):
+        node = self.root
+        match = node.get(None)
+        for digit in digits:
+            node = node.get(digit)
+            if node is None:
+                break
+            match = node.get(None, match)
+        return match
+
+
+def _build_trie():
+    trie = PrefixTrie()
+    for code, zone in COUNTRY_CODES.items():
+        trie.insert(code, zone)
+    for zone, area_codes in NANP_AREA_CODES.items():
+        for area_code in area_codes.split():
+            trie.insert('1' + area_code, zone)
+    return trie
+
+
+PREFIX_TRIE = _build_trie()
+KNOWN_ZONES = sorted(set(COUNTRY_CODES.values()) | set(NANP_AREA_CODES))
+
+
+def default_country_code():
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return str(autodialer_settings.get('DEFAULT_COUNTRY_CODE', '1'))
+
+
+def international_digits(phone_number, country_code=None):
+    """Digits of a number including its country code"""
+    raw = str(phone_number or '').strip()
+    digits = _NON_DIGITS.sub('', raw)
+    if not digits:
+        return ''
+    if raw.startswith('+'):
+        return digits
+    if digits.startswith('00'):
+        return digits[2:]
+
+    country_code = country_code or default_country_code()
+    if country_code == '1' and len(digits) == 11 and digits.startswith('1'):
+        return digits
+    if digits.startswith(country_code) and len(digits) > 10:
+        return digits
+    return country_code + digits.lstrip('0')
+
+
+def timezone_for_number(phone_number, country_code=None):
+    """IANA timezone for a phone number, or '' if the prefix is unknown"""
+    return PREFIX_TRIE.longest_match(international_digits(phone_number, country_code)) or ''
+
+
+def within_hours(local_time, start, end):
+    """Inclusive calling window check; windows may cross midnight"""
+    if isinstance(start, str):
+        start = dt_time.fromisoformat(start)
+    if isinstance(end, str):
+        end = dt_time.fromisoformat(end)
+    if start <= end:
+        return start <= local_time <= end
+    return local_time >= start or local_time <= end
+
+
+def zones_in_calling_hours(start, end, zones=None, now=None):
+    """Zones whose local time is inside start..end right now"""
+    now = now or timezone.now()
+    return [
+        zone for zone in (zones or KNOWN_ZONES)
+        if within_hours(now.astimezone(ZoneInfo(zone)).time(), start, end)
+    ]
+
+
+def calling_hours_q(campaign, now=None):
+    """
+    Lead filter for leads whose local time is inside the campaign's hours
+
+    Leads without a known timezone fall back to the campaign's timezone.
+    Returns None when no lead can be called right now.
+    """
+    now = now or timezone.now()
+    start, end = campaign.daily_start_time, campaign.daily_end_time
+
+    zones = zones_in_calling_hours(start, end, now=now)
+    campaign_open = bool(zones_in_calling_hours(start, end, zones=[campaign.timezone or 'UTC'], now=now))
+    if not zones and not campaign_open:
+        return None
+
+    query = Q(timezone__in=zones)
+    if campaign_open:
+        query |= Q(timezone='')
+    return query
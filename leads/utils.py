@@ -209,9 +209,9 @@ def check_dnc_status(phone_number):
     """
     Check if phone number is in DNC list
     """
-    from .models import DNCEntry
+    from .dnc_filter import get_dnc_filter
     
-    return DNCEntry.objects.filter(phone_number=phone_number).exists()
+    return get_dnc_filter().contains(phone_number)
 
 
 def format_import_summary(import_obj):
@@ -28,6 +28,7 @@ from .forms import (
     LeadImportForm, CallbackCreateForm, LeadSearchForm,
     LeadFilterForm, BulkActionForm
 )
+from .dnc_filter import get_dnc_filter
 from campaigns.models import Campaign
 
 
@@ -681,7 +682,7 @@ def dnc_check(request):
     if not phone_number:
         return JsonResponse({'error': 'Phone number required'}, status=400)
     
-    is_dnc = DNCEntry.objects.filter(phone_number=phone_number).exists()
+    is_dnc = get_dnc_filter().contains(phone_number)
     
     return JsonResponse({
         'is_dnc': is_dnc,
@@ -835,7 +836,7 @@ def validate_phone_ajax(request):
         })
     
     # Check if number is in DNC
-    is_dnc = DNCEntry.objects.filter(phone_number=phone_number).exists()
+    is_dnc = get_dnc_filter().contains(phone_number)
     if is_dnc:
         return JsonResponse({
             'valid': False,
@@ -1,6 +1,6 @@
 # reports/admin.py
 from django.contrib import admin
-from .models import Dashboard, Report, ReportSchedule, ReportExecution
+from .models import Dashboard, Report, ReportSchedule, ReportExecution, CallHourlyFact
 
 @admin.register(Dashboard)
 class DashboardAdmin(admin.ModelAdmin):
@@ -30,3 +30,9 @@ class ReportExecutionAdmin(admin.ModelAdmin):
     list_display = ['report', 'started_at', 'completed_at', 'status', 'total_records']
     list_filter = ['status', 'started_at']
     search_fields = ['error_message', 'file_path']
+
+
+@admin.register(CallHourlyFact)
+class CallHourlyFactAdmin(admin.ModelAdmin):
+    list_display = ['hour', 'campaign', 'agent', 'disposition', 'total_calls', 'answered_calls', 'talk_duration']
+    list_filter = ['campaign', 'hour']
@@ -14,8 +14,6 @@ from typing import Dict, List, Optional
 from io import BytesIO
 
 from django.utils import timezone
-from django.db.models import Avg, Count, Sum, Q, F, FloatField
-from django.db.models.functions import TruncDate, TruncHour, TruncWeek, Cast
 from django.http import HttpResponse
 
 logger = logging.getLogger(__name__)
@@ -50,34 +48,20 @@ class AnalyticsEngine:
         Returns:
             dict: Trend data with labels and values
         """
-        from calls.models import CallLog
+        from reports.facts import call_metrics
         
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        calls = CallLog.objects.filter(start_time__gte=start_date)
-        
-        if campaign_id:
-            calls = calls.filter(campaign_id=campaign_id)
-        
-        # Choose truncation function
-        if granularity == 'hour':
-            trunc_func = TruncHour('start_time')
-        elif granularity == 'week':
-            trunc_func = TruncWeek('start_time')
-        else:
-            trunc_func = TruncDate('start_time')
-        
-        # Aggregate by period
-        trend_data = calls.annotate(
-            period=trunc_func
-        ).values('period').annotate(
-            total_calls=Count('id'),
-            answered_calls=Count('id', filter=Q(answer_time__isnull=False)),
-            sales=Count('id', filter=Q(disposition__is_sale=True)),
-            avg_duration=Avg('talk_duration'),
-            total_duration=Sum('talk_duration')
-        ).order_by('period')
+        # Aggregate by period (hourly facts + raw rows for the open hour)
+        trend_data = sorted(
+            (item for item in call_metrics(
+                start_date, end_date,
+                period=granularity if granularity in ('hour', 'week') else 'day',
+                campaign_id=campaign_id
+            ) if item['period']),
+            key=lambda item: item['period']
+        )
         
         # Format response
         labels = []
@@ -119,24 +103,15 @@ class AnalyticsEngine:
         
         Helps identify best times to call.
         """
-        from calls.models import CallLog
-        from django.db.models.functions import ExtractHour
+        from reports.facts import call_metrics
         
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        calls = CallLog.objects.filter(start_time__gte=start_date)
-        
-        if campaign_id:
-            calls = calls.filter(campaign_id=campaign_id)
-        
-        hourly = calls.annotate(
-            hour=ExtractHour('start_time')
-        ).values('hour').annotate(
-            total_calls=Count('id'),
-            answered_calls=Count('id', filter=Q(answer_time__isnull=False)),
-            sales=Count('id', filter=Q(disposition__is_sale=True)),
-        ).order_by('hour')
+        hourly = sorted(
+            call_metrics(start_date, end_date, period='hour_of_day', campaign_id=campaign_id),
+            key=lambda item: item['period']
+        )
         
         # Calculate rates
         result = []
@@ -149,8 +124,8 @@ class AnalyticsEngine:
             conversion_rate = (sales_count / answered * 100) if answered > 0 else 0
             
             result.append({
-                'hour': item['hour'],
-                'hour_formatted': f"{item['hour']:02d}:00",
+                'hour': item['period'],
+                'hour_formatted': f"{item['period']:02d}:00",
                 'total_calls': total,
                 'answered_calls': answered,
                 'sales': sales_count,
@@ -187,23 +162,14 @@ class AnalyticsEngine:
         Returns:
             dict: Comparison metrics with changes
         """
-        from calls.models import CallLog
+        from reports.facts import call_totals
         
         def get_period_metrics(start, end):
-            calls = CallLog.objects.filter(
-                campaign_id=campaign_id,
-                start_time__gte=start,
-                start_time__lte=end
-            )
+            totals = call_totals(start, end, campaign_id=campaign_id)
             
-            total = calls.count()
-            answered = calls.filter(answer_time__isnull=False).count()
-            sales = calls.filter(disposition__is_sale=True).count()
-            
-            agg = calls.aggregate(
-                total_duration=Sum('talk_duration'),
-                avg_duration=Avg('talk_duration')
-            )
+            total = totals['total_calls']
+            answered = totals['answered_calls']
+            sales = totals['sales']
             
             contact_rate = (answered / total * 100) if total > 0 else 0
             conversion_rate = (sales / answered * 100) if answered > 0 else 0
@@ -214,8 +180,8 @@ class AnalyticsEngine:
                 'sales': sales,
                 'contact_rate': round(contact_rate, 1),
                 'conversion_rate': round(conversion_rate, 1),
-                'total_duration': agg['total_duration'] or 0,
-                'avg_duration': round(agg['avg_duration'] or 0, 1)
+                'total_duration': totals['talk_duration'],
+                'avg_duration': round(totals['talk_duration'] / total, 1) if total > 0 else 0
             }
         
         period1_metrics = get_period_metrics(period1_start, period1_end)
@@ -270,33 +236,20 @@ class AnalyticsEngine:
         Returns:
             list: Ranked agent list
         """
-        from calls.models import CallLog
         from django.contrib.auth.models import User
+        from reports.facts import call_metrics
         
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        calls = CallLog.objects.filter(
-            start_time__gte=start_date,
-            agent__isnull=False
-        )
-        
-        if campaign_id:
-            calls = calls.filter(campaign_id=campaign_id)
-        
         # Aggregate by agent
-        agent_stats = calls.values(
-            'agent_id',
-            'agent__username',
-            'agent__first_name',
-            'agent__last_name'
-        ).annotate(
-            total_calls=Count('id'),
-            answered_calls=Count('id', filter=Q(answer_time__isnull=False)),
-            sales=Count('id', filter=Q(disposition__is_sale=True)),
-            total_duration=Sum('talk_duration'),
-            avg_quality=Avg('quality_score')
+        agent_stats = call_metrics(
+            start_date, end_date,
+            group_by=['agent_id'],
+            campaign_id=campaign_id,
+            exclude_unassigned_agent=True
         )
+        agents = User.objects.in_bulk([agent['agent_id'] for agent in agent_stats])
         
         # Calculate rates and format
         leaderboard = []
@@ -308,9 +261,13 @@ class AnalyticsEngine:
             contact_rate = (answered / total * 100) if total > 0 else 0
             conversion_rate = (sales_count / answered * 100) if answered > 0 else 0
             
-            name = f"{agent['agent__first_name'] or ''} {agent['agent__last_name'] or ''}".strip()
+            user = agents.get(agent['agent_id'])
+            if not user:
+                continue
+            name = f"{user.first_name or ''} {user.last_name or ''}".strip()
             if not name:
-                name = agent['agent__username']
+                name = user.username
+            avg_quality = agent['quality_sum'] / agent['quality_count'] if agent['quality_count'] else 0
             
             leaderboard.append({
                 'agent_id': agent['agent_id'],
@@ -320,8 +277,8 @@ class AnalyticsEngine:
                 'sales': sales_count,
                 'contact_rate': round(contact_rate, 1),
                 'conversion_rate': round(conversion_rate, 1),
-                'total_duration': agent['total_duration'] or 0,
-                'avg_quality': round(agent['avg_quality'] or 0, 1)
+                'total_duration': agent['talk_duration'],
+                'avg_quality': round(avg_quality, 1)
             })
         
         # Sort by specified metric
@@ -352,9 +309,9 @@ class AnalyticsEngine:
         Returns:
             dict: ROI metrics
         """
-        from calls.models import CallLog
         from campaigns.models import Campaign
         from leads.models import Lead
+        from reports.facts import call_totals
         
         campaign = Campaign.objects.filter(id=campaign_id).first()
         if not campaign:
@@ -363,18 +320,15 @@ class AnalyticsEngine:
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        calls = CallLog.objects.filter(
-            campaign_id=campaign_id,
-            start_time__gte=start_date
-        )
+        totals = call_totals(start_date, end_date, campaign_id=campaign_id)
         
         # Get call metrics
-        total_calls = calls.count()
-        answered_calls = calls.filter(answer_time__isnull=False).count()
-        sales = calls.filter(disposition__is_sale=True).count()
+        total_calls = totals['total_calls']
+        answered_calls = totals['answered_calls']
+        sales = totals['sales']
         
         # Get talk time
-        total_duration = calls.aggregate(total=Sum('talk_duration'))['total'] or 0
+        total_duration = totals['talk_duration']
         
         # Estimate costs (these would come from campaign settings)
         cost_per_minute = getattr(campaign, 'cost_per_minute', 0.03)
@@ -0,0 +1,293 @@
+# reports/facts.py
+"""
+Hourly call facts - maintenance and reads
+
+CallHourlyFact holds CallLog aggregated per (hour, campaign, agent,
+disposition). An hour is always rebuilt whole: its fact rows are deleted
+and re-inserted from one grouped query over that hour's calls. The
+incremental refresh rebuilds only the hours that have a CallLog with
+updated_at past the last run's watermark, so it costs the same on a day
+with a year of history behind it as on the first day. A periodic trailing
+refresh also rebuilds the last day's hours whatever their updated_at, for
+CallLog writes that do not move it (bulk .update(), raw SQL).
+
+call_metrics() answers reporting queries from the facts for the hours they
+cover and from raw CallLog rows for the rest: the partial hour at the start
+of the range and everything since the last refresh (the current hour).
+
+Hours are UTC hours, so day/week buckets for zones with a non-whole-hour
+offset are approximate to the offset's remainder.
+
+Data Structures:
+- rollup:call_facts:watermark (String) - ISO time of the last refresh
+- rollup:call_facts:covered_from (String) - first hour the facts are complete for
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate, TruncHour, TruncWeek
+from django.utils import timezone
+
+from campaigns.rollups import WATERMARK_OVERLAP, get_watermark, set_watermark
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+METRICS = ('total_calls', 'answered_calls', 'dispositioned_calls', 'sales',
+           'talk_duration', 'quality_sum', 'quality_count')
+DIMENSIONS = ('campaign_id', 'agent_id', 'disposition_id')
+
+
+def floor_hour(when):
+    return when.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(when):
+    floored = floor_hour(when)
+    return floored if floored == when else floored + HOUR
+
+
+# ============================================================================
+# Maintenance
+# ============================================================================
+
+def rebuild_hours(hours):
+    """Recompute the fact rows of each hour in `hours` (UTC hour starts)"""
+    from calls.models import CallLog
+    from reports.models import CallHourlyFact
+
+    rebuilt = 0
+    for hour in sorted(set(hours)):
+        rows = (
+            CallLog.objects
+            .filter(start_time__gte=hour, start_time__lt=hour + HOUR)
+            .values(*DIMENSIONS)
+            .annotate(
+                total=Count('id'),
+                answered=Count('id', filter=Q(answer_time__isnull=False)),
+                talk=Sum('talk_duration'),
+                quality=Sum('quality_score'),
+                rated=Count('quality_score'),
+            )
+        )
+        facts = [
+            CallHourlyFact(
+                hour=hour,
+                campaign_id=row['campaign_id'],
+                agent_id=row['agent_id'],
+                disposition_id=row['disposition_id'],
+                total_calls=row['total'],
+                answered_calls=row['answered'],
+                talk_duration=row['talk'] or 0,
+                quality_sum=row['quality'] or 0,
+                quality_count=row['rated'],
+            )
+            for row in rows
+        ]
+        with transaction.atomic():
+            CallHourlyFact.objects.filter(hour=hour).delete()
+            CallHourlyFact.objects.bulk_create(facts)
+        rebuilt += 1
+    return rebuilt
+
+
+def refresh_call_facts(trailing_hours=0):
+    """
+    Rebuild the hours touched since the last refresh
+
+    The first refresh starts coverage at the current hour; older history is
+    read raw until backfill_call_facts has filled it in. With
+    `trailing_hours` the covered hours among the last that many are rebuilt
+    too, changed or not.
+    Returns: number of hours rebuilt
+    """
+    from calls.models import CallLog
+    from django_redis import get_redis_connection
+
+    started = timezone.now()
+    since = get_watermark('call_facts')
+    r = get_redis_connection("default")
+
+    if since is None:
+        hours = [floor_hour(started)]
+        r.set('rollup:call_facts:covered_from', hours[0].isoformat(), nx=True)
+    else:
+        hours = (
+            CallLog.objects
+            .filter(updated_at__gte=since - WATERMARK_OVERLAP)
+            .annotate(hour=TruncHour('start_time', tzinfo=dt_timezone.utc))
+            .values_list('hour', flat=True)
+            .distinct()
+        )
+
+    if trailing_hours and since is not None:
+        covered_from = _covered_from(r)
+        hour = floor_hour(started)
+        hours = set(hours)
+        for _ in range(trailing_hours):
+            if covered_from is not None and hour < covered_from:
+                break
+            hours.add(hour)
+            hour -= HOUR
+
+    rebuilt = rebuild_hours(hours)
+    set_watermark('call_facts', started)
+    return rebuilt
+
+
+def backfill_call_facts(start, end=None):
+    """Rebuild every hour from `start` to `end` and extend coverage back to `start`"""
+    from django_redis import get_redis_connection
+
+    started = timezone.now()
+    end = end or started
+    hour = floor_hour(start)
+    hours = []
+    while hour < end:
+        hours.append(hour)
+        hour += HOUR
+    rebuilt = rebuild_hours(hours)
+
+    r = get_redis_connection("default")
+    covered_from = _covered_from(r)
+    if covered_from is None or floor_hour(start) < covered_from:
+        r.set('rollup:call_facts:covered_from', floor_hour(start).isoformat())
+    if get_watermark('call_facts') is None:
+        # Let the periodic refresh pick up from here
+        set_watermark('call_facts', started)
+    return rebuilt
+
+
+def _covered_from(r):
+    value = r.get('rollup:call_facts:covered_from')
+    return datetime.fromisoformat(value.decode()) if value else None
+
+
+def fact_window():
+    """[from, until) hours the facts are complete for, or None"""
+    try:
+        from django_redis import get_redis_connection
+        r = get_redis_connection("default")
+        covered_from = _covered_from(r)
+        refreshed = get_watermark('call_facts')
+    except Exception as e:
+        logger.warning(f"Call facts unavailable, reading CallLog: {e}")
+        return None
+    if covered_from is None or refreshed is None:
+        return None
+    # The hour the last refresh ran in may have gained calls since
+    until = floor_hour(refreshed)
+    if until <= covered_from:
+        return None
+    return covered_from, until
+
+
+# ============================================================================
+# Reads
+# ============================================================================
+
+def _period(kind, field):
+    if kind == 'hour':
+        return TruncHour(field)
+    if kind == 'week':
+        return TruncWeek(field)
+    if kind == 'hour_of_day':
+        return ExtractHour(field)
+    return TruncDate(field)
+
+
+def _fact_rows(start, end, group_by, period, filters):
+    from reports.models import CallHourlyFact
+
+    facts = CallHourlyFact.objects.filter(hour__gte=start, hour__lt=end, **filters)
+    if period:
+        facts = facts.annotate(period=_period(period, 'hour'))
+    # Aggregates cannot reuse the names of the fields they sum
+    rows = facts.values(*group_by).annotate(
+        sum_total_calls=Sum('total_calls'),
+        sum_answered_calls=Sum('answered_calls'),
+        sum_dispositioned_calls=Sum('total_calls', filter=Q(disposition__isnull=False)),
+        sum_sales=Sum('total_calls', filter=Q(disposition__is_sale=True)),
+        sum_talk_duration=Sum('talk_duration'),
+        sum_quality_sum=Sum('quality_sum'),
+        sum_quality_count=Sum('quality_count'),
+    )
+    for row in rows:
+        yield dict(
+            {field: row[field] for field in group_by},
+            **{metric: row[f'sum_{metric}'] for metric in METRICS}
+        )
+
+
+def _raw_rows(time_filter, group_by, period, filters):
+    from calls.models import CallLog
+
+    calls = CallLog.objects.filter(time_filter, **filters)
+    if period:
+        calls = calls.annotate(period=_period(period, 'start_time'))
+    return calls.values(*group_by).annotate(
+        total_calls=Count('id'),
+        answered_calls=Count('id', filter=Q(answer_time__isnull=False)),
+        dispositioned_calls=Count('id', filter=Q(disposition__isnull=False)),
+        sales=Count('id', filter=Q(disposition__is_sale=True)),
+        talk_duration=Sum('talk_duration'),
+        quality_sum=Sum('quality_score'),
+        quality_count=Count('quality_score'),
+    )
+
+
+def call_metrics(start, end=None, group_by=(), period=None, campaign_id=None, agent_id=None,
+                 exclude_unassigned_agent=False):
+    """
+    Call counts between `start` and `end` (inclusive), grouped
+
+    Args:
+        group_by: any of 'campaign_id', 'agent_id', 'disposition_id'
+        period: None, 'hour', 'day', 'week' or 'hour_of_day' - adds a 'period' key
+        exclude_unassigned_agent: leave out calls without an agent
+
+    Returns:
+        list of dicts with the group keys and total_calls, answered_calls,
+        dispositioned_calls, sales, talk_duration, quality_sum, quality_count
+    """
+    end = end or timezone.now()
+    group_by = list(group_by) + (['period'] if period else [])
+    filters = {}
+    if campaign_id:
+        filters['campaign_id'] = campaign_id
+    if agent_id:
+        filters['agent_id'] = agent_id
+    if exclude_unassigned_agent:
+        filters['agent__isnull'] = False
+
+    # raw [start, facts_from) + facts [facts_from, facts_until) + raw [facts_until, end]
+    sources = []
+    window = fact_window()
+    if window:
+        facts_from = max(ceil_hour(start), window[0])
+        facts_until = min(window[1], floor_hour(end))
+    if window and facts_from < facts_until:
+        sources.append(_raw_rows(Q(start_time__gte=start, start_time__lt=facts_from), group_by, period, filters))
+        sources.append(_fact_rows(facts_from, facts_until, group_by, period, filters))
+        sources.append(_raw_rows(Q(start_time__gte=facts_until, start_time__lte=end), group_by, period, filters))
+    else:
+        sources.append(_raw_rows(Q(start_time__gte=start, start_time__lte=end), group_by, period, filters))
+
+    merged = {}
+    for source in sources:
+        for row in source:
+            key = tuple(row[field] for field in group_by)
+            if key not in merged:
+                merged[key] = dict(zip(group_by, key), **{metric: 0 for metric in METRICS})
+            for metric in METRICS:
+                merged[key][metric] += row[metric] or 0
+    return list(merged.values())
+
+
+def call_totals(start, end=None, **kwargs):
+    """call_metrics() summed into one dict"""
+    rows = call_metrics(start, end, **kwargs)
+    return {metric: sum(row[metric] for row in rows) for metric in METRICS}
@@ -0,0 +1,35 @@
+"""
+Management Command: Backfill Call Facts
+
+Builds CallHourlyFact rows for past hours so reports over that history read
+the fact table instead of CallLog. The periodic refresh_call_facts task
+keeps them current afterwards.
+
+Usage:
+    python manage.py backfill_call_facts
+    python manage.py backfill_call_facts --days=90
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.facts import backfill_call_facts
+
+
+class Command(BaseCommand):
+    help = 'Build hourly call facts for past days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Days of history to build (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        start = timezone.now() - timedelta(days=options['days'])
+        hours = backfill_call_facts(start)
+        self.stdout.write(self.style.SUCCESS(f'Done: {hours} hours of call facts built'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-17 14:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0004_campaignstats_sales'),
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallHourlyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour (UTC)')),
+                ('total_calls', models.PositiveIntegerField(default=0)),
+                ('answered_calls', models.PositiveIntegerField(default=0)),
+                ('talk_duration', models.PositiveBigIntegerField(default=0, help_text='Sum of talk time in seconds')),
+                ('quality_sum', models.FloatField(default=0)),
+                ('quality_count', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('campaign', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='campaigns.campaign')),
+                ('disposition', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='campaigns.disposition')),
+            ],
+            options={
+                'verbose_name': 'Call Hourly Fact',
+                'verbose_name_plural': 'Call Hourly Facts',
+                'indexes': [models.Index(fields=['hour'], name='reports_fact_hour_idx'), models.Index(fields=['campaign', 'hour'], name='reports_fact_campaign_hour_idx'), models.Index(fields=['agent', 'hour'], name='reports_fact_agent_hour_idx')],
+            },
+        ),
+    ]
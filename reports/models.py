@@ -179,3 +179,40 @@ class Dashboard(TimeStampedModel):
     def __str__(self):
         return self.name
 
+
+class CallHourlyFact(models.Model):
+    """
+    CallLog pre-aggregated per hour, campaign, agent and disposition
+
+    Maintained by reports.facts: each hour touched by a CallLog change is
+    recomputed as a whole. Reporting reads these rows instead of scanning
+    CallLog (see reports.facts.call_metrics).
+    """
+    hour = models.DateTimeField(help_text="Start of the hour (UTC)")
+    campaign = models.ForeignKey(
+        'campaigns.Campaign', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    agent = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    disposition = models.ForeignKey(
+        'campaigns.Disposition', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    total_calls = models.PositiveIntegerField(default=0)
+    answered_calls = models.PositiveIntegerField(default=0)
+    talk_duration = models.PositiveBigIntegerField(default=0, help_text="Sum of talk time in seconds")
+    quality_sum = models.FloatField(default=0)
+    quality_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Call Hourly Fact"
+        verbose_name_plural = "Call Hourly Facts"
+        indexes = [
+            models.Index(fields=['hour'], name='reports_fact_hour_idx'),
+            models.Index(fields=['campaign', 'hour'], name='reports_fact_campaign_hour_idx'),
+            models.Index(fields=['agent', 'hour'], name='reports_fact_agent_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} campaign={self.campaign_id} agent={self.agent_id}: {self.total_calls}"
@@ -33,6 +33,20 @@ def agent_status_changed(sender, instance, created, **kwargs):
             
         logger.error(f"Error broadcasting agent status signal: {msg}")
 
+def broadcast_call_log(call_log):
+    """
+    Broadcast a call's current state to the dashboard
+    Also for CallLogs written with bulk_create, which sends no post_save
+    """
+    broadcast_call_event({
+        'id': call_log.id,
+        'campaign_id': call_log.campaign_id,
+        'status': call_log.call_status,
+        'agent_id': call_log.agent_id,
+        'number': call_log.called_number
+    }, campaign_id=call_log.campaign_id)
+
+
 @receiver(post_save, sender='calls.CallLog')
 def call_log_changed(sender, instance, created, **kwargs):
     """
@@ -40,13 +54,7 @@ def call_log_changed(sender, instance, created, **kwargs):
     """
     try:
         # Broadcast call event
-        broadcast_call_event({
-            'id': instance.id,
-            'campaign_id': instance.campaign_id,
-            'status': instance.call_status,
-            'agent_id': instance.agent_id,
-            'number': instance.called_number
-        }, campaign_id=instance.campaign_id)
+        broadcast_call_log(instance)
 
     except Exception as e:
         logger.error(f"Error broadcasting call signal: {e}")
@@ -0,0 +1,32 @@
+"""
+Reports Tasks - keep the hourly call fact table current
+"""
+
+import logging
+
+from celery import shared_task
+
+from campaigns.leases import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_call_facts(trailing_hours=0):
+    """
+    Rebuild the CallHourlyFact hours touched by CallLog changes, plus the
+    last `trailing_hours` hours whether or not they look changed
+
+    Schedule: Every 30 seconds (trailing 24 hours every 15 minutes)
+    """
+    from reports import facts
+
+    with single_flight('refresh_call_facts', ttl=120) as lease:
+        if lease is None:
+            return {'skipped': 'already running'}
+
+        try:
+            return {'hours_rebuilt': facts.refresh_call_facts(trailing_hours)}
+        except Exception as e:
+            logger.error(f"Error in refresh_call_facts: {e}", exc_info=True)
+            return {'error': str(e)}
@@ -13,6 +13,7 @@ from calls.models import CallLog
 from leads.models import Lead
 from django.contrib.auth.models import User
 
+from .facts import call_metrics, call_totals
 from .models import Dashboard, ReportSchedule
 
 try:
@@ -274,94 +275,60 @@ def export_report(request, report: str, fmt: str):
         return HttpResponseBadRequest('Unknown report')
 
     filters, start, end, campaign_id, agent_id = _common_filters(request)
+    scope = {'campaign_id': campaign_id, 'agent_id': agent_id}
 
-    # Build dataset based on report
+    # Build dataset based on report (hourly facts + raw rows for the open hour)
     columns = []
     rows = []
 
-    if report == 'campaign':
-        columns = ['Campaign', 'Calls', 'Answered', 'Sales', 'Avg Talk (s)', 'Total Talk (s)', 'Contact %', 'Conversion %']
-        data = (
-            CallLog.objects.filter(filters)
-            .values('campaign__name')
-            .annotate(
-                calls=Count('id'),
-                answered=Count('id', filter=Q(disposition__isnull=False)),
-                sales=Count('id', filter=Q(disposition__is_sale=True)),
-                avg_talk=Avg('talk_duration'),
-                total_talk=Sum('talk_duration'),
-            )
-        )
-        for r in data:
-            contact = (r['answered'] / r['calls'] * 100) if r['calls'] else 0
-            conv = (r['sales'] / r['answered'] * 100) if r['answered'] else 0
-            rows.append([
-                r['campaign__name'] or 'Unassigned', r['calls'], r['answered'], r['sales'],
-                int(r['avg_talk'] or 0), int(r['total_talk'] or 0), round(contact, 1), round(conv, 1)
-            ])
-    elif report == 'agent':
-        columns = ['Agent', 'Calls', 'Answered', 'Sales', 'Avg Talk (s)', 'Total Talk (s)', 'Contact %', 'Conversion %']
-        data = (
-            CallLog.objects.filter(filters)
-            .values('agent__username')
-            .annotate(
-                calls=Count('id'),
-                answered=Count('id', filter=Q(disposition__isnull=False)),
-                sales=Count('id', filter=Q(disposition__is_sale=True)),
-                avg_talk=Avg('talk_duration'),
-                total_talk=Sum('talk_duration'),
-            )
-        )
+    if report in ('campaign', 'agent'):
+        if report == 'campaign':
+            columns = ['Campaign', 'Calls', 'Answered', 'Sales', 'Avg Talk (s)', 'Total Talk (s)', 'Contact %', 'Conversion %']
+            key, model, label = 'campaign_id', Campaign, 'name'
+        else:
+            columns = ['Agent', 'Calls', 'Answered', 'Sales', 'Avg Talk (s)', 'Total Talk (s)', 'Contact %', 'Conversion %']
+            key, model, label = 'agent_id', User, 'username'
+        data = call_metrics(start, end, group_by=[key], **scope)
+        names = dict(model.objects.filter(id__in=[r[key] for r in data if r[key]]).values_list('id', label))
         for r in data:
-            contact = (r['answered'] / r['calls'] * 100) if r['calls'] else 0
-            conv = (r['sales'] / r['answered'] * 100) if r['answered'] else 0
+            answered = r['dispositioned_calls']
+            contact = (answered / r['total_calls'] * 100) if r['total_calls'] else 0
+            conv = (r['sales'] / answered * 100) if answered else 0
+            avg_talk = r['talk_duration'] / r['total_calls'] if r['total_calls'] else 0
             rows.append([
-                r['agent__username'] or 'Unassigned', r['calls'], r['answered'], r['sales'],
-                int(r['avg_talk'] or 0), int(r['total_talk'] or 0), round(contact, 1), round(conv, 1)
+                names.get(r[key]) or 'Unassigned', r['total_calls'], answered, r['sales'],
+                int(avg_talk), int(r['talk_duration']), round(contact, 1), round(conv, 1)
             ])
     elif report == 'call':
         columns = ['Date', 'Calls', 'Answered', 'Sales', 'Avg Talk (s)']
-        data = (
-            CallLog.objects.filter(filters)
-            .annotate(day=TruncDate('start_time'))
-            .values('day')
-            .annotate(
-                calls=Count('id'),
-                answered=Count('id', filter=Q(disposition__isnull=False)),
-                sales=Count('id', filter=Q(disposition__is_sale=True)),
-                avg_talk=Avg('talk_duration'),
-            )
-            .order_by('day')
-        )
+        data = sorted(call_metrics(start, end, period='day', **scope), key=lambda r: r['period'])
         for r in data:
-            rows.append([r['day'], r['calls'], r['answered'], r['sales'], int(r['avg_talk'] or 0)])
+            avg_talk = r['talk_duration'] / r['total_calls'] if r['total_calls'] else 0
+            rows.append([r['period'], r['total_calls'], r['dispositioned_calls'], r['sales'], int(avg_talk)])
     elif report == 'lead':
         columns = ['Disposition', 'Category', 'Count']
-        data = (
-            CallLog.objects.filter(filters)
-            .values('disposition__name', 'disposition__category')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+        data = call_metrics(start, end, group_by=['disposition_id'], **scope)
+        dispositions = Disposition.objects.in_bulk([r['disposition_id'] for r in data if r['disposition_id']])
+        counts = {}
         for r in data:
-            rows.append([r['disposition__name'] or 'None', r['disposition__category'] or '-', r['count']])
+            disposition = dispositions.get(r['disposition_id'])
+            label = (disposition.name, disposition.category) if disposition else (None, None)
+            counts[label] = counts.get(label, 0) + r['total_calls']
+        for (name, category), count in sorted(counts.items(), key=lambda item: -item[1]):
+            rows.append([name or 'None', category or '-', count])
     else:  # summary
-        totals = CallLog.objects.filter(filters).aggregate(
-            total_calls=Count('id'),
-            answered=Count('id', filter=Q(disposition__isnull=False)),
-            sales=Count('id', filter=Q(disposition__is_sale=True)),
-            avg_talk=Avg('talk_duration'),
-            total_talk=Sum('talk_duration'),
-        )
-        contact_rate = (totals['answered'] / totals['total_calls'] * 100) if totals['total_calls'] else 0
-        conversion_rate = (totals['sales'] / totals['answered'] * 100) if totals['answered'] else 0
+        totals = call_totals(start, end, **scope)
+        answered = totals['dispositioned_calls']
+        contact_rate = (answered / totals['total_calls'] * 100) if totals['total_calls'] else 0
+        conversion_rate = (totals['sales'] / answered * 100) if answered else 0
+        avg_talk = totals['talk_duration'] / totals['total_calls'] if totals['total_calls'] else 0
         columns = ['Metric', 'Value']
         rows = [
             ['Total Calls', totals['total_calls']],
-            ['Answered', totals['answered']],
+            ['Answered', answered],
             ['Sales', totals['sales']],
-            ['Avg Talk (s)', int(totals['avg_talk'] or 0)],
-            ['Total Talk (s)', int(totals['total_talk'] or 0)],
+            ['Avg Talk (s)', int(avg_talk)],
+            ['Total Talk (s)', int(totals['talk_duration'])],
             ['Contact %', round(contact_rate, 1)],
             ['Conversion %', round(conversion_rate, 1)],
         ]
@@ -1,5 +1,5 @@
 #!/usr/bin/env bash
-# Helper to start dialer background services: Celery, ARI worker, Hopper Fill, and Predictive Dialer
+# Helper to start dialer background services: Celery, ARI worker, Hopper Fill, and Dialer Engine
 # Usage: ./scripts/start_dialer_stack.sh
 
 set -e
@@ -38,9 +38,9 @@ env/bin/python manage.py hopper_fill &
 HOPPER_PID=$!
 sleep 1
 
-echo "Starting Predictive Dialer..."
-env/bin/python manage.py predictive_dialer &
-DIALER_PID=$!
+echo "Starting Dialer Engine..."
+env/bin/python manage.py dialer_engine &
+ENGINE_PID=$!
 sleep 1
 
 echo ""
@@ -53,7 +53,7 @@ echo "  • Celery worker    PID: $WORKER_PID"
 echo "  • Celery beat      PID: $BEAT_PID"
 echo "  • ARI worker       PID: $ARI_PID"
 echo "  • Hopper Fill      PID: $HOPPER_PID"
-echo "  • Predictive Dialer PID: $DIALER_PID"
+echo "  • Dialer Engine    PID: $ENGINE_PID"
 echo ""
 echo "📊 Access Points:"
 echo "  • Agent Dashboard:   http://localhost:8000/agents/dashboard/"
@@ -66,5 +66,5 @@ echo ""
 echo "Press Ctrl+C to stop all services."
 echo ""
 
-trap "echo ''; echo 'Stopping all services...'; kill $WORKER_PID $BEAT_PID $ARI_PID $HOPPER_PID $DIALER_PID 2>/dev/null; echo 'All services stopped.'" INT TERM
+trap "echo ''; echo 'Stopping all services...'; kill $WORKER_PID $BEAT_PID $ARI_PID $HOPPER_PID $ENGINE_PID 2>/dev/null; echo 'All services stopped.'" INT TERM
 wait
@@ -137,9 +137,10 @@ echo "2️⃣  Starting Hopper Fill..."
 start_service "Hopper Fill" "./env/bin/python -u manage.py hopper_fill"
 sleep 1
 
-# Start Predictive Dialer
-echo "3️⃣  Starting Predictive Dialer..."
-start_service "Predictive Dialer" "./env/bin/python -u manage.py predictive_dialer"
+# Start Dialer Engine (predictive pacing loops; replaces the legacy
+# predictive_dialer command and the 1s beat task - never run both)
+echo "3️⃣  Starting Dialer Engine..."
+start_service "Dialer Engine" "./env/bin/python -u manage.py dialer_engine"
 sleep 1
 
 # Start Celery Worker
@@ -7,6 +7,7 @@ echo "🛑 Stopping all autodialer processes..."
 pkill -9 -f "manage.py ari_worker"
 pkill -9 -f "manage.py hopper_fill"
 pkill -9 -f "manage.py predictive_dialer"
+pkill -9 -f "manage.py dialer_engine"
 pkill -9 -f "celery.*worker"
 pkill -9 -f "celery.*beat"
 pkill -9 -f "daphne"
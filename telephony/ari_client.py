@@ -0,0 +1,330 @@
+# telephony/ari_client.py
+"""
+Async ARI REST client with per-server keep-alive pools
+
+AriClient issues ARI requests over one aiohttp session per (event loop,
+server), so every call after the first reuses an open connection and any
+number of coroutines can have requests in flight at once, up to the pool
+size (ARI_ORIGINATE_CONCURRENCY). Each call has its own timeout; failures
+that cannot have reached Asterisk (connect errors) are retried for every
+method, and timeouts and 502/503/504 only for GET and DELETE, with
+exponential backoff and full jitter so a restarting Asterisk is not hit by
+every worker at the same instant.
+
+SyncAriClient is the facade for blocking callers (AsteriskService, the
+ARI worker's event handlers, Celery tasks, views). It runs the client on
+one background event loop per process and exposes requests-style
+get/post/delete, so code written against requests.Session works
+unchanged.
+
+Latencies are recorded per (server, method, route) in fixed-bucket
+histograms; ids in the path are folded into {id} so routes stay bounded.
+The ARI worker publishes latency_snapshot() with its pipeline report
+(telephony.event_pipeline), shown by campaigns.views.dialer_status_api.
+
+Usage:
+    session = get_sync_ari_client(base_url, username, password)
+    response = session.get(f"{base_url}/channels", timeout=5)
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from django.conf import settings
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'DELETE', 'HEAD')
+
+# Path segments that are part of the ARI route rather than an id
+ROUTE_WORDS = {
+    'ari', 'applications', 'asterisk', 'info', 'variable', 'channels', 'bridges',
+    'endpoints', 'recordings', 'live', 'stored', 'playbacks', 'sounds', 'deviceStates',
+    'moh', 'hold', 'ring', 'answer', 'mute', 'dtmf', 'redirect', 'dial', 'record',
+    'play', 'snoop', 'continue', 'silence', 'stop', 'externalMedia', 'create',
+    'addChannel', 'removeChannel', 'PJSIP', 'SIP', 'IAX2', 'Local',
+}
+
+
+def ari_settings():
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return {
+        'pool_size': autodialer_settings.get('ARI_ORIGINATE_CONCURRENCY', 32),
+        'timeout': autodialer_settings.get('ARI_REQUEST_TIMEOUT', 10),
+        'retries': autodialer_settings.get('ARI_REQUEST_RETRIES', 2),
+    }
+
+
+def route_of(path: str) -> str:
+    """'/channels/1700.12/moh' -> '/channels/{id}/moh'"""
+    segments = path.split('?', 1)[0].strip('/').split('/')
+    return '/' + '/'.join(s if s in ROUTE_WORDS else '{id}' for s in segments)
+
+
+class AriError(Exception):
+    """ARI request failed without a response (connect error, timeout)"""
+
+
+class _Retry(Exception):
+    """A response worth retrying (gateway errors on idempotent requests)"""
+
+
+@dataclass
+class AriResponse:
+    """The parts of a requests.Response existing callers use"""
+    status_code: int
+    text: str
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text) if self.text else None
+
+
+# ============================================================================
+# Latency histograms
+# ============================================================================
+
+class LatencyHistogram:
+    """Counts of request latencies per bucket, plus count/sum/max"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the given fraction; None past the last bound"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return None
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ['inf'], self.buckets)),
+        }
+
+
+_histograms: Dict[tuple, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def record_latency(server: str, method: str, path: str, elapsed_ms: float, error: bool = False):
+    key = (server, method, route_of(path))
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        histogram.record(elapsed_ms, error)
+
+
+def latency_snapshot(reset: bool = False) -> Dict:
+    """{'server METHOD route': histogram dict} for this process"""
+    with _histograms_lock:
+        snapshot = {f"{server} {method} {route}": h.as_dict() for (server, method, route), h in _histograms.items()}
+        if reset:
+            _histograms.clear()
+    return snapshot
+
+
+# ============================================================================
+# Async client
+# ============================================================================
+
+class AriClient:
+    """
+    ARI requests over one keep-alive aiohttp session
+
+    Must be used on the event loop it was created on; SyncAriClient
+    runs one on its background loop.
+    """
+
+    BACKOFF_BASE = 0.1
+    BACKOFF_CAP = 2.0
+
+    def __init__(self, base_url: str, username: str, password: str,
+                 pool_size: int = None, timeout: float = None, retries: int = None):
+        defaults = ari_settings()
+        self.base_url = base_url.rstrip('/')
+        self.label = self.base_url.split('://', 1)[-1].split('/', 1)[0]
+        self.auth = aiohttp.BasicAuth(username, password)
+        self.pool_size = pool_size or defaults['pool_size']
+        self.timeout = timeout or defaults['timeout']
+        self.retries = defaults['retries'] if retries is None else retries
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(auth=self.auth, connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _path(self, url_or_path: str) -> str:
+        if url_or_path.startswith(self.base_url):
+            return url_or_path[len(self.base_url):]
+        return url_or_path
+
+    async def request(self, method: str, url_or_path: str, json=None, params=None,
+                      timeout: float = None, retries: int = None) -> AriResponse:
+        """
+        One ARI request, retried per the rules in the module docstring
+
+        Raises AriError when no response was received after the last attempt;
+        HTTP error statuses are returned, not raised.
+        """
+        method = method.upper()
+        path = self._path(url_or_path)
+        retries = self.retries if retries is None else retries
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                async with self.session.request(
+                    method, f"{self.base_url}{path}", json=json, params=params, timeout=client_timeout
+                ) as response:
+                    text = await response.text()
+                elapsed_ms = (time.monotonic() - started) * 1000
+                record_latency(self.label, method, path, elapsed_ms, error=response.status >= 500)
+                if response.status in RETRY_STATUSES and method in IDEMPOTENT_METHODS and attempt < retries:
+                    raise _Retry(f"HTTP {response.status}")
+                return AriResponse(response.status, text, round(elapsed_ms, 2))
+            except _Retry as e:
+                reason = str(e)
+            except aiohttp.ClientConnectorError as e:
+                # Never reached Asterisk: safe to retry any method
+                record_latency(self.label, method, path, (time.monotonic() - started) * 1000, error=True)
+                if attempt >= retries:
+                    raise AriError(f"{method} {path}: {e}") from e
+                reason = str(e)
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                record_latency(self.label, method, path, (time.monotonic() - started) * 1000, error=True)
+                if method not in IDEMPOTENT_METHODS or attempt >= retries:
+                    raise AriError(f"{method} {path}: {e or 'timed out'}") from e
+                reason = str(e) or 'timed out'
+
+            delay = random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            logger.warning(f"ARI {method} {path} on {self.label} failed ({reason}), retry {attempt}/{retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def get(self, url_or_path, **kwargs) -> AriResponse:
+        return await self.request('GET', url_or_path, **kwargs)
+
+    async def post(self, url_or_path, **kwargs) -> AriResponse:
+        return await self.request('POST', url_or_path, **kwargs)
+
+    async def delete(self, url_or_path, **kwargs) -> AriResponse:
+        return await self.request('DELETE', url_or_path, **kwargs)
+
+
+# ============================================================================
+# Sync facade
+# ============================================================================
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_sync_clients: Dict[tuple, 'SyncAriClient'] = {}
+_sync_clients_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop the sync facade runs its requests on"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='ari-client', daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+class SyncAriClient:
+    """
+    Blocking requests-style facade over AriClient
+
+    Safe to share between threads; concurrent calls share one pool.
+    """
+
+    def __init__(self, base_url: str, username: str, password: str):
+        self.loop = _background_loop()
+        self.client = AriClient(base_url, username, password)
+
+    def request(self, method: str, url_or_path: str, json=None, params=None, timeout: float = None,
+                retries: int = None, **_requests_kwargs) -> AriResponse:
+        # auth= and other requests-only arguments are accepted and ignored
+        future = asyncio.run_coroutine_threadsafe(
+            self.client.request(method, url_or_path, json=json, params=params, timeout=timeout, retries=retries),
+            self.loop,
+        )
+        return future.result()
+
+    def get(self, url_or_path, **kwargs) -> AriResponse:
+        return self.request('GET', url_or_path, **kwargs)
+
+    def post(self, url_or_path, **kwargs) -> AriResponse:
+        return self.request('POST', url_or_path, **kwargs)
+
+    def delete(self, url_or_path, **kwargs) -> AriResponse:
+        return self.request('DELETE', url_or_path, **kwargs)
+
+
+def get_sync_ari_client(base_url: str, username: str, password: str) -> SyncAriClient:
+    """Shared SyncAriClient per server credentials"""
+    key = (base_url, username, password)
+    client = _sync_clients.get(key)
+    if client is None:
+        with _sync_clients_lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = _sync_clients[key] = SyncAriClient(base_url, username, password)
+    return client
@@ -0,0 +1,255 @@
+# telephony/event_journal.py
+"""
+ARI event journal - raw event stream recording for replay
+
+When ARI_JOURNAL is 'file' or 'redis', the ARI workers hand every raw
+WebSocket message to the journal with its receive time, before any
+parsing or filtering. record() only appends to an in-memory buffer; a
+background thread writes the buffer out once a second, so journalling
+never slows the reader down. If the writer falls behind by more than
+BUFFER_LIMIT events, new events are dropped and counted rather than
+blocking the reader.
+
+File journals are JSON lines, one event per line, rotated at
+ARI_JOURNAL_MAX_BYTES; rotated files are gzipped and the newest
+ARI_JOURNAL_KEEP are kept. Redis journals are one capped stream.
+
+read_journal() yields the events back in order; the replay_ari_journal
+command feeds them to a worker.
+
+Data Structures:
+- ari:journal (Stream) - fields t (receive epoch seconds), s (server id), m (raw message)
+- {ARI_JOURNAL_PATH}/ari-events.jsonl - current file; lines {"t": ..., "s": ..., "m": "..."}
+- {ARI_JOURNAL_PATH}/ari-events-YYYYmmdd-HHMMSS.jsonl.gz - rotated files
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'ari:journal'
+CURRENT_FILE = 'ari-events.jsonl'
+BUFFER_LIMIT = 100000
+FLUSH_INTERVAL = 1.0
+
+# (receive epoch seconds, server id, raw message)
+JournalEntry = Tuple[float, Optional[int], str]
+
+
+def journal_settings():
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return {
+        'backend': autodialer_settings.get('ARI_JOURNAL', ''),
+        'path': autodialer_settings.get('ARI_JOURNAL_PATH', 'archive/ari_journal'),
+        'max_bytes': autodialer_settings.get('ARI_JOURNAL_MAX_BYTES', 64 * 1024 * 1024),
+        'keep': autodialer_settings.get('ARI_JOURNAL_KEEP', 20),
+        'maxlen': autodialer_settings.get('ARI_JOURNAL_MAXLEN', 1000000),
+    }
+
+
+class EventJournal:
+    """
+    Buffered, append-only record of raw ARI messages
+
+    Usage:
+        journal = get_journal()          # None when ARI_JOURNAL is off
+        if journal:
+            journal.record(server.id, message)
+    """
+
+    def __init__(self):
+        self.buffer: List[JournalEntry] = []
+        self.lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, server_id, message):
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', 'replace')
+        with self.lock:
+            if len(self.buffer) >= BUFFER_LIMIT:
+                self.dropped += 1
+                return
+            self.buffer.append((time.time(), server_id, message))
+            self.recorded += 1
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self.lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='ari-journal', daemon=True)
+        atexit.register(self.flush)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if not batch:
+            return
+        try:
+            self.write(batch)
+        except Exception as e:
+            logger.error(f"ARI journal: lost {len(batch)} events: {e}")
+            with self.lock:
+                self.dropped += len(batch)
+
+    def write(self, batch: List[JournalEntry]):
+        raise NotImplementedError
+
+
+class FileJournal(EventJournal):
+    """JSON-lines journal rotated by size, old files gzipped"""
+
+    def __init__(self, path, max_bytes, keep):
+        super().__init__()
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.keep = keep
+
+    def write(self, batch):
+        self.path.mkdir(parents=True, exist_ok=True)
+        current = self.path / CURRENT_FILE
+        lines = ''.join(json.dumps({'t': t, 's': s, 'm': m}, separators=(',', ':')) + '\n' for t, s, m in batch)
+        with open(current, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        if current.stat().st_size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        current = self.path / CURRENT_FILE
+        rotated = self.path / f"ari-events-{timezone.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+        os.replace(current, rotated)
+        with open(rotated, 'rb') as src, gzip.open(f"{rotated}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+
+        old = sorted(self.path.glob('ari-events-*.jsonl.gz'))
+        for stale in old[:max(0, len(old) - self.keep)]:
+            stale.unlink()
+        logger.info(f"ARI journal rotated to {rotated.name}.gz")
+
+
+class RedisJournal(EventJournal):
+    """Capped Redis stream journal"""
+
+    def __init__(self, maxlen):
+        super().__init__()
+        self.maxlen = maxlen
+
+    def write(self, batch):
+        from django_redis import get_redis_connection
+
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        for t, s, m in batch:
+            pipe.xadd(STREAM_KEY, {'t': repr(t), 's': '' if s is None else s, 'm': m},
+                      maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> Optional[EventJournal]:
+    """The process-wide journal, or None when ARI_JOURNAL is off"""
+    global _journal
+    if _journal is None:
+        options = journal_settings()
+        if options['backend'] not in ('file', 'redis'):
+            return None
+        with _journal_lock:
+            if _journal is None:
+                if options['backend'] == 'redis':
+                    _journal = RedisJournal(options['maxlen'])
+                else:
+                    _journal = FileJournal(options['path'], options['max_bytes'], options['keep'])
+                logger.info(f"ARI journal enabled ({options['backend']})")
+    return _journal
+
+
+# ============================================================================
+# Reading
+# ============================================================================
+
+def _read_file(path: Path) -> Iterator[JournalEntry]:
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A journal cut off mid-line by a crash
+                logger.warning(f"Skipping bad journal line in {path.name}")
+                continue
+            yield entry['t'], entry.get('s'), entry['m']
+
+
+def journal_files(path) -> List[Path]:
+    """A file, or a journal directory's files oldest first (rotated, then current)"""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    files = sorted(path.glob('ari-events-*.jsonl.gz'))
+    if (path / CURRENT_FILE).exists():
+        files.append(path / CURRENT_FILE)
+    return files
+
+
+def _read_stream(start='-', end='+', batch=1000) -> Iterator[JournalEntry]:
+    from django_redis import get_redis_connection
+
+    r = get_redis_connection("default")
+    while True:
+        entries = r.xrange(STREAM_KEY, min=start, max=end, count=batch)
+        for entry_id, fields in entries:
+            server_id = fields.get(b's')
+            yield float(fields[b't']), int(server_id) if server_id else None, fields[b'm'].decode()
+        if len(entries) < batch:
+            return
+        start = f"({entries[-1][0].decode()}"
+
+
+def read_journal(source, start=None, end=None) -> Iterator[JournalEntry]:
+    """
+    Journal entries in receive order
+
+    Args:
+        source: 'redis' for the stream, else a journal file or directory
+        start, end: optional epoch-second bounds on the receive time
+    """
+    if source == 'redis':
+        entries = _read_stream(
+            f"{int(start * 1000)}" if start else '-',
+            f"{int(end * 1000)}" if end else '+',
+        )
+    else:
+        entries = (entry for path in journal_files(source) for entry in _read_file(path))
+
+    for entry in entries:
+        if start and entry[0] < start:
+            continue
+        if end and entry[0] > end:
+            return
+        yield entry
@@ -0,0 +1,237 @@
+# telephony/event_pipeline.py
+"""
+ARI event pipeline - ordered, sharded event handling
+
+The WebSocket readers only parse and enqueue. Each event is routed to one
+of N shards by its channel id (or bridge id for bridge-only events), so
+every event for a channel lands on the same shard and is handled in the
+order Asterisk sent it, while events for different channels are handled
+in parallel. Each shard is a bounded asyncio.Queue drained by one worker
+that runs the blocking handler (ORM, Redis, ARI) in a thread pool sized
+to the shard count. A full queue blocks the reader, which stops reading
+the socket - backpressure instead of unbounded memory.
+
+Lag is measured from the moment the reader received the event to the
+moment its handler returned, on this host's monotonic clock.
+
+Data Structures:
+- ari_worker:status:{worker_id} (cache) - last pipeline report (depths, lag, ARI request latency)
+- dialer:pool:ari_worker:workers (ZSET) - live ARI workers (campaigns.sharding.WorkerRegistry)
+"""
+
+import asyncio
+import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from campaigns.leases import get_worker_id
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the smoothed lag
+LAG_SMOOTHING = 0.1
+
+
+def ari_latency(reset: bool = False) -> Dict:
+    """This process's ARI REST latency histograms (empty without aiohttp)"""
+    try:
+        from telephony.ari_client import latency_snapshot
+    except ImportError:
+        return {}
+    return latency_snapshot(reset=reset)
+
+
+def shard_key(server_id, event: Dict) -> str:
+    """Ordering key of an event: its channel, else its bridge, else the server"""
+    channel_id = (event.get('channel') or {}).get('id')
+    if channel_id:
+        return f"{server_id}:channel:{channel_id}"
+    bridge_id = (event.get('bridge') or {}).get('id')
+    if bridge_id:
+        return f"{server_id}:bridge:{bridge_id}"
+    return f"{server_id}:global"
+
+
+@dataclass
+class ShardStats:
+    """Counters for one shard; lag in seconds"""
+    handled: int = 0
+    errors: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+    avg_lag: float = 0.0
+
+    def record(self, lag: float, error: bool = False):
+        self.handled += 1
+        if error:
+            self.errors += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.avg_lag = lag if self.handled == 1 else self.avg_lag + LAG_SMOOTHING * (lag - self.avg_lag)
+
+    def as_dict(self) -> Dict:
+        return {
+            'handled': self.handled,
+            'errors': self.errors,
+            'last_lag_ms': round(self.last_lag * 1000, 2),
+            'avg_lag_ms': round(self.avg_lag * 1000, 2),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+        }
+
+
+class EventPipeline:
+    """
+    Shards events onto ordered worker queues
+
+    Usage:
+        pipeline = EventPipeline(handler)     # handler(server, event), blocking
+        await pipeline.start()
+        await pipeline.submit(server, event)  # waits while the shard's queue is full
+        ...
+        await pipeline.stop()
+    """
+
+    def __init__(self, handler: Callable, shards: int = None, queue_size: int = None,
+                 report_interval: float = 30.0, pool: str = 'ari_worker'):
+        pipeline_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+        self.handler = handler
+        self.shards = shards or pipeline_settings.get('ARI_EVENT_SHARDS', 8)
+        self.queue_size = queue_size or pipeline_settings.get('ARI_EVENT_QUEUE_SIZE', 1000)
+        self.report_interval = report_interval
+        self.pool = pool
+        self.worker_id = get_worker_id()
+        self.queues: List[asyncio.Queue] = []
+        self.stats: List[ShardStats] = []
+        self.blocked_submits = 0
+        self.tasks: List[asyncio.Task] = []
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.shards, thread_name_prefix='ari-shard')
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.shards)]
+        self.stats = [ShardStats() for _ in range(self.shards)]
+        self.tasks = [asyncio.create_task(self._drain(index)) for index in range(self.shards)]
+        self.tasks.append(asyncio.create_task(self._report_loop()))
+        logger.info(f"ARI event pipeline: {self.shards} shards, queue size {self.queue_size}")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._leave)
+        self.executor.shutdown(wait=False)
+
+    def shard_for(self, key: str) -> int:
+        # crc32 rather than hash(): stable across processes and restarts
+        return zlib.crc32(key.encode()) % self.shards
+
+    async def submit(self, server, event: Dict):
+        """Queue an event on its shard; waits for room when the shard is full"""
+        queue = self.queues[self.shard_for(shard_key(server.id, event))]
+        item = (time.monotonic(), server, event)
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.blocked_submits += 1
+            await queue.put(item)
+
+    async def join(self):
+        """Wait until every queued event has been handled"""
+        await asyncio.gather(*(queue.join() for queue in self.queues))
+
+    async def _drain(self, index: int):
+        queue = self.queues[index]
+        stats = self.stats[index]
+        loop = asyncio.get_running_loop()
+        while True:
+            received, server, event = await queue.get()
+            try:
+                error = await loop.run_in_executor(self.executor, self._handle, server, event)
+                stats.record(time.monotonic() - received, error)
+            finally:
+                queue.task_done()
+
+    def _handle(self, server, event: Dict) -> bool:
+        """Run the handler in a shard thread; returns True if it raised"""
+        close_old_connections()
+        try:
+            self.handler(server, event)
+            return False
+        except Exception as e:
+            logger.error(f"Error handling ARI event {event.get('type')}: {e}", exc_info=True)
+            return True
+
+    # ========================================================================
+    # Metrics
+    # ========================================================================
+
+    def snapshot(self, reset_latency: bool = False) -> Dict:
+        """Queue depths and lag per shard, plus totals and the handlers' ARI request latencies"""
+        shards = []
+        for index, (queue, stats) in enumerate(zip(self.queues, self.stats)):
+            shard = stats.as_dict()
+            shard['shard'] = index
+            shard['depth'] = queue.qsize()
+            shards.append(shard)
+        return {
+            'worker_id': self.worker_id,
+            'timestamp': timezone.now().isoformat(),
+            'queue_size': self.queue_size,
+            'depth': sum(shard['depth'] for shard in shards),
+            'handled': sum(shard['handled'] for shard in shards),
+            'errors': sum(shard['errors'] for shard in shards),
+            'blocked_submits': self.blocked_submits,
+            'max_lag_ms': max((shard['max_lag_ms'] for shard in shards), default=0.0),
+            'shards': shards,
+            'ari_latency': ari_latency(reset=reset_latency),
+        }
+
+    def report(self) -> Dict:
+        """Log the snapshot, then reset the per-period maxima and latencies"""
+        status = self.snapshot(reset_latency=True)
+        for stats in self.stats:
+            stats.max_lag = 0.0
+        self.blocked_submits = 0
+
+        logger.info(
+            f"ARI event pipeline: depth {status['depth']}, {status['handled']} handled, "
+            f"{status['errors']} errors, max lag {status['max_lag_ms']}ms, "
+            f"{status['blocked_submits']} blocked submits"
+        )
+        return status
+
+    def _publish(self, status: Dict):
+        from campaigns.sharding import WorkerRegistry
+
+        ttl = int(self.report_interval * 3)
+        try:
+            cache.set(f"{self.pool}:status:{self.worker_id}", status, ttl)
+            WorkerRegistry(self.pool).heartbeat(self.worker_id, ttl)
+        except Exception as e:
+            logger.warning(f"ARI event pipeline: could not publish metrics: {e}")
+
+    def _leave(self):
+        from campaigns.sharding import WorkerRegistry
+
+        try:
+            WorkerRegistry(self.pool).leave(self.worker_id)
+            cache.delete(f"{self.pool}:status:{self.worker_id}")
+        except Exception as e:
+            logger.warning(f"ARI event pipeline: could not leave pool: {e}")
+
+    async def _report_loop(self):
+        loop = asyncio.get_running_loop()
+        # Publishing blocks on Redis; keep it off the shard threads
+        await loop.run_in_executor(None, self._publish, self.snapshot())
+        while True:
+            await asyncio.sleep(self.report_interval)
+            await loop.run_in_executor(None, self._publish, self.report())
@@ -0,0 +1,763 @@
+# telephony/fake_ari.py
+"""
+Stand-in ARI server for replay and load tests
+
+StubAriRestServer answers the ARI REST routes AsteriskService calls with
+canned, well-formed responses so event handlers run their full code path
+without a PBX: POSTs that create something (channels, bridges, recordings)
+return a fresh id, GETs return an empty-but-valid body for the route, and
+DELETEs return 204. Every request is counted per route.
+
+FakeAriServer is a small simulated PBX on the same footing: it keeps the
+channels and bridges it is asked to create, plays each originated call
+through ring, answer (or busy / no answer), AMD and talk time drawn from a
+CallProfile, and pushes the matching ARI events to every client of its
+/ari/events WebSocket - REST and events on one port, stdlib only. Timings
+along the way (originate to StasisStart, answer to agent connect) are
+recorded for the ari_load_test command.
+
+Usage:
+    stub = StubAriRestServer().start()     # 127.0.0.1 on a free port
+    server.ari_host, server.ari_port = stub.host, stub.port
+    ...
+    stub.stop()
+
+    pbx = FakeAriServer(CallProfile(time_scale=10)).start()
+    channel_id, bridge_id = pbx.seat_agent('1001')     # an agent waiting in a bridge
+"""
+
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import queue
+import random
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# RFC 6455 handshake constant
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _route(path):
+    """'/channels/1700.12/moh' -> '/channels/{id}/moh'; resource ids sit at odd positions"""
+    segments = path.strip('/').split('/')
+    if segments[0] == 'asterisk':
+        return '/' + '/'.join(segments)
+    if segments[0] in ('endpoints', 'recordings') and len(segments) > 1:
+        # /endpoints/{tech}/{resource}, /recordings/{live|stored}/{name}
+        return '/' + '/'.join(segments[:2] + ['{id}'] * (len(segments) > 2) + segments[3:])
+    return '/' + '/'.join('{id}' if i % 2 else s for i, s in enumerate(segments))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the real ARI
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            return {}
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        path = url.path
+        if path.startswith('/ari'):
+            path = path[len('/ari'):]
+        body = self._read_body() if method == 'POST' else {}
+        stub = self.server.stub
+        route = _route(path)
+        stub.count(method, route)
+        status, payload = stub.respond(method, path, route, body, dict(parse_qsl(url.query)))
+        self._reply(status, payload)
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.server.stub.serve_events(self)
+            return
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+
+class StubAriRestServer:
+    """Threaded HTTP server with canned ARI REST responses"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.host, self.port = self.httpd.server_address[:2]
+        self.requests = Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-ari', daemon=True)
+        self._thread.start()
+        logger.info(f"Stub ARI REST endpoint on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, method, route):
+        with self._lock:
+            self.requests[f"{method} {route}"] += 1
+
+    def next_id(self, prefix):
+        with self._lock:
+            return f"{prefix}-{next(self._ids)}"
+
+    def serve_events(self, handler):
+        """The canned stub has no event stream"""
+        handler._reply(404, {'message': 'No event stream on the REST stub'})
+
+    def respond(self, method, path, route, body, query):
+        """(status, JSON body) for one request"""
+        if method == 'DELETE':
+            return 204, None
+        if method == 'POST':
+            if route == '/channels':
+                return 200, {'id': body.get('channelId') or self.next_id('stub-channel'), 'state': 'Down'}
+            if route == '/bridges':
+                return 200, {'id': body.get('bridgeId') or self.next_id('stub-bridge'), 'bridge_type': 'mixing', 'channels': []}
+            if route == '/channels/{id}/record':
+                return 201, {'name': body.get('name') or self.next_id('stub-recording'), 'state': 'recording'}
+            return 204, None
+        # GET
+        if route in ('/channels', '/endpoints', '/applications', '/bridges'):
+            return 200, []
+        if route == '/channels/{id}':
+            return 200, {'id': path.rsplit('/', 1)[-1], 'state': 'Up', 'caller': {}, 'connected': {}}
+        if route == '/channels/{id}/variable':
+            return 200, {'value': ''}
+        if route.startswith('/endpoints/'):
+            return 200, {'resource': path.rsplit('/', 1)[-1], 'state': 'online', 'channel_ids': []}
+        if route == '/asterisk/info':
+            return 200, {'system': {'version': 'stub'}, 'status': {}}
+        return 200, {}
+
+
+class LatencyRecorder:
+    """Durations per key (event type, measurement), from any thread"""
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, key, seconds, error=False):
+        with self.lock:
+            self.durations[key].append(seconds * 1000)
+            if error:
+                self.errors[key] += 1
+
+    def rows(self):
+        with self.lock:
+            items = [(key, sorted(durations)) for key, durations in self.durations.items()]
+        rows = []
+        for key, ordered in sorted(items, key=lambda item: -len(item[1])):
+            rows.append({
+                'type': key,
+                'count': len(ordered),
+                'errors': self.errors[key],
+                'avg_ms': round(sum(ordered) / len(ordered), 2),
+                'p50_ms': round(ordered[len(ordered) // 2], 2),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                'max_ms': round(ordered[-1], 2),
+            })
+        return rows
+
+
+# ============================================================================
+# Events WebSocket
+# ============================================================================
+
+def _ws_frame(opcode, payload):
+    """One unmasked, unfragmented server frame"""
+    length = len(payload)
+    if length < 126:
+        header = bytes([0x80 | opcode, length])
+    elif length < 65536:
+        header = bytes([0x80 | opcode, 126]) + length.to_bytes(2, 'big')
+    else:
+        header = bytes([0x80 | opcode, 127]) + length.to_bytes(8, 'big')
+    return header + payload
+
+
+def _ws_read_frame(rfile):
+    """(opcode, payload) of the next client frame; None when the socket closed"""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode, masked, length = head[0] & 0x0F, head[1] & 0x80, head[1] & 0x7F
+    if length == 126:
+        length = int.from_bytes(rfile.read(2), 'big')
+    elif length == 127:
+        length = int.from_bytes(rfile.read(8), 'big')
+    mask = rfile.read(4) if masked else b''
+    payload = rfile.read(length)
+    if masked:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+class _EventSocket:
+    """
+    One /ari/events client
+
+    Frames are queued by send() from any thread and written by the
+    socket's own writer thread; the request handler thread reads, so
+    pings from the client are answered and a close ends the session.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.outbox = queue.Queue()
+        self.closed = threading.Event()
+
+    def send(self, payload: bytes, opcode: int = 0x1):
+        if not self.closed.is_set():
+            self.outbox.put(_ws_frame(opcode, payload))
+
+    def close(self):
+        self.closed.set()
+        self.outbox.put(None)
+        try:
+            self.handler.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _write(self):
+        while True:
+            frame = self.outbox.get()
+            if frame is None:
+                return
+            try:
+                self.handler.wfile.write(frame)
+            except OSError:
+                self.closed.set()
+                return
+
+    def serve(self):
+        """Handshake, then read client frames until either side closes"""
+        handler = self.handler
+        key = handler.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        handler.send_response(101, 'Switching Protocols')
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.close_connection = True
+
+        writer = threading.Thread(target=self._write, name='fake-ari-ws', daemon=True)
+        writer.start()
+        try:
+            while not self.closed.is_set():
+                try:
+                    frame = _ws_read_frame(handler.rfile)
+                except OSError:
+                    break
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == 0x8:
+                    self.send(payload[:2], 0x8)
+                    break
+                if opcode == 0x9:
+                    self.send(payload, 0xA)
+        finally:
+            self.closed.set()
+            self.outbox.put(None)
+            writer.join(timeout=1)
+
+
+# ============================================================================
+# Simulated PBX
+# ============================================================================
+
+@dataclass
+class CallProfile:
+    """Call outcomes and timings for FakeAriServer, in seconds of simulated time"""
+    answer_rate: float = 0.30           # P(dial is answered), human or machine
+    busy_rate: float = 0.05             # P(dial is busy)
+    amd_rate: float = 0.15              # P(answer is a machine)
+    ring_mean: float = 12.0             # seconds to answer
+    ring_timeout: float = 30.0          # seconds before a no-answer is released
+    amd_detect_time: float = 3.0        # seconds AMD needs before the call enters Stasis
+    talk_mean: float = 180.0
+    talk_sd: float = 120.0
+    agent_ring_mean: float = 1.0        # seconds for an agent's phone to answer
+    patience: float = 10.0              # seconds an answered call waits for an agent
+    time_scale: float = 1.0             # 10 = run ten times faster than real time
+    seed: Optional[int] = 42
+
+
+class _Channel:
+    """A channel the fake PBX is playing through its lifecycle"""
+
+    def __init__(self, channel_id, endpoint, kind, variables, args, caller):
+        self.id = channel_id
+        self.endpoint = endpoint
+        self.kind = kind                # 'customer' or 'agent'
+        self.state = 'Down'
+        self.vars = dict(variables)
+        self.args = args
+        self.caller = caller
+        self.created = _ari_time()
+        self.originated = time.monotonic()
+        self.answered = None
+        self.stasis = None
+        self.connected = None
+        self.machine = False
+        self.bridge = None
+        self.alive = True
+
+    def json(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': f"{self.endpoint}-{self.id}",
+            'state': self.state,
+            'caller': {'name': '', 'number': self.caller},
+            'connected': {'name': '', 'number': ''},
+            'accountcode': '',
+            'dialplan': {'context': 'from-campaign', 'exten': 's', 'priority': 1},
+            'creationtime': self.created,
+            'language': 'en',
+            'channelvars': dict(self.vars),
+        }
+
+
+def _ari_time():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0000'
+
+
+class FakeAriServer(StubAriRestServer):
+    """
+    Simulated Asterisk: stateful ARI REST plus the events WebSocket
+
+    Customer calls (any endpoint but PJSIP/...) ring, then are busy, go
+    unanswered until ring_timeout, or answer; answered calls run AMD when
+    the originate carried AMD_ENABLED, then enter Stasis. Once a customer
+    shares a bridge with an answered agent channel it is connected and
+    hangs up after a lognormal talk time; an answered customer nobody
+    connects hangs up after `patience`. PJSIP originates are agents: they
+    answer after agent_ring_mean and enter Stasis.
+
+    Capacity is unlimited; `active` and `peak_active` count the customer
+    calls in flight so the driver can hold a target concurrency.
+    """
+
+    def __init__(self, profile: CallProfile = None, host='127.0.0.1', port=0, application='autodialer'):
+        super().__init__(host, port)
+        self.profile = profile or CallProfile()
+        self.application = application
+        self.rng = random.Random(self.profile.seed)
+        self.channels: Dict[str, _Channel] = {}
+        self.bridges: Dict[str, Dict] = {}
+        self.endpoints = set()
+        self.sockets = []
+        self.outcomes = Counter()
+        self.latencies = LatencyRecorder()
+        self.call_times: Dict[str, tuple] = {}     # customer channel id -> (originated, StasisStart)
+        self.seats: Dict[str, tuple] = {}          # extension -> (channel id, bridge id)
+        self.active = 0
+        self.peak_active = 0
+        self._state = threading.RLock()
+        self._timers = []
+        self._timer_ids = itertools.count()
+        self._timer_wakeup = threading.Condition()
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run_timers, name='fake-ari-timers', daemon=True).start()
+        return super().start()
+
+    def stop(self):
+        with self._timer_wakeup:
+            self._running = False
+            self._timer_wakeup.notify()
+        for event_socket in list(self.sockets):
+            event_socket.close()
+        super().stop()
+
+    # ========================================================================
+    # Timers
+    # ========================================================================
+
+    def _after(self, seconds, callback, *args):
+        """Run callback(*args) on the timer thread after `seconds` of simulated time"""
+        due = time.monotonic() + seconds / self.profile.time_scale
+        with self._timer_wakeup:
+            heapq.heappush(self._timers, (due, next(self._timer_ids), callback, args))
+            self._timer_wakeup.notify()
+
+    def _run_timers(self):
+        while True:
+            with self._timer_wakeup:
+                while self._running and (not self._timers or self._timers[0][0] > time.monotonic()):
+                    self._timer_wakeup.wait(self._timers[0][0] - time.monotonic() if self._timers else None)
+                if not self._running:
+                    return
+                _, _, callback, args = heapq.heappop(self._timers)
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Fake ARI timer {callback.__name__} failed: {e}", exc_info=True)
+
+    # ========================================================================
+    # Events
+    # ========================================================================
+
+    def serve_events(self, handler):
+        event_socket = _EventSocket(handler)
+        with self._state:
+            self.sockets.append(event_socket)
+        logger.info(f"Fake ARI: events client connected ({len(self.sockets)} open)")
+        try:
+            event_socket.serve()
+        finally:
+            with self._state:
+                self.sockets.remove(event_socket)
+
+    def emit(self, event_type, **fields):
+        """Push one ARI event to every events client"""
+        event = {
+            'type': event_type,
+            'timestamp': _ari_time(),
+            'application': self.application,
+            'asterisk_id': 'fake-ari',
+            **fields,
+        }
+        payload = json.dumps(event).encode()
+        with self._state:
+            for event_socket in self.sockets:
+                event_socket.send(payload)
+
+    # ========================================================================
+    # Call lifecycle
+    # ========================================================================
+
+    def _talk_time(self) -> float:
+        """Lognormal talk time with the profile's mean and standard deviation"""
+        mean, sd = self.profile.talk_mean, self.profile.talk_sd
+        sigma2 = math.log(1 + (sd / mean) ** 2)
+        return self.rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+    def _originate(self, body):
+        endpoint = body.get('endpoint') or ''
+        if not endpoint:
+            return 400, {'message': 'Endpoint must be specified'}
+        args = [arg for arg in (body.get('appArgs') or '').split(',') if arg]
+        kind = 'agent' if endpoint.startswith('PJSIP/') else 'customer'
+        channel_id = body.get('channelId') or self.next_id(f"fake-{kind}")
+
+        with self._state:
+            channel = _Channel(channel_id, endpoint, kind, body.get('variables') or {}, args,
+                               body.get('callerId') or '')
+            self.channels[channel_id] = channel
+            if kind == 'agent':
+                self.endpoints.add(endpoint.split('/', 1)[1])
+            else:
+                self.outcomes['originated'] += 1
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+        self._after(0, self._ring, channel, float(body.get('timeout') or self.profile.ring_timeout))
+        return 200, channel.json()
+
+    def _ring(self, channel, timeout):
+        profile = self.profile
+        with self._state:
+            if not channel.alive:
+                return
+            channel.state = 'Ringing'
+            self.emit('ChannelStateChange', channel=channel.json())
+
+            if channel.kind == 'agent':
+                self._after(self.rng.expovariate(1 / profile.agent_ring_mean), self._answer, channel)
+                return
+
+            draw = self.rng.random()
+            timeout = min(timeout, profile.ring_timeout)
+            if draw < profile.busy_rate:
+                self._after(min(1.0, timeout), self._hangup, channel, 17, 'busy')
+            elif draw < profile.busy_rate + profile.answer_rate:
+                channel.machine = self.rng.random() < profile.amd_rate
+                self._after(min(self.rng.expovariate(1 / profile.ring_mean), timeout), self._answer, channel)
+            else:
+                self._after(timeout, self._hangup, channel, 19, 'no_answer')
+
+    def _answer(self, channel):
+        with self._state:
+            if not channel.alive:
+                return
+            channel.state = 'Up'
+            channel.answered = time.monotonic()
+            self.emit('ChannelStateChange', channel=channel.json())
+
+            if channel.kind == 'agent':
+                self._enter_stasis(channel)
+                if channel.bridge:
+                    self._check_connected(channel.bridge)
+            elif channel.vars.get('AMD_ENABLED') == '1':
+                self._after(self.profile.amd_detect_time, self._amd_result, channel)
+            else:
+                self._enter_stasis(channel)
+
+    def _amd_result(self, channel):
+        with self._state:
+            if not channel.alive:
+                return
+            channel.vars['AMDSTATUS'] = 'MACHINE' if channel.machine else 'HUMAN'
+            self._enter_stasis(channel)
+
+    def _enter_stasis(self, channel):
+        channel.stasis = time.monotonic()
+        self.emit('StasisStart', args=channel.args, channel=channel.json())
+        if channel.kind == 'customer':
+            self.call_times[channel.id] = (channel.originated, channel.stasis)
+            self.latencies.record('originate_to_stasis_start', channel.stasis - channel.originated)
+            self._after(self.profile.patience, self._give_up, channel)
+            if channel.bridge:
+                self._check_connected(channel.bridge)
+
+    def _give_up(self, channel):
+        with self._state:
+            if channel.alive and not channel.connected:
+                self._hangup(channel, 16, 'abandoned')
+
+    def _check_connected(self, bridge_id):
+        """Connect every answered customer in the bridge once an answered agent is in it"""
+        bridge = self.bridges.get(bridge_id)
+        if bridge is None:
+            return
+        members = [self.channels[channel_id] for channel_id in bridge['channels'] if channel_id in self.channels]
+        if not any(member.kind == 'agent' and member.state == 'Up' for member in members):
+            return
+        # A machine is hung up once AMD reports it, never talked to
+        customers = [member for member in members if member.kind == 'customer' and member.stasis and not member.machine]
+        talking = sum(1 for member in customers if member.connected)
+        for customer in customers:
+            if customer.connected:
+                continue
+            customer.connected = time.monotonic()
+            self.outcomes['connected'] += 1
+            if talking:
+                # Another customer is already talking to this agent
+                self.outcomes['shared_bridge'] += 1
+            talking += 1
+            self.latencies.record('answer_to_agent_connect', customer.connected - customer.answered)
+            self._after(self._talk_time(), self._hangup, customer, 16, 'completed')
+
+    def _hangup(self, channel, cause, outcome=None):
+        with self._state:
+            if not channel.alive:
+                return
+            channel.alive = False
+            if channel.bridge:
+                self._leave_bridge(channel)
+            self.channels.pop(channel.id, None)
+
+            if channel.kind == 'customer':
+                if outcome is None:
+                    # Hung up over ARI
+                    if channel.machine and channel.answered:
+                        outcome = 'machine'
+                    elif channel.connected:
+                        outcome = 'completed'
+                    elif channel.answered:
+                        outcome = 'dropped'
+                    else:
+                        outcome = 'cancelled'
+                self.outcomes[outcome] += 1
+                self.active -= 1
+
+            channel.state = 'Down'
+            self.emit('ChannelDestroyed', cause=cause, cause_txt=outcome or 'Normal Clearing',
+                      channel=channel.json())
+
+    def _join_bridge(self, bridge, channel):
+        if channel.bridge == bridge['id']:
+            return
+        if channel.bridge:
+            self._leave_bridge(channel)
+        channel.bridge = bridge['id']
+        bridge['channels'].append(channel.id)
+        self.emit('ChannelEnteredBridge', bridge=dict(bridge), channel=channel.json())
+        self._check_connected(bridge['id'])
+
+    def _leave_bridge(self, channel):
+        bridge = self.bridges.get(channel.bridge)
+        channel.bridge = None
+        if bridge and channel.id in bridge['channels']:
+            bridge['channels'].remove(channel.id)
+            self.emit('ChannelLeftBridge', bridge=dict(bridge), channel=channel.json())
+
+    def _create_bridge(self, bridge_id=None, bridge_type='mixing'):
+        bridge = {
+            'id': bridge_id or self.next_id('fake-bridge'),
+            'technology': 'simple_bridge',
+            'bridge_type': bridge_type,
+            'bridge_class': 'stasis',
+            'channels': [],
+        }
+        self.bridges[bridge['id']] = bridge
+        self.emit('BridgeCreated', bridge=dict(bridge))
+        return bridge
+
+    def seat_agent(self, extension):
+        """
+        An agent already on the line and waiting in their own bridge, as a
+        logged-in predictive agent is; returns (channel_id, bridge_id).
+        The extension's previous seat, if any, is hung up.
+        """
+        with self._state:
+            self.endpoints.add(extension)
+            old_channel_id, old_bridge_id = self.seats.pop(extension, (None, None))
+            if old_channel_id in self.channels:
+                self._hangup(self.channels[old_channel_id], 16)
+            old_bridge = self.bridges.pop(old_bridge_id, None)
+            if old_bridge is not None:
+                self.emit('BridgeDestroyed', bridge=dict(old_bridge))
+
+            channel = _Channel(self.next_id('fake-agent'), f"PJSIP/{extension}", 'agent', {}, [], extension)
+            channel.state = 'Up'
+            channel.answered = channel.stasis = time.monotonic()
+            self.channels[channel.id] = channel
+            bridge = self._create_bridge()
+            self._join_bridge(bridge, channel)
+            self.seats[extension] = (channel.id, bridge['id'])
+            return channel.id, bridge['id']
+
+    def is_alive(self, channel_id):
+        with self._state:
+            return channel_id in self.channels
+
+    # ========================================================================
+    # REST
+    # ========================================================================
+
+    def respond(self, method, path, route, body, query):
+        segments = path.strip('/').split('/')
+        params = {**query, **body}
+
+        if route == '/channels':
+            if method == 'POST':
+                return self._originate(params)
+            with self._state:
+                return 200, [channel.json() for channel in self.channels.values()]
+
+        if segments[0] == 'channels':
+            with self._state:
+                channel = self.channels.get(segments[1])
+                if channel is None:
+                    return 404, {'message': 'Channel not found'}
+                action = segments[2] if len(segments) > 2 else ''
+                if not action:
+                    if method == 'DELETE':
+                        self._hangup(channel, 16)
+                        return 204, None
+                    return 200, channel.json()
+                if action == 'variable':
+                    name = params.get('variable')
+                    if method == 'POST':
+                        channel.vars[name] = params.get('value', '')
+                        return 204, None
+                    if name in channel.vars:
+                        return 200, {'value': channel.vars[name]}
+                    return 404, {'message': 'Provided variable was not found'}
+                if action == 'answer' and channel.state != 'Up':
+                    self._after(0, self._answer, channel)
+            return super().respond(method, path, route, body, query)
+
+        if route in ('/bridges', '/bridges/{id}') and method == 'POST':
+            with self._state:
+                bridge = self._create_bridge(segments[1] if len(segments) > 1 else params.get('bridgeId'),
+                                             params.get('type') or 'mixing')
+                return 200, dict(bridge)
+
+        if segments[0] == 'bridges':
+            with self._state:
+                if len(segments) == 1:
+                    return 200, [dict(bridge) for bridge in self.bridges.values()]
+                bridge = self.bridges.get(segments[1])
+                if bridge is None:
+                    return 404, {'message': 'Bridge not found'}
+                action = segments[2] if len(segments) > 2 else ''
+                if not action:
+                    if method == 'DELETE':
+                        for channel_id in list(bridge['channels']):
+                            self._leave_bridge(self.channels[channel_id])
+                        del self.bridges[bridge['id']]
+                        self.emit('BridgeDestroyed', bridge=dict(bridge))
+                        return 204, None
+                    return 200, dict(bridge)
+                if action in ('addChannel', 'removeChannel'):
+                    channel_ids = str(params.get('channel') or '').split(',')
+                    channels = [self.channels.get(channel_id) for channel_id in channel_ids if channel_id]
+                    if not channels or None in channels:
+                        return 400, {'message': 'Channel not found'}
+                    for channel in channels:
+                        if action == 'addChannel':
+                            self._join_bridge(bridge, channel)
+                        elif channel.bridge == bridge['id']:
+                            self._leave_bridge(channel)
+                    return 204, None
+            return super().respond(method, path, route, body, query)
+
+        if route == '/endpoints' or route == '/endpoints/PJSIP':
+            with self._state:
+                return 200, [{'technology': 'PJSIP', 'resource': extension, 'state': 'online', 'channel_ids': []}
+                             for extension in sorted(self.endpoints)]
+
+        return super().respond(method, path, route, body, query)
+
+    # ========================================================================
+    # Metrics
+    # ========================================================================
+
+    def snapshot(self) -> Dict:
+        with self._state:
+            return {
+                'active': self.active,
+                'peak_active': self.peak_active,
+                'channels': len(self.channels),
+                'bridges': len(self.bridges),
+                'events_clients': len(self.sockets),
+                'outcomes': dict(self.outcomes),
+            }
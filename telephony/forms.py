@@ -64,7 +64,7 @@ class CarrierForm(forms.ModelForm):
             'registration_type', 'username', 'password', 'auth_username',
             'codec', 'dtmf_mode', 'qualify', 'nat',
             'dial_prefix', 'dial_timeout',
-            'max_channels', 'cost_per_minute', 'priority',
+            'max_channels', 'max_cps', 'cost_per_minute', 'priority',
             'is_active', 'asterisk_server'
         ]
         widgets = {
@@ -84,6 +84,7 @@ class CarrierForm(forms.ModelForm):
             'dial_prefix': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., 9 or 91'}),
             'dial_timeout': forms.NumberInput(attrs={'class': 'form-control'}),
             'max_channels': forms.NumberInput(attrs={'class': 'form-control'}),
+            'max_cps': forms.NumberInput(attrs={'class': 'form-control'}),
             'cost_per_minute': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.0001'}),
             'priority': forms.NumberInput(attrs={'class': 'form-control'}),
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -0,0 +1,359 @@
+"""
+Management Command: ARI Load Test
+
+Runs the dialer end to end against a simulated Asterisk
+(telephony.fake_ari.FakeAriServer) so capacity limits can be measured
+without a PBX:
+
+- calls are placed by HopperService.dial_leads - hopper pop, server
+  pool, originate_batch, CallLog - exactly as the dialer places them;
+- the fake rings, answers (or not), runs AMD and hangs up each call with
+  timings drawn from the options, and sends the events back over its
+  /ari/events WebSocket into ari_worker's own reader and event pipeline;
+- synthetic agents wait in their own bridges with a ready
+  AgentDialerSession, and are seated again after each call and wrap-up.
+
+Dialing holds --concurrency customer calls in flight instead of following
+a pacing mode (simulate_dialer compares pacing). Latencies are wall-clock;
+simulated ring, AMD and talk times run --time-scale times faster.
+
+It creates its own campaign, leads, agents and AsteriskServer and writes
+call logs: run it with the offline settings, never against production.
+
+Usage:
+    python manage.py ari_load_test --settings=autodialer.settings_sim
+    python manage.py ari_load_test --concurrency=300 --agents=100 --time-scale=20 --settings=autodialer.settings_sim
+    python manage.py ari_load_test --duration=300 --json --settings=autodialer.settings_sim
+"""
+
+import asyncio
+import io
+import json
+import logging
+import random
+import time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from telephony.fake_ari import CallProfile, FakeAriServer, LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+# Seconds between dialing and agent-seating rounds
+TICK = 0.25
+
+
+class Command(BaseCommand):
+    help = 'Load-test the dialer and ari_worker against a simulated Asterisk ARI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50, help='Customer calls kept in flight (default: 50)')
+        parser.add_argument('--agents', type=int, default=20, help='Synthetic agents (default: 20)')
+        parser.add_argument('--duration', type=float, default=60, help='Wall seconds of dialing (default: 60)')
+        parser.add_argument('--drain', type=float, default=30, help='Wall seconds to let calls in flight finish (default: 30)')
+        parser.add_argument('--leads', type=int, default=5000, help='Synthetic leads, dialed round-robin (default: 5000)')
+        parser.add_argument('--answer-rate', type=float, default=0.30, help='P(dial answered) (default: 0.30)')
+        parser.add_argument('--busy-rate', type=float, default=0.05, help='P(dial busy) (default: 0.05)')
+        parser.add_argument('--amd-rate', type=float, default=0.15, help='P(answer is a machine); 0 turns AMD off (default: 0.15)')
+        parser.add_argument('--ring-mean', type=float, default=12, help='Mean seconds to answer (default: 12)')
+        parser.add_argument('--ring-timeout', type=float, default=30, help='Seconds before a no-answer is released (default: 30)')
+        parser.add_argument('--amd-detect-time', type=float, default=3, help='Seconds AMD takes (default: 3)')
+        parser.add_argument('--talk-mean', type=float, default=180, help='Mean talk seconds (default: 180)')
+        parser.add_argument('--talk-sd', type=float, default=120, help='Talk time std deviation (default: 120)')
+        parser.add_argument('--agent-ring-mean', type=float, default=1, help="Mean seconds for an agent's phone to answer (default: 1)")
+        parser.add_argument('--wrapup-mean', type=float, default=30, help='Mean wrap-up seconds (default: 30)')
+        parser.add_argument('--patience', type=float, default=10, help='Seconds an answered call waits for an agent (default: 10)')
+        parser.add_argument('--time-scale', type=float, default=1, help='Run simulated call times this many times faster (default: 1)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--port', type=int, default=0, help='Port for the fake ARI (default: any free port)')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['agents'] < 1 or options['leads'] < 1:
+            raise CommandError('--concurrency, --agents and --leads must be at least 1')
+        if options['time_scale'] <= 0:
+            raise CommandError('--time-scale must be positive')
+
+        if connection.vendor == 'sqlite':
+            # Throwaway simulation database: make sure the schema exists
+            call_command('migrate', interactive=False, verbosity=0)
+
+        profile = CallProfile(
+            answer_rate=options['answer_rate'],
+            busy_rate=options['busy_rate'],
+            amd_rate=options['amd_rate'],
+            ring_mean=options['ring_mean'],
+            ring_timeout=options['ring_timeout'],
+            amd_detect_time=options['amd_detect_time'],
+            talk_mean=options['talk_mean'],
+            talk_sd=options['talk_sd'],
+            agent_ring_mean=options['agent_ring_mean'],
+            patience=options['patience'],
+            time_scale=options['time_scale'],
+            seed=options['seed'],
+        )
+        pbx = FakeAriServer(profile, port=options['port']).start()
+        try:
+            campaign, server, leads, agents = self.setup(pbx, options)
+            if not options['json']:
+                self.stdout.write(
+                    f"Load test: {options['concurrency']} calls in flight, {options['agents']} agents, "
+                    f"{options['duration']:.0f}s at x{options['time_scale']:g} against fake ARI on {pbx.host}:{pbx.port}..."
+                )
+            report = asyncio.run(self.run(pbx, campaign, server, leads, agents, options))
+        finally:
+            pbx.stop()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_report(report)
+
+    # ========================================================================
+    # Setup
+    # ========================================================================
+
+    def setup(self, pbx, options):
+        """A fresh campaign and leads, plus the agents and AsteriskServer, pointed at the fake"""
+        from django.contrib.auth.models import User
+        from agents.models import AgentDialerSession
+        from campaigns.models import Campaign
+        from campaigns.services import HopperService
+        from leads.models import Lead
+        from telephony.models import AsteriskServer
+        from users.models import AgentStatus, UserProfile
+
+        owner, _ = User.objects.get_or_create(username='ari-load-test')
+        server, _ = AsteriskServer.objects.update_or_create(
+            name='ARI Load Test',
+            defaults={
+                'server_ip': pbx.host,
+                'ari_host': pbx.host,
+                'ari_port': pbx.port,
+                'ari_username': 'loadtest',
+                'ari_password': 'loadtest',
+                'ami_username': 'loadtest',
+                'ami_password': 'loadtest',
+                'max_calls': max(100, options['concurrency'] * 2),
+                'is_active': True,
+            }
+        )
+        campaign = Campaign.objects.create(
+            name=f"ARI Load Test {timezone.now():%Y-%m-%d %H:%M:%S}",
+            created_by=owner,
+            start_date=timezone.now(),
+            status='active',
+            dial_method='predictive',
+            dial_level=Decimal('1.0'),
+            amd_enabled=options['amd_rate'] > 0,
+        )
+
+        first = Lead.objects.count()
+        Lead.objects.bulk_create(
+            [Lead(first_name='Load', last_name=f"Test {i}", phone_number=f"+1555{first + i:07d}")
+             for i in range(options['leads'])],
+            batch_size=1000
+        )
+        leads = list(Lead.objects.order_by('-id')[:options['leads']])
+        HopperService.clear_hopper(campaign.id)
+        HopperService.add_leads(campaign.id, leads)
+
+        agents = []
+        for i in range(options['agents']):
+            agent, _ = User.objects.get_or_create(username=f"loadtest-agent-{i + 1}")
+            extension = f"9{i + 1:04d}"
+            UserProfile.objects.update_or_create(user=agent, defaults={'extension': extension})
+            AgentStatus.objects.update_or_create(
+                user=agent,
+                defaults={'status': 'available', 'current_campaign': campaign, 'current_call_id': ''}
+            )
+            AgentDialerSession.objects.filter(agent=agent).delete()
+            channel_id, bridge_id = pbx.seat_agent(extension)
+            AgentDialerSession.objects.create(
+                agent=agent,
+                campaign=campaign,
+                asterisk_server=server,
+                agent_extension=extension,
+                agent_channel_id=channel_id,
+                agent_bridge_id=bridge_id,
+                status='ready',
+            )
+            agents.append(agent.id)
+
+        return campaign, server, leads, agents
+
+    # ========================================================================
+    # Run
+    # ========================================================================
+
+    async def run(self, pbx, campaign, server, leads, agents, options):
+        from telephony.event_pipeline import EventPipeline
+        from telephony.management.commands.ari_worker import Command as AriWorker
+
+        loop = asyncio.get_running_loop()
+        handlers = LatencyRecorder()
+
+        # The worker's own progress lines would interleave with the report
+        worker = AriWorker(stdout=io.StringIO(), stderr=self.stderr)
+        worker.prepare()
+
+        def timed(server, event):
+            started = time.monotonic()
+            error = False
+            try:
+                worker._handle_event(server, event)
+            except Exception:
+                error = True
+                raise
+            finally:
+                handled = time.monotonic()
+                handlers.record(event.get('type'), handled - started, error)
+                times = pbx.call_times.get((event.get('channel') or {}).get('id'))
+                if event.get('type') == 'StasisStart' and times:
+                    pbx.latencies.record('originate_to_stasis_start_handled', handled - times[0])
+                    pbx.latencies.record('stasis_start_sent_to_handled', handled - times[1])
+
+        # Own pool name so a load test never shows up as a live ARI worker
+        pipeline = EventPipeline(timed, report_interval=3600, pool='ari_worker:loadtest')
+        worker_task = asyncio.create_task(worker.run([server], pipeline))
+
+        for _ in range(100):
+            if pbx.snapshot()['events_clients'] or worker_task.done():
+                break
+            await asyncio.sleep(0.1)
+        if not pbx.snapshot()['events_clients']:
+            worker_task.cancel()
+            await asyncio.gather(worker_task, return_exceptions=True)
+            raise CommandError('ari_worker did not connect to the fake ARI events WebSocket')
+
+        rng = random.Random(options['seed'])
+        wrapups = {}
+        dialed = seated = 0
+        started = loop.time()
+        deadline = started + options['duration']
+
+        while loop.time() < deadline:
+            wanted = options['concurrency'] - pbx.active
+            if wanted > 0:
+                dialed += await loop.run_in_executor(None, self.dial, campaign, leads, wanted)
+            seated += await loop.run_in_executor(None, self.seat_agents, pbx, campaign, agents, wrapups, rng, options)
+            await asyncio.sleep(TICK)
+        dial_seconds = loop.time() - started
+
+        drain_deadline = loop.time() + options['drain']
+        while pbx.active and loop.time() < drain_deadline:
+            await asyncio.sleep(TICK)
+        await pipeline.join()
+        pipeline_status = pipeline.snapshot()
+        worker_task.cancel()
+        await asyncio.gather(worker_task, return_exceptions=True)
+
+        outcomes = pbx.snapshot()
+        return {
+            'concurrency': options['concurrency'],
+            'agents': options['agents'],
+            'time_scale': options['time_scale'],
+            'seconds': round(dial_seconds, 3),
+            'drain_seconds': round(loop.time() - started - dial_seconds, 3),
+            'dialed': dialed,
+            'calls_per_second': round(dialed / dial_seconds, 2) if dial_seconds > 0 else 0.0,
+            'connects_per_second': round(outcomes['outcomes'].get('connected', 0) / dial_seconds, 2) if dial_seconds > 0 else 0.0,
+            'peak_active': outcomes['peak_active'],
+            'left_active': outcomes['active'],
+            'agents_seated': seated,
+            'outcomes': outcomes['outcomes'],
+            'latencies': pbx.latencies.rows(),
+            'pipeline': {key: pipeline_status[key] for key in ('handled', 'errors', 'max_lag_ms', 'blocked_submits')},
+            'event_types': handlers.rows(),
+            'ari_requests': dict(pbx.requests.most_common()),
+        }
+
+    def dial(self, campaign, leads, count):
+        """Originate up to `count` calls through the dialer's own path; refills the hopper round-robin"""
+        from campaigns.services import HopperService
+
+        close_old_connections()
+        if HopperService.get_hopper_count(campaign.id) < count:
+            HopperService.add_leads(campaign.id, leads)
+        return HopperService.dial_leads(campaign.id, count)
+
+    def seat_agents(self, pbx, campaign, agents, wrapups, rng, options):
+        """
+        Put agents whose line ari_worker hung up back in a fresh bridge,
+        after a wrap-up drawn from --wrapup-mean; returns agents seated
+        """
+        from agents.models import AgentDialerSession
+        from agents.ready_queue import ReadyAgentQueue
+        from users.models import AgentStatus
+
+        close_old_connections()
+        now = time.monotonic()
+        seated = 0
+        for session in AgentDialerSession.objects.filter(campaign=campaign, agent_id__in=agents):
+            if session.status == 'ready' and pbx.is_alive(session.agent_channel_id):
+                continue
+            due = wrapups.setdefault(
+                session.agent_id, now + rng.expovariate(1 / options['wrapup_mean']) / options['time_scale']
+            )
+            if now < due:
+                continue
+
+            channel_id, bridge_id = pbx.seat_agent(session.agent_extension)
+            AgentDialerSession.objects.filter(id=session.id).update(
+                status='ready',
+                agent_channel_id=channel_id,
+                agent_bridge_id=bridge_id,
+                last_state_change=timezone.now(),
+            )
+            AgentStatus.objects.filter(user_id=session.agent_id).update(
+                status='available',
+                current_call_id='',
+                call_start_time=None,
+                status_changed_at=timezone.now(),
+            )
+            ReadyAgentQueue.sync_agent(session.agent_id)
+            del wrapups[session.agent_id]
+            seated += 1
+        return seated
+
+    # ========================================================================
+    # Report
+    # ========================================================================
+
+    def print_report(self, report):
+        outcomes = report['outcomes']
+        self.stdout.write(self.style.SUCCESS(
+            f"Dialed {report['dialed']} calls in {report['seconds']}s: {report['calls_per_second']} calls/s, "
+            f"{report['connects_per_second']} agent connects/s (peak {report['peak_active']} in flight)"
+        ))
+        self.stdout.write(
+            '  Outcomes: ' + ', '.join(f"{name} {count}" for name, count in sorted(outcomes.items()))
+        )
+        self.stdout.write(
+            f"  Agents seated again after wrap-up: {report['agents_seated']}; "
+            f"calls still up after {report['drain_seconds']}s drain: {report['left_active']}"
+        )
+        pipeline = report['pipeline']
+        self.stdout.write(
+            f"  Pipeline: {pipeline['handled']} events handled, {pipeline['errors']} errors, "
+            f"max lag {pipeline['max_lag_ms']}ms, {pipeline['blocked_submits']} blocked submits"
+        )
+
+        for title, rows in (('Call latency', report['latencies']), ('Event type', report['event_types'])):
+            self.stdout.write('')
+            self.stdout.write(f"  {title:<36}{'count':>8}{'errors':>8}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+            for row in rows:
+                self.stdout.write(
+                    f"  {row['type'] or '-':<36}{row['count']:>8}{row['errors']:>8}{row['avg_ms']:>10}"
+                    f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}"
+                )
+
+        if report['ari_requests']:
+            self.stdout.write('')
+            self.stdout.write('  Fake ARI requests:')
+            for route, count in report['ari_requests'].items():
+                self.stdout.write(f"    {route:<40}{count:>8}")
@@ -9,11 +9,16 @@ This worker connects to Asterisk ARI WebSocket and handles:
 - Call state changes
 - Agent session management
 - Real-time WebSocket notifications to agents
+
+Events are handed to telephony.event_pipeline, which keeps each channel's
+events in order while handling different channels in parallel.
 """
 
 import asyncio
 import json
 import logging
+import threading
+import uuid
 import websockets
 from django.core.management.base import BaseCommand
 from django.utils import timezone
@@ -24,9 +29,14 @@ from asgiref.sync import async_to_sync
 from telephony.models import AsteriskServer
 from calls.models import CallLog
 from campaigns.models import OutboundQueue, DialerHopper
+from campaigns.dialer_counters import DialerCounters
 from agents.models import AgentDialerSession
+from agents.ready_queue import ReadyAgentQueue
 from users.models import AgentStatus
 from telephony.services import AsteriskService
+from telephony.event_pipeline import EventPipeline
+from telephony.event_journal import get_journal
+from telephony.routing import get_carrier_router
 from users.tracking import get_tracker
 
 # Phase 8.2: AI Worker Integration
@@ -34,6 +44,15 @@ from sarvam.ai_call_handler import AICallHandler
 
 logger = logging.getLogger(__name__)
 
+# Ready agents tried per answered call before falling back to the softphone
+READY_AGENT_CLAIM_ATTEMPTS = 3
+
+# CallLog.hangup_cause_text of calls the worker hung up itself
+SYSTEM_HANGUP_PREFIX = 'system:'
+
+# AMD results that are (or may be) a person and are connected to agents
+HUMAN_AMD_RESULTS = ('human', 'unsure', 'notsure')
+
 
 def _normalize_id(value):
     """Convert string ID to int, return None if invalid"""
@@ -49,51 +68,83 @@ class Command(BaseCommand):
     help = 'Run ARI event worker to manage agent/customer channels and bridges'
 
     def handle(self, *args, **options):
-        self.tracker = get_tracker()
-        server = AsteriskServer.objects.filter(is_active=True).first()
-        if not server:
+        servers = list(AsteriskServer.objects.filter(is_active=True))
+        if not servers:
             self.stderr.write('No active AsteriskServer found')
             return
 
+        self.prepare()
+        try:
+            ReadyAgentQueue.rebuild()
+        except Exception as e:
+            logger.error(f"Ready-agent queue rebuild failed: {e}")
+        # Events are handled in order per channel, in parallel across channels
+        pipeline = EventPipeline(self._handle_event)
+        asyncio.run(self.run(servers, pipeline))
+
+    async def run(self, servers, pipeline):
+        """Follow every server's event stream into the pipeline (also used by ari_load_test)"""
+        await pipeline.start()
+        try:
+            await asyncio.gather(*(self.listen(server, pipeline) for server in servers))
+        finally:
+            await pipeline.stop()
+
+    async def listen(self, server, pipeline):
+        # Calls are spread over every active server; follow each one's events
+        journal = get_journal()
         ari_url = f"ws://{server.ari_host}:{server.ari_port}/ari/events?app={server.ari_application}&api_key={server.ari_username}:{server.ari_password}"
         self.stdout.write(self.style.SUCCESS(f"Connecting to ARI: {ari_url.replace(server.ari_password, '***')}"))
+        while True:
+            try:
+                async with websockets.connect(ari_url, ping_interval=10, ping_timeout=10) as ws:
+                    logger.info(f"Connected to Asterisk ARI on {server}")
+                    self.stdout.write(self.style.SUCCESS(f"Connected to Asterisk ARI WebSocket on {server}"))
+                    async for message in ws:
+                        if journal:
+                            journal.record(server.id, message)
+                        event = self.parse_event(message)
+                        if event is not None:
+                            await pipeline.submit(server, event)
+            except websockets.ConnectionClosed:
+                logger.warning(f"ARI WebSocket connection to {server} closed, reconnecting in 5s...")
+                self.stdout.write(self.style.WARNING(f"Connection to {server} closed, reconnecting..."))
+                await asyncio.sleep(5)
+            except Exception as e:
+                logger.error(f"ARI WebSocket error on {server}: {e}", exc_info=True)
+                self.stdout.write(self.style.ERROR(f"Error on {server}: {e}"))
+                await asyncio.sleep(5)
+
+    def prepare(self):
+        """Set up what the event handlers use (also used by replay_ari_journal and ari_load_test)"""
+        self.tracker = get_tracker()
         self.channel_layer = get_channel_layer()
+        # Agent legs originated for a customer, by the channel id we gave them;
+        # shard threads add and pop concurrently
+        self.pending_bridges = {}
+        self.pending_bridges_lock = threading.Lock()
 
-        async def run():
-            while True:
-                try:
-                    async with websockets.connect(ari_url, ping_interval=10, ping_timeout=10) as ws:
-                        logger.info("Connected to Asterisk ARI")
-                        self.stdout.write(self.style.SUCCESS("Connected to Asterisk ARI WebSocket"))
-                        async for message in ws:
-                            await asyncio.get_event_loop().run_in_executor(
-                                None, self.process_event, server, message
-                            )
-                except websockets.ConnectionClosed:
-                    logger.warning("ARI WebSocket connection closed, reconnecting in 5s...")
-                    self.stdout.write(self.style.WARNING("Connection closed, reconnecting..."))
-                    await asyncio.sleep(5)
-                except Exception as e:
-                    logger.error(f"ARI WebSocket error: {e}", exc_info=True)
-                    self.stdout.write(self.style.ERROR(f"Error: {e}"))
-                    await asyncio.sleep(5)
+    def _add_pending_bridge(self, agent_channel_id, bridge_info):
+        with self.pending_bridges_lock:
+            self.pending_bridges[agent_channel_id] = bridge_info
 
-        asyncio.run(run())
+    def _pop_pending_bridge(self, agent_channel_id):
+        with self.pending_bridges_lock:
+            return self.pending_bridges.pop(agent_channel_id, None)
 
-    def process_event(self, server, message):
-        """Process incoming ARI event"""
+    def parse_event(self, message):
+        """Decode an ARI message; None if it is invalid or not an event we handle"""
         try:
             event = json.loads(message)
-            etype = event.get('type')
-            
-            if etype in ['StasisStart', 'ChannelStateChange', 'ChannelDestroyed']:
-                logger.info(f"Processing ARI event: {etype}")
-                self._handle_event(server, event)
-            
         except json.JSONDecodeError:
             logger.warning(f"Invalid JSON from ARI: {message[:100]}")
-        except Exception as e:
-            logger.error(f"Error processing ARI event: {e}", exc_info=True)
+            return None
+
+        etype = event.get('type')
+        if etype in ['StasisStart', 'ChannelStateChange', 'ChannelDestroyed']:
+            logger.info(f"Processing ARI event: {etype}")
+            return event
+        return None
 
     def _handle_event(self, server, event):
         """Route event to appropriate handler"""
@@ -169,6 +220,8 @@ class Command(BaseCommand):
             )
         
         elif etype == 'ChannelDestroyed':
+            # Free the trunk channel CarrierRouter.acquire() bound to this channel id
+            get_carrier_router().release_channel(chan_id)
             self._handle_channel_destroyed(
                 server, chan_id, call_type, agent_id, target_agent_id,
                 campaign_id, lead_id, queue_id
@@ -208,7 +261,6 @@ class Command(BaseCommand):
                             pass
                     
                     # Create call log (if not exists)
-                    from calls.models import CallLog
                     call_log, created = CallLog.objects.get_or_create(
                         channel=chan_id,
                         defaults={
@@ -229,7 +281,6 @@ class Command(BaseCommand):
                     ai_config = campaign.get_ai_config()
                     
                     # Create Asterisk service instance
-                    from telephony.services import AsteriskService
                     asterisk = AsteriskService(server)
                     
                     # Launch AI Call Handler
@@ -269,7 +320,12 @@ class Command(BaseCommand):
             
             if not amd_service.should_connect_to_agent(result):
                 logger.info(f"AMD blocked call {chan_id} (Machine detected)")
-                AsteriskService(server).hangup_channel(chan_id)
+                DialerCounters.record_machine(campaign_id)
+                # Keep the result on the call so its end is not counted as an abandon
+                CallLog.objects.filter(channel=chan_id).update(
+                    amd_result=result.value, amd_action='hangup', updated_at=timezone.now()
+                )
+                self._system_hangup(server, chan_id, 'amd')
                 return
 
         # Add to bridge if specified
@@ -282,6 +338,7 @@ class Command(BaseCommand):
                 agent_id=agent_id, 
                 status='connecting'
             ).update(status='ready', agent_channel_id=chan_id)
+            self._sync_ready_agent(agent_id)
             
             self.broadcast_message(agent_id, {
                 'type': 'status_update',
@@ -292,8 +349,8 @@ class Command(BaseCommand):
         # 2. AUTODIAL - Predictive dialer placing call
         elif call_type == 'autodial':
             # Check if this is an agent channel that needs to be bridged
-            if hasattr(self, 'pending_bridges') and chan_id in self.pending_bridges:
-                bridge_info = self.pending_bridges.pop(chan_id)
+            bridge_info = self._pop_pending_bridge(chan_id)
+            if bridge_info:
                 customer_channel = bridge_info['customer_channel']
                 
                 logger.info(f"Agent answered! Bridging {chan_id} to customer {customer_channel}")
@@ -334,8 +391,8 @@ class Command(BaseCommand):
         # 3. AGENT_ANSWER - Agent's softphone answered (for bridging)
         elif call_type == 'agent_answer':
             # Check if this is an agent channel that needs to be bridged
-            if hasattr(self, 'pending_bridges') and chan_id in self.pending_bridges:
-                bridge_info = self.pending_bridges.pop(chan_id)
+            bridge_info = self._pop_pending_bridge(chan_id)
+            if bridge_info:
                 customer_channel = bridge_info['customer_channel']
                 
                 logger.info(f"Agent answered! Bridging {chan_id} to customer {customer_channel}")
@@ -353,22 +410,19 @@ class Command(BaseCommand):
                         
                         # CRITICAL FIX: Subscribe to customer channel events to detect hangup
                         try:
-                            import requests
-                            ari_base_url = f"http://{server.ari_host}:{server.ari_port}/ari"
+                            ari_base_url = asterisk_service.ari_base_url
                             
                             # Subscribe to customer channel events
-                            subscribe_response = requests.post(
+                            subscribe_response = asterisk_service.session.post(
                                 f"{ari_base_url}/applications/autodialer/subscription",
-                                auth=(server.ari_username, server.ari_password),
                                 json={"eventSource": f"channel:{customer_channel}"},
                                 timeout=5
                             )
                             logger.info(f"Subscribed to customer channel {customer_channel} events: {subscribe_response.status_code}")
                             
                             # Subscribe to agent channel events
-                            subscribe_response2 = requests.post(
+                            subscribe_response2 = asterisk_service.session.post(
                                 f"{ari_base_url}/applications/autodialer/subscription",
-                                auth=(server.ari_username, server.ari_password),
                                 json={"eventSource": f"channel:{chan_id}"},
                                 timeout=5
                             )
@@ -377,9 +431,8 @@ class Command(BaseCommand):
                             # Subscribe to bridge events
                             bridge_id = bridge_result.get('bridge_id')
                             if bridge_id:
-                                subscribe_response3 = requests.post(
+                                subscribe_response3 = asterisk_service.session.post(
                                     f"{ari_base_url}/applications/autodialer/subscription",
-                                    auth=(server.ari_username, server.ari_password),
                                     json={"eventSource": f"bridge:{bridge_id}"},
                                     timeout=5
                                 )
@@ -389,7 +442,6 @@ class Command(BaseCommand):
                         
                         # CRITICAL: Store agent channel ID in session for later disconnect
                         try:
-                            from agents.models import AgentDialerSession
                             session = AgentDialerSession.objects.filter(agent_id=bridge_info['agent_id']).first()
                             if session:
                                 session.agent_channel_id = chan_id  # Store agent channel
@@ -431,8 +483,7 @@ class Command(BaseCommand):
                             recording_filename = f"campaign_{bridge_info['campaign_id']}_lead_{bridge_info['lead_id']}_{customer_channel}"
                             
                             # Start ARI recording on customer channel
-                            import requests
-                            ari_base_url = f"http://{server.ari_host}:{server.ari_port}/ari"
+                            ari_base_url = asterisk_service.ari_base_url
                             recording_data = {
                                 'name': recording_filename,
                                 'format': 'wav',
@@ -441,9 +492,8 @@ class Command(BaseCommand):
                             }
                             
                             try:
-                                response = requests.post(
+                                response = asterisk_service.session.post(
                                     f"{ari_base_url}/channels/{customer_channel}/record",
-                                    auth=(server.ari_username, server.ari_password),
                                     json=recording_data,
                                     timeout=10
                                 )
@@ -575,15 +625,22 @@ class Command(BaseCommand):
 
             # CRITICAL: Originate call to agent's softphone
             # Use ARI directly to send agent channel to Stasis app
+            # The agent leg's StasisStart can be handled on another shard
+            # before the originate returns: pick its channel id up front and
+            # register the pending bridge before originating
+            agent_channel_id = str(uuid.uuid4())
+            self._add_pending_bridge(agent_channel_id, {
+                'customer_channel': channel_id,
+                'agent_id': agent_status.user_id,
+                'lead_id': lead_id,
+                'campaign_id': campaign_id
+            })
             try:
-                import requests
-                from telephony.models import AsteriskServer
-                
-                # Get ARI credentials
-                ari_base_url = f"http://{server.ari_host}:{server.ari_port}/ari"
+                asterisk_service = AsteriskService(server)
                 
                 # Originate call to agent extension and send to Stasis app
                 originate_data = {
+                    'channelId': agent_channel_id,
                     'endpoint': f'PJSIP/{agent_extension}',
                     'app': 'autodialer',  # Send directly to Stasis app
                     'appArgs': 'agent_answer',  # Custom call type for agent
@@ -598,35 +655,23 @@ class Command(BaseCommand):
                     }
                 }
                 
-                response = requests.post(
-                    f"{ari_base_url}/channels",
-                    auth=(server.ari_username, server.ari_password),
+                response = asterisk_service.session.post(
+                    f"{asterisk_service.ari_base_url}/channels",
                     json=originate_data,
                     timeout=10
                 )
                 
                 if response.status_code in [200, 201]:
-                    agent_channel_data = response.json()
-                    agent_channel_id = agent_channel_data.get('id')
                     logger.info(f"Originated call to agent {agent_extension}, channel: {agent_channel_id}")
                     
-                    # Store mapping so we can bridge when agent answers
-                    if not hasattr(self, 'pending_bridges'):
-                        self.pending_bridges = {}
-                    
-                    self.pending_bridges[agent_channel_id] = {
-                        'customer_channel': channel_id,
-                        'agent_id': agent_status.user_id,
-                        'lead_id': lead_id,
-                        'campaign_id': campaign_id
-                    }
-                    
                     # Update agent status to busy
                     agent_status.set_status('busy')
                 else:
+                    self._pop_pending_bridge(agent_channel_id)
                     logger.error(f"Failed to originate call to agent {agent_extension}: {response.text}")
                 
             except Exception as e:
+                self._pop_pending_bridge(agent_channel_id)
                 logger.error(f"Failed to originate call to agent {agent_extension}: {e}")
 
         except Exception as e:
@@ -648,7 +693,14 @@ class Command(BaseCommand):
             if cl and not cl.answer_time:
                 cl.answer_time = timezone.now()
                 cl.call_status = 'answered'
-                cl.save(update_fields=['answer_time', 'call_status'])
+                cl.save(update_fields=['answer_time', 'call_status', 'updated_at'])
+
+                if cl.call_type == 'outbound' and cl.campaign_id:
+                    DialerCounters.record_answer(
+                        cl.campaign_id,
+                        ring_seconds=(cl.answer_time - cl.start_time).total_seconds() if cl.start_time else None,
+                        channel=chan_id
+                    )
 
             # Handle different call types
             if call_type == 'autodial':
@@ -690,6 +742,7 @@ class Command(BaseCommand):
                 AgentDialerSession.objects.filter(
                     agent_id=agent_id
                 ).update(status='ready')
+                self._sync_ready_agent(agent_id)
 
                 self.broadcast_message(agent_id, {
                     'type': 'status_update',
@@ -727,6 +780,14 @@ class Command(BaseCommand):
             if cl.answer_time:
                 cl.talk_duration = int((cl.end_time - cl.answer_time).total_seconds())
             cl.save()
+
+            if cl.call_type == 'outbound' and cl.campaign_id:
+                DialerCounters.record_end(
+                    cl.campaign_id,
+                    talk_seconds=cl.talk_duration,
+                    abandoned=self._is_abandoned(cl),
+                    channel=cl.channel
+                )
             
             # ──────────────────────────────────────────────────────────────────
             # PHASE 8.2: Update AI stats if this was an AI call
@@ -830,7 +891,6 @@ class Command(BaseCommand):
                     try:
                         from agents.models import AgentDialerSession
                         from telephony.services import AsteriskService
-                        import requests
                         
                         logger.info(f"Customer disconnected. Looking for agent channel to disconnect for agent_id={cl.agent_id}")
                         asterisk_service = AsteriskService(server)
@@ -854,12 +914,9 @@ class Command(BaseCommand):
                             # Method 2: Find agent channel by checking bridges
                             logger.info("Session not found or no agent_channel_id, checking bridges for agent channel")
                             try:
-                                ari_base_url = f"http://{server.ari_host}:{server.ari_port}/ari"
-                                
                                 # Get all bridges
-                                response = requests.get(
-                                    f"{ari_base_url}/bridges",
-                                    auth=(server.ari_username, server.ari_password),
+                                response = asterisk_service.session.get(
+                                    f"{asterisk_service.ari_base_url}/bridges",
                                     timeout=5
                                 )
                                 
@@ -912,6 +969,27 @@ class Command(BaseCommand):
         # Note: Agent status update to wrapup is now handled earlier in the function
         # (lines 600-632) for all customer calls, ensuring immediate status change
 
+    @staticmethod
+    def _is_abandoned(cl):
+        """
+        Whether a finished call counts against the abandon rate: a person
+        answered and no agent (or AI) took the call. Machines screened out
+        by AMD and calls the worker hung up for another reason are not
+        abandons; hanging up because no agent was free is (that is the drop).
+        """
+        if not cl.answer_time or cl.agent_id or cl.handled_by_ai:
+            return False
+        if cl.amd_result and cl.amd_result not in HUMAN_AMD_RESULTS:
+            return False
+        return not cl.hangup_cause_text.startswith(SYSTEM_HANGUP_PREFIX)
+
+    def _system_hangup(self, server, chan_id, reason):
+        """Hang up a call ourselves, noting why on its CallLog (see _is_abandoned)"""
+        CallLog.objects.filter(channel=chan_id, end_time__isnull=True).update(
+            hangup_cause_text=f"{SYSTEM_HANGUP_PREFIX}{reason}", updated_at=timezone.now()
+        )
+        AsteriskService(server).hangup_channel(chan_id)
+
     def _cleanup_agent_session(self, agent_id):
         """
         PHASE 1.3: Force cleanup of agent session and status
@@ -920,6 +998,7 @@ class Command(BaseCommand):
         try:
             # Update agent dialer sessions
             AgentDialerSession.objects.filter(agent_id=agent_id).update(status='offline')
+            ReadyAgentQueue.remove(agent_id)
 
             # Use set_status() so the WS broadcast fires with the correct payload
             agent_status_obj = AgentStatus.objects.filter(user_id=agent_id).first()
@@ -951,7 +1030,7 @@ class Command(BaseCommand):
 
         if not campaign_id:
             logger.warning(f"Autodial call {chan_id} missing campaign_id; hanging up")
-            AsteriskService(server).hangup_channel(chan_id)
+            self._system_hangup(server, chan_id, 'no_campaign')
             return
 
         # Check channel exists
@@ -964,74 +1043,107 @@ class Command(BaseCommand):
             logger.warning(f"Failed to verify channel {chan_id}")
             return
 
-        # Find agent with ready session
-        agent_session = AgentDialerSession.objects.filter(
-            campaign_id=campaign_id,
-            status='ready'
-        ).select_related('agent', 'agent__agent_status').first()
+        # Longest-idle ready agent, claimed atomically so two calls answered
+        # together never land in the same agent's bridge
+        claim = self._claim_ready_agent(server, chan_id, campaign_id)
 
-        if agent_session and agent_session.agent_bridge_id:
-            # Add customer to agent's bridge
-            result = AsteriskService(server).add_channel_to_bridge(
-                agent_session.agent_bridge_id, chan_id
-            )
+        if claim:
+            agent_id = claim['agent_id']
 
-            if result.get('success'):
-                # Create/update call log
-                call_log, created = CallLog.objects.get_or_create(
-                    channel=chan_id,
-                    defaults={
-                        'campaign_id': campaign_id,
-                        'lead_id': lead_id,
-                        'agent': agent_session.agent,
-                        'called_number': customer_number,
-                        'call_status': 'answered',
-                        'call_type': 'outbound',
-                        'start_time': timezone.now(),
-                        'answer_time': timezone.now()
-                    }
-                )
+            # Create/update call log
+            call_log, created = CallLog.objects.get_or_create(
+                channel=chan_id,
+                defaults={
+                    'campaign_id': campaign_id,
+                    'lead_id': lead_id,
+                    'agent_id': agent_id,
+                    'called_number': customer_number,
+                    'call_status': 'answered',
+                    'call_type': 'outbound',
+                    'start_time': timezone.now(),
+                    'answer_time': timezone.now()
+                }
+            )
 
-                if not created:
-                    call_log.agent = agent_session.agent
-                    call_log.save(update_fields=['agent'])
+            if not created:
+                call_log.agent_id = agent_id
+                call_log.save(update_fields=['agent', 'updated_at'])
 
-                # Update hopper
-                if hopper_id:
-                    DialerHopper.objects.filter(id=hopper_id).update(
-                        status='completed',
-                        completed_at=timezone.now()
-                    )
+            # Update hopper
+            if hopper_id:
+                DialerHopper.objects.filter(id=hopper_id).update(
+                    status='completed',
+                    completed_at=timezone.now()
+                )
 
-                # Get lead info
-                lead_info = self._get_lead_info(lead_id)
+            # Get lead info
+            lead_info = self._get_lead_info(lead_id)
 
-                # Notify agent
-                self.broadcast_message(agent_session.agent.id, {
-                    'type': 'call_connected',
-                    'call': {
-                        'id': call_log.id,
-                        'number': customer_number,
-                        'status': 'answered',
-                        'lead_id': lead_id
-                    },
-                    'lead': lead_info
-                })
+            # Notify agent
+            self.broadcast_message(agent_id, {
+                'type': 'call_connected',
+                'call': {
+                    'id': call_log.id,
+                    'number': customer_number,
+                    'status': 'answered',
+                    'lead_id': lead_id
+                },
+                'lead': lead_info
+            })
 
-                # Mark agent busy
-                AgentStatus.objects.filter(user=agent_session.agent).update(
-                    status='busy',
-                    current_call_id=str(call_log.id),
-                    call_start_time=timezone.now(),
-                    status_changed_at=timezone.now()
-                )
+            # Mark agent busy
+            AgentStatus.objects.filter(user_id=agent_id).update(
+                status='busy',
+                current_call_id=str(call_log.id),
+                call_start_time=timezone.now(),
+                status_changed_at=timezone.now()
+            )
+            # Busy now: drops the seat and its claim
+            self._sync_ready_agent(agent_id)
 
-                logger.info(f"Connected call to agent {agent_session.agent.username}")
-                return
+            logger.info(f"Connected call to agent {agent_id} (idle {claim['idle_ms']}ms)")
+            return
 
         # No ready agent - try softphone fallback
         self._fallback_to_softphone(server, chan_id, campaign_id, lead_id, customer_number)
 
+    def _sync_ready_agent(self, agent_id):
+        """Re-check an agent's place in the ready queue after a bulk session update"""
+        try:
+            ReadyAgentQueue.sync_agent(agent_id)
+        except Exception as e:
+            logger.error(f"Ready-agent sync failed for agent {agent_id}: {e}")
+
+    def _claim_ready_agent(self, server, chan_id, campaign_id):
+        """
+        Claim ready agents on the call's server, longest-idle first, until
+        one's bridge takes the customer
+        An agent whose bridge refuses the channel is dropped from the queue
+        until the next sync re-checks their session
+        """
+        for _ in range(READY_AGENT_CLAIM_ATTEMPTS):
+            try:
+                # Only agents whose bridge is on the server carrying the call
+                claim = ReadyAgentQueue.claim(campaign_id, server_id=server.id)
+            except Exception as e:
+                logger.error(f"Ready-agent claim failed for campaign {campaign_id}: {e}")
+                return None
+            if claim is None:
+                return None
+
+            result = AsteriskService(server).add_channel_to_bridge(claim['bridge_id'], chan_id)
+            if result.get('success'):
+                return claim
+
+            logger.warning(
+                f"Agent {claim['agent_id']} bridge {claim['bridge_id']} refused {chan_id}: {result.get('error')}"
+            )
+            try:
+                ReadyAgentQueue.remove(claim['agent_id'])
+            except Exception as e:
+                logger.error(f"Ready-agent remove failed for agent {claim['agent_id']}: {e}")
+        return None
+
     def _fallback_to_softphone(self, server, chan_id, campaign_id, lead_id, customer_number):
         """
         Fallback: Connect call by ringing agent's softphone
@@ -0,0 +1,276 @@
+"""
+Management Command: Replay ARI Journal
+
+Feeds a recorded ARI event journal (see telephony.event_journal) into an
+event worker's handlers - the same parse/pipeline path as the live
+ari_worker, or ARIEventWorker.handle_event - with every ARI REST call
+answered by a local stub (telephony.fake_ari), and reports throughput
+and per-event-type handler latency.
+
+Handlers read and write the database, Redis and the channel layer as
+they do live: run it against a test environment, never production.
+
+Usage:
+    python manage.py replay_ari_journal archive/ari_journal              # recorded pace
+    python manage.py replay_ari_journal archive/ari_journal --speed=10
+    python manage.py replay_ari_journal redis --speed=0                  # as fast as handlers go
+    python manage.py replay_ari_journal ari-events.jsonl --worker=ari_event_worker
+"""
+
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from telephony.event_journal import read_journal
+from telephony.fake_ari import LatencyRecorder, StubAriRestServer
+
+
+class Command(BaseCommand):
+    help = 'Replay an ARI event journal into an event worker against a stub ARI and report handler latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            help="Journal file or directory, or 'redis' for the ari:journal stream"
+        )
+        parser.add_argument(
+            '--worker',
+            choices=['ari_worker', 'ari_event_worker'],
+            default='ari_worker',
+            help='Event handlers to replay into (default: ari_worker)'
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=1.0,
+            help='Playback speed relative to the recording: 1, 10, ... or 0 for unthrottled (default: 1)'
+        )
+        parser.add_argument(
+            '--server-id',
+            type=int,
+            help='Replay every event as if received from this AsteriskServer (default: as recorded)'
+        )
+        parser.add_argument(
+            '--start',
+            help='Only events received at or after this ISO time'
+        )
+        parser.add_argument(
+            '--end',
+            help='Only events received at or before this ISO time'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=0,
+            help='Stop after this many events (default: all)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the report as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['speed'] < 0:
+            raise CommandError('--speed must be 0 (unthrottled) or positive')
+
+        bounds = []
+        for name in ('start', 'end'):
+            value = options[name]
+            when = parse_datetime(value) if value else None
+            if value and when is None:
+                raise CommandError(f'--{name}: not an ISO date/time: {value}')
+            bounds.append(when.timestamp() if when else None)
+
+        stub = StubAriRestServer().start()
+        try:
+            entries = read_journal(options['source'], *bounds)
+            report = asyncio.run(self.replay(entries, stub, options))
+        finally:
+            stub.stop()
+
+        report['ari_requests'] = dict(stub.requests.most_common())
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_report(report)
+
+    # ========================================================================
+    # Replay
+    # ========================================================================
+
+    def servers(self, stub, server_id):
+        """Lookup of the AsteriskServer to replay a recorded server id as, pointed at the stub"""
+        from telephony.models import AsteriskServer
+
+        servers = {server.id: server for server in AsteriskServer.objects.all()}
+        for server in servers.values():
+            # In memory only: the handlers' REST calls go to the stub
+            server.ari_host, server.ari_port = stub.host, stub.port
+
+        if server_id:
+            if server_id not in servers:
+                raise CommandError(f'AsteriskServer {server_id} not found')
+            return lambda recorded_id: servers[server_id]
+
+        fallback = next((server for server in servers.values() if server.is_active), None)
+        if fallback is None:
+            raise CommandError('No active AsteriskServer to replay events for; pass --server-id')
+        return lambda recorded_id: servers.get(recorded_id) or fallback
+
+    async def replay(self, entries, stub, options):
+        loop = asyncio.get_running_loop()
+        speed = options['speed']
+        limit = options['limit']
+        latencies = LatencyRecorder()
+        server_for = await loop.run_in_executor(None, self.servers, stub, options['server_id'])
+
+        if options['worker'] == 'ari_worker':
+            submit, finish = await self._ari_worker(latencies)
+        else:
+            submit, finish = self._ari_event_worker(latencies)
+
+        read = skipped = 0
+        behind = 0.0
+        first_received = None
+        started = loop.time()
+
+        for received, recorded_server_id, message in entries:
+            if first_received is None:
+                first_received = received
+            last_received = received
+            if speed:
+                due = started + (received - first_received) / speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    behind = max(behind, -delay)
+
+            server = server_for(recorded_server_id)
+            if not await submit(server, message):
+                skipped += 1
+            read += 1
+            if limit and read >= limit:
+                break
+
+        pipeline = await finish()
+        seconds = loop.time() - started
+        handled = sum(row['count'] for row in latencies.rows())
+        span = (last_received - first_received) if read else 0.0
+
+        return {
+            'worker': options['worker'],
+            'speed': speed or 'unthrottled',
+            'events': read,
+            'handled': handled,
+            'skipped': skipped,
+            'errors': sum(latencies.errors.values()),
+            'seconds': round(seconds, 3),
+            'events_per_second': round(handled / seconds, 1) if seconds > 0 else 0.0,
+            'recorded_seconds': round(span, 3),
+            'achieved_speed': round(span / seconds, 2) if seconds > 0 and span else None,
+            'max_behind_ms': round(behind * 1000, 2),
+            'pipeline': pipeline,
+            'event_types': latencies.rows(),
+        }
+
+    async def _ari_worker(self, latencies):
+        """submit/finish coroutines feeding ari_worker's handlers through its event pipeline"""
+        from telephony.event_pipeline import EventPipeline
+        from telephony.management.commands.ari_worker import Command as AriWorker
+
+        worker = AriWorker(stdout=self.stdout, stderr=self.stderr)
+        worker.prepare()
+
+        def timed(server, event):
+            started = time.monotonic()
+            error = False
+            try:
+                worker._handle_event(server, event)
+            except Exception:
+                error = True
+                raise
+            finally:
+                latencies.record(event.get('type'), time.monotonic() - started, error)
+
+        # Own pool name so a replay never shows up as a live ARI worker
+        pipeline = EventPipeline(timed, report_interval=3600, pool='ari_worker:replay')
+        await pipeline.start()
+
+        async def submit(server, message):
+            event = worker.parse_event(message)
+            if event is None:
+                return False
+            await pipeline.submit(server, event)
+            return True
+
+        async def finish():
+            await pipeline.join()
+            snapshot = pipeline.snapshot()
+            await pipeline.stop()
+            return {key: snapshot[key] for key in ('handled', 'errors', 'max_lag_ms')}
+
+        return submit, finish
+
+    def _ari_event_worker(self, latencies):
+        """submit/finish coroutines feeding ARIEventWorker.handle_event in order, as it runs live"""
+        from campaigns.management.commands.ari_event_worker import ARIEventWorker
+
+        workers = {}
+
+        async def submit(server, message):
+            try:
+                event = json.loads(message)
+            except json.JSONDecodeError:
+                return False
+            worker = workers.get(server.id)
+            if worker is None:
+                worker = workers[server.id] = ARIEventWorker(server)
+            started = time.monotonic()
+            error = False
+            try:
+                await worker.handle_event(event)
+            except Exception:
+                error = True
+            latencies.record(event.get('type'), time.monotonic() - started, error)
+            return True
+
+        async def finish():
+            return None
+
+        return submit, finish
+
+    # ========================================================================
+    # Report
+    # ========================================================================
+
+    def print_report(self, report):
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {report['events']} events into {report['worker']} at speed {report['speed']}: "
+            f"{report['handled']} handled, {report['skipped']} skipped, {report['errors']} errors"
+        ))
+        self.stdout.write(
+            f"  {report['seconds']}s wall for {report['recorded_seconds']}s recorded "
+            f"(x{report['achieved_speed']}), {report['events_per_second']} events/s, "
+            f"fell behind schedule by up to {report['max_behind_ms']}ms"
+        )
+        if report['pipeline']:
+            self.stdout.write(f"  Pipeline: max receive-to-handled lag {report['pipeline']['max_lag_ms']}ms")
+
+        self.stdout.write('')
+        self.stdout.write(f"  {'Event type':<26}{'count':>8}{'errors':>8}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for row in report['event_types']:
+            self.stdout.write(
+                f"  {row['type'] or '-':<26}{row['count']:>8}{row['errors']:>8}{row['avg_ms']:>10}"
+                f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}"
+            )
+
+        if report['ari_requests']:
+            self.stdout.write('')
+            self.stdout.write('  Stub ARI requests:')
+            for route, count in report['ari_requests'].items():
+                self.stdout.write(f"    {route:<40}{count:>8}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telephony', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carrier',
+            name='max_cps',
+            field=models.PositiveIntegerField(default=0, help_text='Call attempts per second, 0 = unlimited'),
+        ),
+    ]
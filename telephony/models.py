@@ -110,6 +110,7 @@ class Carrier(TimeStampedModel):
     
     # Capacity and Routing
     max_channels = models.PositiveIntegerField(default=30)
+    max_cps = models.PositiveIntegerField(default=0, help_text="Call attempts per second, 0 = unlimited")
     cost_per_minute = models.DecimalField(max_digits=10, decimal_places=4, default=0.0)
     priority = models.PositiveIntegerField(default=1)
     
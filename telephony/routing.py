@@ -1,25 +1,307 @@
 # Helpers for outbound routing and call metadata
-import random
+import logging
+import threading
+import time
+import uuid
 from typing import Optional, Dict, Any
+from django.conf import settings
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
 
-def select_carrier_for_campaign(campaign):
+# Take a channel slot and a CPS token for a carrier, both or neither.
+# KEYS[1] = carrier:{id}:channels (ZSET slot -> lease expiry)
+# KEYS[2] = carrier:{id}:cps (HASH tokens, ts)
+# KEYS[3] = carrier:slot:{slot} (STRING carrier id, for release by channel id)
+# ARGV = max_channels, max_cps, slot, lease_seconds (0 = unlimited), carrier_id
+# Returns 1 on success, 0 when every channel is busy, -1 when over CPS
+ACQUIRE_CARRIER_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local max_channels = tonumber(ARGV[1])
+local max_cps = tonumber(ARGV[2])
+local lease = tonumber(ARGV[4])
+
+if max_channels > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+    if redis.call('ZCARD', KEYS[1]) >= max_channels then
+        return 0
+    end
+end
+
+if max_cps > 0 then
+    local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or max_cps
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(max_cps, tokens + math.max(0, now - ts) * max_cps)
+    if tokens < 1 then
+        return -1
+    end
+    redis.call('HSET', KEYS[2], 'tokens', tokens - 1, 'ts', now)
+    redis.call('EXPIRE', KEYS[2], 60)
+end
+
+if max_channels > 0 then
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], lease)
+    redis.call('SET', KEYS[3], ARGV[5], 'EX', lease)
+end
+return 1
+"""
+
+# Give back the slot bound to a channel id, if any.
+# KEYS[1] = carrier:slot:{slot}
+# ARGV = slot
+# Returns 1 if a slot was released
+RELEASE_CHANNEL_LUA = """
+local carrier_id = redis.call('GET', KEYS[1])
+if not carrier_id then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', 'carrier:' .. carrier_id .. ':channels', ARGV[1])
+return 1
+"""
+
+
+def _carrier_channels_key(carrier_id):
+    return f"carrier:{carrier_id}:channels"
+
+
+def _carrier_cps_key(carrier_id):
+    return f"carrier:{carrier_id}:cps"
+
+
+def _slot_key(slot):
+    return f"carrier:slot:{slot}"
+
+
+class CarrierRouter:
     """
-    Pick an active carrier for the given campaign using weighted choice.
-    Updates last_used_at on the CampaignCarrier entry to enable simple round-robin.
-    Returns Carrier instance or None.
+    Weighted carrier selection with trunk limits shared through Redis
+
+    - Campaign carriers and weights are cached per process for WEIGHT_TTL
+      seconds instead of being queried on every originate.
+    - Smooth weighted round-robin (current_weight += weight, pick the max,
+      subtract the total) spreads calls evenly in proportion to weight.
+    - Each pick takes a channel slot (Carrier.max_channels) and a CPS token
+      (Carrier.max_cps) in one Lua call. A carrier at its limit is skipped
+      for the next one in line.
+    - The slot is keyed by the call's ARI channel id (passed as channelId
+      on originate) and mapped back to its carrier in Redis, so the ARI
+      worker releases it on ChannelDestroyed from the channel id alone.
+      Slots that are never released expire after CARRIER_SLOT_TTL seconds.
+    - CampaignCarrier.last_used_at is written in one UPDATE every
+      USAGE_FLUSH_INTERVAL seconds, not once per call.
+
+    Usage:
+        router = get_carrier_router()
+        channel_id = str(uuid.uuid4())
+        route = router.acquire(campaign, channel_id=channel_id)
+        if not route['success']:
+            ...  # every carrier is at its channel or CPS limit; retry later
+        ...  # originate with channel_id=channel_id via route['carrier']
+        router.release_channel(channel_id)  # only if the originate fails
     """
-    qs = campaign.campaign_carriers.select_related('carrier', 'carrier__asterisk_server')\
-        .filter(carrier__is_active=True, carrier__asterisk_server__is_active=True)
-    carriers = list(qs)
-    if not carriers:
-        return None
-    weights = [(c.weight or 1) for c in carriers]
-    chosen_cc = random.choices(carriers, weights=weights, k=1)[0]
-    chosen_cc.last_used_at = timezone.now()
-    chosen_cc.save(update_fields=['last_used_at', 'updated_at'])
-    return chosen_cc.carrier
+
+    WEIGHT_TTL = 30.0            # seconds campaign carriers are cached
+    USAGE_FLUSH_INTERVAL = 10.0  # seconds between last_used_at flushes
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self._acquire_script = None
+        self._release_script = None
+        self._carriers = {}   # campaign_id -> (loaded_at, [CampaignCarrier])
+        self._current = {}    # campaign_id -> {campaign_carrier_id: current_weight}
+        self._used = {}       # campaign_carrier_id -> last use
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @staticmethod
+    def slot_ttl():
+        autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+        return int(autodialer_settings.get('CARRIER_SLOT_TTL', 3600))
+
+    # ========================================================================
+    # Carrier cache
+    # ========================================================================
+
+    def campaign_carriers(self, campaign):
+        """Active CampaignCarrier rows for a campaign, cached for WEIGHT_TTL"""
+        now = time.monotonic()
+        cached = self._carriers.get(campaign.id)
+        if cached and now - cached[0] < self.WEIGHT_TTL:
+            return cached[1]
+
+        qs = campaign.campaign_carriers.select_related('carrier', 'carrier__asterisk_server')\
+            .filter(carrier__is_active=True, carrier__asterisk_server__is_active=True)\
+            .order_by('id')
+        entries = list(qs)
+        with self._lock:
+            self._carriers[campaign.id] = (now, entries)
+            current = self._current.setdefault(campaign.id, {})
+            live = {entry.id for entry in entries}
+            for entry_id in list(current):
+                if entry_id not in live:
+                    del current[entry_id]
+        return entries
+
+    def invalidate(self, campaign_id=None):
+        """Drop cached carriers (all campaigns when campaign_id is None)"""
+        with self._lock:
+            if campaign_id is None:
+                self._carriers.clear()
+            else:
+                self._carriers.pop(campaign_id, None)
+
+    # ========================================================================
+    # Selection
+    # ========================================================================
+
+    def _ranked(self, campaign_id, entries):
+        """
+        One smooth weighted round-robin step; entries best first
+
+        Only the winner is charged the total weight. If it turns out to be at
+        its limit the caller moves on to the runner-up, and so on.
+        """
+        with self._lock:
+            current = self._current.setdefault(campaign_id, {})
+            total = 0
+            for entry in entries:
+                weight = entry.weight or 1
+                current[entry.id] = current.get(entry.id, 0) + weight
+                total += weight
+            ranked = sorted(entries, key=lambda entry: current[entry.id], reverse=True)
+            current[ranked[0].id] -= total
+        return ranked
+
+    def _try_carrier(self, carrier, slot):
+        if self._acquire_script is None:
+            self._acquire_script = self.redis.register_script(ACQUIRE_CARRIER_LUA)
+        return int(self._acquire_script(
+            keys=[_carrier_channels_key(carrier.id), _carrier_cps_key(carrier.id), _slot_key(slot)],
+            args=[carrier.max_channels or 0, carrier.max_cps or 0, slot, self.slot_ttl(), carrier.id]
+        ))
+
+    def acquire(self, campaign, channel_id=None):
+        """
+        Pick a carrier for one call and reserve its trunk capacity
+
+        Args:
+            campaign: Campaign being dialed
+            channel_id: ARI channel id the call will be originated with; the
+                slot is bound to it so release_channel() can free it
+
+        Returns:
+            {'success': True, 'carrier': Carrier, 'slot': str} - originate
+                with channel_id and release_channel() it if the originate fails
+            {'success': True, 'carrier': None, 'slot': None} - the campaign has
+                no carriers; the dialplan routes the call
+            {'success': False, 'reason': 'channels' | 'cps'} - every carrier
+                is at a limit right now
+        """
+        entries = self.campaign_carriers(campaign)
+        if not entries:
+            return {'success': True, 'carrier': None, 'slot': None}
+
+        slot = channel_id or uuid.uuid4().hex
+        reason = 'channels'
+        for entry in self._ranked(campaign.id, entries):
+            try:
+                result = self._try_carrier(entry.carrier, slot)
+            except Exception as e:
+                # Redis trouble must not stop dialing; fall back to weights alone
+                logger.error(f"Carrier limit check failed for {entry.carrier}: {e}")
+                result = 1
+            if result == 1:
+                self._mark_used(entry.id)
+                return {'success': True, 'carrier': entry.carrier, 'slot': slot}
+            if result == -1:
+                reason = 'cps'
+
+        logger.debug(f"No carrier capacity for campaign {campaign.id} ({reason})")
+        return {'success': False, 'reason': reason}
+
+    def release(self, carrier_id, slot):
+        """Give back a channel slot; safe to call more than once"""
+        if not carrier_id or not slot:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrem(_carrier_channels_key(carrier_id), slot)
+            pipe.delete(_slot_key(slot))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Carrier slot release failed for carrier {carrier_id}: {e}")
+
+    def release_channel(self, channel_id):
+        """
+        Give back the slot acquired for a channel id, whichever carrier holds it
+
+        Called for every destroyed channel; a channel without a slot is a
+        single GET. Returns True if a slot was released.
+        """
+        if not channel_id:
+            return False
+        try:
+            if self._release_script is None:
+                self._release_script = self.redis.register_script(RELEASE_CHANNEL_LUA)
+            return bool(int(self._release_script(keys=[_slot_key(channel_id)], args=[channel_id])))
+        except Exception as e:
+            logger.error(f"Carrier slot release failed for channel {channel_id}: {e}")
+            return False
+
+    def active_channels(self, carrier_id):
+        """Unexpired channel slots held on a carrier"""
+        key = _carrier_channels_key(carrier_id)
+        return self.redis.zcount(key, time.time(), '+inf')
+
+    # ========================================================================
+    # Usage stats
+    # ========================================================================
+
+    def _mark_used(self, campaign_carrier_id):
+        with self._lock:
+            self._used[campaign_carrier_id] = timezone.now()
+        if time.monotonic() - self._flushed_at >= self.USAGE_FLUSH_INTERVAL:
+            self.flush_usage()
+
+    def flush_usage(self):
+        """Write buffered last_used_at values in one UPDATE"""
+        with self._lock:
+            used, self._used = self._used, {}
+            self._flushed_at = time.monotonic()
+        if not used:
+            return 0
+
+        from campaigns.models import CampaignCarrier
+        try:
+            return CampaignCarrier.objects.filter(id__in=list(used)).update(last_used_at=max(used.values()))
+        except Exception as e:
+            logger.error(f"Carrier usage flush failed: {e}")
+            return 0
+
+
+_carrier_router = None
+_carrier_router_lock = threading.Lock()
+
+
+def get_carrier_router():
+    """Process-wide carrier router"""
+    global _carrier_router
+    if _carrier_router is None:
+        with _carrier_router_lock:
+            if _carrier_router is None:
+                _carrier_router = CarrierRouter()
+    return _carrier_router
 
 
 def build_dial_number(phone_number: str, campaign=None, carrier=None) -> str:
@@ -5,14 +5,69 @@ import websockets
 import json
 import requests
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
+from requests.adapters import HTTPAdapter
 from .models import AsteriskServer, Phone, CallQueue, Recording
 from calls.models import CallLog
 
+try:
+    from .ari_client import AriError, get_sync_ari_client
+    ARI_CLIENT_AVAILABLE = True
+except ImportError:
+    # aiohttp not installed: ARI calls go through the requests session pool
+    AriError = requests.exceptions.RequestException
+    ARI_CLIENT_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Keep-alive ARI sessions (one per server) and the shared originate pool.
+# Every AsteriskService for the same server reuses the same connections.
+_ari_sessions = {}
+_originate_executor = None
+_pool_lock = threading.Lock()
+
+
+def get_originate_concurrency():
+    """Maximum ARI originates in flight per process"""
+    autodialer_settings = getattr(settings, 'AUTODIALER_SETTINGS', {})
+    return autodialer_settings.get('ARI_ORIGINATE_CONCURRENCY', 32)
+
+
+def get_ari_session(base_url, username, password):
+    """Shared requests.Session with a connection pool sized for burst originates"""
+    key = (base_url, username, password)
+    session = _ari_sessions.get(key)
+    if session is None:
+        with _pool_lock:
+            session = _ari_sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.auth = (username, password)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=get_originate_concurrency())
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _ari_sessions[key] = session
+    return session
+
+
+def get_originate_executor():
+    """Process-wide thread pool; its size is the in-flight originate limit"""
+    global _originate_executor
+    if _originate_executor is None:
+        with _pool_lock:
+            if _originate_executor is None:
+                _originate_executor = ThreadPoolExecutor(
+                    max_workers=get_originate_concurrency(),
+                    thread_name_prefix='ari-originate'
+                )
+    return _originate_executor
+
+
 class AsteriskService:
     """
     Service class for Asterisk integration via ARI and AMI
@@ -28,6 +83,13 @@ class AsteriskService:
         self.ari_username = server.ari_username
         self.ari_password = server.ari_password
         self.application = server.ari_application
+
+    @property
+    def session(self):
+        """Keep-alive ARI pool for this server: the async client's sync facade, else requests"""
+        if ARI_CLIENT_AVAILABLE:
+            return get_sync_ari_client(self.ari_base_url, self.ari_username, self.ari_password)
+        return get_ari_session(self.ari_base_url, self.ari_username, self.ari_password)
     
     def test_connection(self):
         """
@@ -36,9 +98,8 @@ class AsteriskService:
         try:
             # Test ARI connection
             # ARI base already ends with /ari; do not repeat it
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/applications",
-                auth=(self.ari_username, self.ari_password),
                 timeout=10
             )
             
@@ -54,7 +115,7 @@ class AsteriskService:
                     'error': f'ARI connection failed: {response.status_code}'
                 }
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, AriError) as e:
             return {
                 'success': False,
                 'error': f'Connection error: {str(e)}'
@@ -66,9 +127,8 @@ class AsteriskService:
         """
         try:
             # Get Asterisk info
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/asterisk/info",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             
@@ -78,18 +138,16 @@ class AsteriskService:
             asterisk_info = response.json()
             
             # Get channel count
-            channels_response = requests.get(
+            channels_response = self.session.get(
                 f"{self.ari_base_url}/channels",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             
             channels = channels_response.json() if channels_response.status_code == 200 else []
             
             # Get endpoint status
-            endpoints_response = requests.get(
+            endpoints_response = self.session.get(
                 f"{self.ari_base_url}/endpoints",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             
@@ -116,9 +174,8 @@ class AsteriskService:
         Retrieve PJSIP endpoint registration/state information
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/endpoints/PJSIP/{extension}",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             if response.status_code == 200:
@@ -151,9 +208,8 @@ class AsteriskService:
         Optimized to avoid N+1 API calls.
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/endpoints",
-                auth=(self.ari_username, self.ari_password),
                 timeout=10
             )
             
@@ -184,9 +240,8 @@ class AsteriskService:
         Get value of a channel variable
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/channels/{channel_id}/variable",
-                auth=(self.ari_username, self.ari_password),
                 params={'variable': variable},
                 timeout=5
             )
@@ -219,9 +274,8 @@ class AsteriskService:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ari_base_url}/channels",
-                auth=(self.ari_username, self.ari_password),
                 json=call_data,
                 timeout=10
             )
@@ -263,17 +317,15 @@ class AsteriskService:
     # ARI Bridge Utilities
     # =====================
     def _ari_post(self, path, json_body=None, timeout=10):
-        return requests.post(
+        return self.session.post(
             f"{self.ari_base_url}{path}",
-            auth=(self.ari_username, self.ari_password),
             json=json_body or {},
             timeout=timeout
         )
 
     def _ari_delete(self, path, timeout=10):
-        return requests.delete(
+        return self.session.delete(
             f"{self.ari_base_url}{path}",
-            auth=(self.ari_username, self.ari_password),
             timeout=timeout
         )
 
@@ -301,9 +353,8 @@ class AsteriskService:
         """
         try:
             # Create a mixing bridge
-            bridge_response = requests.post(
+            bridge_response = self.session.post(
                 f"{self.ari_base_url}/bridges",
-                auth=(self.ari_username, self.ari_password),
                 json={"type": "mixing"},
                 timeout=10
             )
@@ -363,36 +414,46 @@ class AsteriskService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def originate_local_channel(self, number, context='from-campaign', app='autodialer', extension=None, priority=1, callerid=None, variables=None, timeout=45):
+    @staticmethod
+    def _local_channel_payload(number, context='from-campaign', app='autodialer', extension=None, priority=1, callerid=None, variables=None, timeout=45, channel_id=None):
+        payload = {
+            'endpoint': f'Local/{number}@{context}',
+            'callerId': callerid or number,
+            'timeout': timeout,
+        }
+        if channel_id:
+            # Caller-chosen id, e.g. the key of a carrier slot held for this call
+            payload['channelId'] = channel_id
+        
+        # Allow originating to an extension/context/priority OR an application
+        if extension:
+            payload['extension'] = extension
+            payload['context'] = context
+            payload['priority'] = priority
+        else:
+            payload['app'] = app
+            
+        if variables:
+            clean_vars = {k: str(v) for k, v in variables.items() if v not in (None, '')}
+            payload['variables'] = clean_vars
+            args = []
+            for key in ['CALL_TYPE', 'BRIDGE_ID', 'QUEUE_ID', 'CAMPAIGN_ID', 'AGENT_ID', 'CUSTOMER_NUMBER']:
+                if key in clean_vars:
+                    args.append(f"{key}={clean_vars[key]}")
+            if args and 'app' in payload:
+                payload['appArgs'] = ','.join(args)
+        return payload
+
+    def originate_local_channel(self, number, context='from-campaign', app='autodialer', extension=None, priority=1, callerid=None, variables=None, timeout=45, channel_id=None):
         """
         Originate using Local/number@context so PBX dialplan handles routing.
         Use this for prefix-based routing to GSM gateways (Dinstar/OpenVox).
         """
         try:
-            payload = {
-                'endpoint': f'Local/{number}@{context}',
-                'callerId': callerid or number,
-                'timeout': timeout,
-            }
-            
-            # Allow originating to an extension/context/priority OR an application
-            if extension:
-                payload['extension'] = extension
-                payload['context'] = context
-                payload['priority'] = priority
-            else:
-                payload['app'] = app
-                
-            if variables:
-                clean_vars = {k: str(v) for k, v in variables.items() if v not in (None, '')}
-                payload['variables'] = clean_vars
-                args = []
-                for key in ['CALL_TYPE', 'BRIDGE_ID', 'QUEUE_ID', 'CAMPAIGN_ID', 'AGENT_ID', 'CUSTOMER_NUMBER']:
-                    if key in clean_vars:
-                        args.append(f"{key}={clean_vars[key]}")
-                if args and 'app' in payload:
-                    payload['appArgs'] = ','.join(args)
-
+            payload = self._local_channel_payload(
+                number, context=context, app=app, extension=extension, priority=priority,
+                callerid=callerid, variables=variables, timeout=timeout, channel_id=channel_id
+            )
             r = self._ari_post("/channels", json_body=payload, timeout=timeout+5)
             if r.status_code in (200, 201):
                 return {"success": True, "channel_id": r.json().get('id')}
@@ -400,6 +461,51 @@ class AsteriskService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def originate_batch(self, calls, request_timeout=10):
+        """
+        Originate many Local channels concurrently over the keep-alive pool
+
+        Args:
+            calls: list of originate_local_channel() kwargs, one dict per call
+            request_timeout: seconds to wait for each ARI response
+
+        Returns a result per call, in order: originate_local_channel()'s dict
+        plus `queued_ms` (wait for an in-flight slot) and `elapsed_ms` (ARI
+        round trip). At most ARI_ORIGINATE_CONCURRENCY requests are in flight
+        per process, so a burst goes out in about one round trip per slot.
+        """
+        if not calls:
+            return []
+
+        session = self.session
+        url = f"{self.ari_base_url}/channels"
+        batch_start = time.monotonic()
+
+        def send(kwargs):
+            started = time.monotonic()
+            try:
+                payload = self._local_channel_payload(**kwargs)
+                r = session.post(url, json=payload, timeout=request_timeout)
+                if r.status_code in (200, 201):
+                    result = {"success": True, "channel_id": r.json().get('id')}
+                else:
+                    result = {"success": False, "error": f"Originate Local failed: {r.text}"}
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            finished = time.monotonic()
+            result['queued_ms'] = round((started - batch_start) * 1000, 2)
+            result['elapsed_ms'] = round((finished - started) * 1000, 2)
+            return result
+
+        results = list(get_originate_executor().map(send, calls))
+
+        succeeded = sum(1 for result in results if result['success'])
+        logger.info(
+            f"Originated {succeeded}/{len(results)} calls on {self.server} "
+            f"in {(time.monotonic() - batch_start) * 1000:.0f}ms"
+        )
+        return results
+
     def hangup_channel(self, channel_id):
         try:
             r = self._ari_delete(f"/channels/{channel_id}")
@@ -438,7 +544,7 @@ class AsteriskService:
     # =====================
     def get_channel(self, channel_id):
         try:
-            resp = requests.get(f"{self.ari_base_url}/channels/{channel_id}", auth=(self.ari_username, self.ari_password), timeout=5)
+            resp = self.session.get(f"{self.ari_base_url}/channels/{channel_id}", timeout=5)
             if resp.status_code == 200:
                 return {"success": True, "data": resp.json()}
             return {"success": False, "error": f"{resp.status_code}: {resp.text}"}
@@ -460,9 +566,8 @@ class AsteriskService:
     def get_channel_variables(self, channel_id):
         """Get channel variables from Asterisk ARI"""
         try:
-            resp = requests.get(
+            resp = self.session.get(
                 f"{self.ari_base_url}/channels/{channel_id}/variable",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             if resp.status_code == 200:
@@ -482,9 +587,8 @@ class AsteriskService:
         Hangup a specific call
         """
         try:
-            response = requests.delete(
+            response = self.session.delete(
                 f"{self.ari_base_url}/channels/{channel_id}",
-                auth=(self.ari_username, self.ari_password),
                 timeout=10
             )
             
@@ -519,9 +623,8 @@ class AsteriskService:
         try:
             if transfer_type == 'blind':
                 # Blind transfer
-                response = requests.post(
+                response = self.session.post(
                     f"{self.ari_base_url}/channels/{channel_id}/redirect",
-                    auth=(self.ari_username, self.ari_password),
                     json={
                         'endpoint': destination
                     },
@@ -529,9 +632,8 @@ class AsteriskService:
                 )
             else:
                 # Attended transfer (more complex, requires bridge)
-                response = requests.post(
+                response = self.session.post(
                     f"{self.ari_base_url}/channels/{channel_id}/dial",
-                    auth=(self.ari_username, self.ari_password),
                     json={
                         'endpoint': destination,
                         'timeout': 30
@@ -559,9 +661,8 @@ class AsteriskService:
         Get list of active calls on the server
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.ari_base_url}/channels",
-                auth=(self.ari_username, self.ari_password),
                 timeout=5
             )
             
@@ -634,6 +735,218 @@ class AsteriskService:
             return 0
 
 
+class AsteriskServerPool:
+    """
+    Load and health of every active AsteriskServer, shared through Redis
+
+    One process at a time samples a server's live channel count
+    (GET /channels) every SAMPLE_INTERVAL seconds. Originates placed since
+    the last sample are counted on top, so a burst spreads across servers
+    before the next sample arrives. Load is (channels + originated) divided
+    by AsteriskServer.max_calls. A server whose ARI does not answer is
+    skipped until a later sample finds it up again.
+
+    Data Structures:
+    - asterisk:server:{id}:load (Hash) - channels, originated, healthy, sampled_at
+    - asterisk:server:{id}:probe (String, NX lock) - one sampler per interval
+
+    Usage:
+        pool = get_server_pool()
+        server = pool.pick(carrier=carrier, among=agent_server_ids)
+    """
+
+    SAMPLE_INTERVAL = 5.0   # seconds between channel-count samples
+    SERVER_TTL = 30.0       # seconds the server and carrier lists are cached
+    PROBE_TIMEOUT = 2       # seconds to wait for ARI when sampling
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self._servers = (0.0, [])
+        self._carrier_servers = {}   # carrier id -> (loaded_at, server ids)
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from django_redis import get_redis_connection
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @staticmethod
+    def _load_key(server_id):
+        return f"asterisk:server:{server_id}:load"
+
+    # ========================================================================
+    # Servers
+    # ========================================================================
+
+    def servers(self):
+        """Active servers, cached for SERVER_TTL"""
+        loaded_at, servers = self._servers
+        if time.monotonic() - loaded_at < self.SERVER_TTL:
+            return servers
+        servers = list(AsteriskServer.objects.filter(is_active=True).order_by('id'))
+        self._servers = (time.monotonic(), servers)
+        return servers
+
+    def carrier_server_ids(self, carrier):
+        """
+        Servers that can place calls on a carrier's trunk
+
+        The same trunk (protocol, host and port) may be provisioned as a
+        Carrier on several servers; any of them can carry the call.
+        """
+        from .models import Carrier
+
+        cached = self._carrier_servers.get(carrier.id)
+        if cached and time.monotonic() - cached[0] < self.SERVER_TTL:
+            return cached[1]
+        server_ids = set(Carrier.objects.filter(
+            protocol=carrier.protocol,
+            server_ip=carrier.server_ip,
+            port=carrier.port,
+            is_active=True,
+        ).values_list('asterisk_server_id', flat=True))
+        server_ids.add(carrier.asterisk_server_id)
+        with self._lock:
+            self._carrier_servers[carrier.id] = (time.monotonic(), server_ids)
+        return server_ids
+
+    def invalidate(self):
+        with self._lock:
+            self._servers = (0.0, [])
+            self._carrier_servers = {}
+
+    # ========================================================================
+    # Load sampling
+    # ========================================================================
+
+    def probe(self, server):
+        """Sample a server's live channels now; returns the stored sample"""
+        service = AsteriskService(server)
+        try:
+            response = service.session.get(f"{service.ari_base_url}/channels", timeout=self.PROBE_TIMEOUT)
+            healthy = response.status_code == 200
+            channels = len(response.json()) if healthy else 0
+        except Exception as e:
+            logger.warning(f"ARI probe failed for {server}: {e}")
+            healthy, channels = False, 0
+
+        sample = {
+            'channels': channels,
+            'originated': 0,
+            'healthy': int(healthy),
+            'sampled_at': time.time(),
+        }
+        key = self._load_key(server.id)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping=sample)
+        pipe.expire(key, int(self.SAMPLE_INTERVAL * 12))
+        pipe.execute()
+
+        status = 'connected' if healthy else 'error'
+        if server.connection_status != status:
+            update = {'connection_status': status}
+            if healthy:
+                update['last_connected'] = timezone.now()
+            AsteriskServer.objects.filter(id=server.id).update(**update)
+            server.connection_status = status
+            logger.info(f"Asterisk server {server} is now {status}")
+        return sample
+
+    def sample(self, server):
+        """Latest load sample, re-probing when it is older than SAMPLE_INTERVAL"""
+        raw = self.redis.hgetall(self._load_key(server.id))
+        data = {k.decode(): float(v) for k, v in raw.items()}
+        if data and time.time() - data.get('sampled_at', 0) < self.SAMPLE_INTERVAL:
+            return data
+        # Only one process re-samples a server per interval
+        if self.redis.set(f"asterisk:server:{server.id}:probe", 1, nx=True, ex=max(1, int(self.SAMPLE_INTERVAL))):
+            return self.probe(server)
+        return data or {'channels': 0, 'originated': 0, 'healthy': 1, 'sampled_at': 0}
+
+    def load(self, server):
+        """Fraction of max_calls in use, or None if the server is down"""
+        data = self.sample(server)
+        if not int(data.get('healthy', 0)):
+            return None
+        return (data.get('channels', 0) + data.get('originated', 0)) / max(server.max_calls or 1, 1)
+
+    def status(self):
+        """Load and health of every active server (dashboards, debugging)"""
+        rows = []
+        for server in self.servers():
+            data = self.sample(server)
+            rows.append({
+                'server_id': server.id,
+                'name': server.name,
+                'healthy': bool(int(data.get('healthy', 0))),
+                'channels': int(data.get('channels', 0)),
+                'originated': int(data.get('originated', 0)),
+                'max_calls': server.max_calls,
+            })
+        return rows
+
+    # ========================================================================
+    # Placement
+    # ========================================================================
+
+    def pick(self, carrier=None, among=None):
+        """
+        Least-loaded healthy server for one originate
+
+        Args:
+            carrier: the call's Carrier; only servers provisioned with its
+                     trunk are considered
+            among: preferred server ids (e.g. where the agents' bridges
+                   live); used when any of them is a candidate
+
+        Counts the originate against the chosen server. Returns None when
+        no candidate server is up.
+        """
+        candidates = self.servers()
+        if carrier is not None:
+            server_ids = self.carrier_server_ids(carrier)
+            candidates = [server for server in candidates if server.id in server_ids]
+        if among:
+            preferred = [server for server in candidates if server.id in among]
+            if preferred:
+                candidates = preferred
+
+        best, best_load = None, None
+        for server in candidates:
+            try:
+                load = self.load(server)
+            except Exception as e:
+                # Without Redis, fall back to the first candidate
+                logger.error(f"Server load lookup failed for {server}: {e}")
+                return candidates[0]
+            if load is not None and (best_load is None or load < best_load):
+                best, best_load = server, load
+
+        if best is None:
+            logger.error("No healthy Asterisk server available")
+            return None
+        try:
+            self.redis.hincrby(self._load_key(best.id), 'originated', 1)
+        except Exception as e:
+            logger.error(f"Server load update failed for {best}: {e}")
+        return best
+
+
+_server_pool = None
+
+
+def get_server_pool():
+    """Process-wide Asterisk server pool"""
+    global _server_pool
+    if _server_pool is None:
+        with _pool_lock:
+            if _server_pool is None:
+                _server_pool = AsteriskServerPool()
+    return _server_pool
+
+
 class WebRTCService:
     """
     Service class for WebRTC phone management
@@ -725,9 +1038,8 @@ class CallRecordingService:
             }
             
             asterisk_service = AsteriskService(self.server)
-            response = requests.post(
+            response = asterisk_service.session.post(
                 f"{asterisk_service.ari_base_url}/channels/{channel_id}/record",
-                auth=(asterisk_service.ari_username, asterisk_service.ari_password),
                 json=recording_data,
                 timeout=10
             )
@@ -768,9 +1080,8 @@ class CallRecordingService:
         """
         try:
             asterisk_service = AsteriskService(self.server)
-            response = requests.delete(
+            response = asterisk_service.session.delete(
                 f"{asterisk_service.ari_base_url}/recordings/live/{recording_name}",
-                auth=(asterisk_service.ari_username, asterisk_service.ari_password),
                 timeout=10
             )
             
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, UserSession, AgentStatus
+from .models import UserProfile, UserSession, AgentStatus, AgentDailyStats
 
 
 @admin.register(UserProfile)
@@ -28,6 +28,13 @@ class AgentStatusAdmin(admin.ModelAdmin):
     autocomplete_fields = ("user", "current_campaign")
 
 
+@admin.register(AgentDailyStats)
+class AgentDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("agent", "date", "calls_made", "calls_answered", "talk_time", "sales")
+    list_filter = ("date",)
+    search_fields = ("agent__username",)
+
+
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
     can_delete = False
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('calls_made', models.PositiveIntegerField(default=0)),
+                ('calls_answered', models.PositiveIntegerField(default=0)),
+                ('talk_time', models.PositiveIntegerField(default=0, help_text='Total talk time in seconds')),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Agent Daily Statistics',
+                'verbose_name_plural': 'Agent Daily Statistics',
+                'ordering': ['-date'],
+                'unique_together': {('agent', 'date')},
+            },
+        ),
+    ]
@@ -262,6 +262,28 @@ class AgentStatus(TimeStampedModel):
 
 
 
+class AgentDailyStats(TimeStampedModel):
+    """
+    Daily call statistics per agent, rolled up from CallLog
+    """
+    agent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    calls_made = models.PositiveIntegerField(default=0)
+    calls_answered = models.PositiveIntegerField(default=0)
+    talk_time = models.PositiveIntegerField(default=0, help_text="Total talk time in seconds")
+    sales = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['agent', 'date']
+        verbose_name = "Agent Daily Statistics"
+        verbose_name_plural = "Agent Daily Statistics"
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.agent.username} - {self.date}"
+
+
 class AgentTimeLog(models.Model):
     """
     Records every agent status interval for time monitoring / reporting.